@@ -1,4 +1,3 @@
-import tensorflow as tf
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from flask import Flask, jsonify, request
@@ -7,14 +6,29 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 from jwt import ExpiredSignatureError
 
+from .batching import MicroBatcher
+from .cache import TTLCache
+from . import database
 from .config import Config
+from .inference import InferencePool
+from .lookup_cache import lookup_cache
+from .metrics import Metrics
+from .model_loader import ModelLoader, models_cli
+from .model_registry import ModelRegistry
+from .profiling import QueryProfiler
 from .schema import db
+from .summary import summaries_cli
+from .user_data import seed_cli
 
-# TODO: Load the model
-# model = tf.keras.models.load_model("model.h5")
-
+# Models are loaded on first use, see model_loader.py
 jwt = JWTManager()
 migrate = Migrate()
+model_loader = ModelLoader()
+model_registry = ModelRegistry()
+inference_pool = InferencePool()
+lstm_batcher = MicroBatcher()
+query_profiler = QueryProfiler()
+metrics = Metrics()
 
 
 def create_app(config_class=Config):
@@ -34,22 +48,58 @@ def create_app(config_class=Config):
         resources={r"/api/*": {"origins": "*"}},
     )
     # Initialize extensions
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", database.engine_options(app.config)
+    )
     db.init_app(app)
+    # SQLite PRAGMAs of every connection, see database.py
+    database.init_app(app)
     jwt.init_app(app)
+    # Queries per request, see profiling.py
+    query_profiler.init_app(app)
+    # Prometheus metrics at /metrics, see metrics.py
+    metrics.init_app(app)
+    model_loader.init_app(app)
+    # Users resolved from JWTs, see user.load_user
+    app.extensions["user_cache"] = TTLCache(app.config["USER_CACHE_TTL"], name="user")
+    # Prediction results by user data version, see prediction_cache.py
+    app.extensions["prediction_cache"] = TTLCache(
+        app.config["PREDICTION_CACHE_TTL"],
+        maxsize=app.config["PREDICTION_CACHE_SIZE"],
+        name="prediction",
+    )
+    model_registry.init_app(app)
+    inference_pool.init_app(app)
+    lstm_batcher.init_app(app)
 
     with app.app_context():
         db.create_all()
         migrate.init_app(app, db)
 
+    # Preload the reference tables
+    lookup_cache.init_app(app)
+
     # Import parts of our core Flask app
     from .auth import auth_bp
     from .user import user_bp
     from .medication import medication_bp
     from .dailylog import datalog_bp
+    from .predictions_lstm import lstm_bp
+    from .predictions_xgb import xgb_bp
+    from .predictions_jobs import jobs_bp
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(user_bp)
     app.register_blueprint(medication_bp)
     app.register_blueprint(datalog_bp)
+    app.register_blueprint(lstm_bp)
+    app.register_blueprint(xgb_bp)
+    app.register_blueprint(jobs_bp)
+
+    # flask summaries rebuild, flask models export-lstm|export-xgboost,
+    # flask seed database
+    app.cli.add_command(summaries_cli)
+    app.cli.add_command(models_cli)
+    app.cli.add_command(seed_cli)
 
     return app
@@ -0,0 +1,196 @@
+"""Dynamic micro-batching of LSTM predictions.
+
+Each request predicts a single (T, 25) window of its last T days, and calling
+Keras once per request mostly pays fixed per-call overhead. ``MicroBatcher``
+queues the windows of concurrent requests, waits at most ``max_wait_ms`` (or
+until ``max_batch_size`` windows are queued), stacks them into one (B, T, 25)
+tensor, runs a single forward pass on a background thread and hands each
+caller its own row of the output.
+
+A window that finds no other one queued runs at once: nothing is known to be
+coming, and e.g. a sync gunicorn worker serves one request at a time, so the
+wait would only add latency. Windows queued while a forward pass runs form
+the next batch. Callers that give up waiting are dropped from the batch, and
+a failure anywhere in a batch is passed to all of its callers.
+
+Batch sizes and the time windows spend queued are recorded in histograms,
+see ``MicroBatcher.stats``.
+"""
+
+import bisect
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from .metrics import BATCH_SIZE_BUCKETS, PREDICT_BATCH_SIZE, PREDICT_SECONDS
+
+QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class Histogram:
+    """Per-bucket (not cumulative) counts, plus the count and sum of observations."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            # Values equal to a bound fall in that bound's bucket
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def to_dict(self):
+        with self._lock:
+            labels = [f"<={bound}" for bound in self.buckets] + [
+                f">{self.buckets[-1]}"
+            ]
+            return {
+                "buckets": dict(zip(labels, self.counts)),
+                "count": self.count,
+                "sum": self.sum,
+                "mean": self.sum / self.count if self.count else None,
+            }
+
+
+class _Request:
+    def __init__(self, window):
+        self.window = window
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Batch concurrent LSTM predictions, used as a Flask extension."""
+
+    def __init__(self, app=None, predict=None, max_batch_size=32, max_wait_ms=5):
+        self.predict_batch = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.max_batch_size = app.config["LSTM_BATCH_MAX_SIZE"]
+        self.max_wait_ms = app.config["LSTM_BATCH_MAX_WAIT_MS"]
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        loader = app.extensions["model_loader"]
+        self.predict_batch = lambda batch: loader.get("lstm").predict(batch, verbose=0)
+        app.extensions["lstm_batcher"] = self
+
+    def submit(self, window):
+        """Queue one (T, n) or (n,) feature window, return a Future of its output."""
+        request = _Request(np.atleast_2d(np.asarray(window, dtype=np.float32)))
+        self._ensure_thread()
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, window, timeout=None):
+        """Predict one window and wait for its output row.
+
+        Raises:
+            TimeoutError: If the output is not ready within ``timeout`` seconds.
+        """
+        future = self.submit(window)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            # Left out of the forward pass if still queued
+            future.cancel()
+            raise
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batch_size": self.batch_sizes.to_dict(),
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join()
+                self._thread = None
+
+    def _ensure_thread(self):
+        # Started on first use, i.e. after gunicorn forked the worker
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="lstm-batcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def _collect(self, first):
+        """Gather requests until the batch is full or the wait is over."""
+        batch = [first]
+        if self._queue.empty():
+            return batch
+        deadline = first.enqueued_at + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if request is None:
+                # Shutting down, finish this batch first
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            try:
+                batch = self._collect(first)
+                # Drops cancelled requests; the others can no longer be cancelled
+                batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+                if batch:
+                    self._predict(batch)
+            except Exception as e:
+                # Whatever failed, no caller waits forever and the thread goes on
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _predict(self, batch):
+        started = time.perf_counter()
+        for request in batch:
+            self.queue_wait_ms.observe((started - request.enqueued_at) * 1000)
+        self.batch_sizes.observe(len(batch))
+        PREDICT_BATCH_SIZE.labels("lstm").observe(len(batch))
+
+        # (B, T, n): T days per window
+        inputs = np.stack([request.window for request in batch])
+        with PREDICT_SECONDS.labels("lstm").time():
+            outputs = self.predict_batch(inputs)
+        if len(outputs) != len(batch):
+            raise ValueError(f"{len(outputs)} outputs for a batch of {len(batch)}")
+        for request, output in zip(batch, outputs):
+            request.future.set_result(output)
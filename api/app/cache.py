@@ -0,0 +1,69 @@
+"""Small in-process caches shared by the API modules."""
+
+import threading
+import time
+
+from .metrics import CACHE_REQUESTS
+
+
+class TTLCache:
+    """A thread-safe dict whose entries expire after ``ttl`` seconds.
+
+    A ``ttl`` of 0 disables the cache: ``set`` is a no-op and ``get`` always
+    misses. Hits and misses are counted so cache efficiency can be reported;
+    those of named caches are also exported as ``cache_requests_total``.
+    """
+
+    def __init__(self, ttl, maxsize=None, name=None):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.name = name
+        if name is not None:
+            self._hit_counter = CACHE_REQUESTS.labels(name, "hit")
+            self._miss_counter = CACHE_REQUESTS.labels(name, "miss")
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                if self.name is not None:
+                    self._hit_counter.inc()
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            if self.name is not None:
+                self._miss_counter.inc()
+            return default
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if self.maxsize and len(self._entries) >= self.maxsize:
+                self._evict_expired()
+                if len(self._entries) >= self.maxsize:
+                    # Drop the oldest entry (dicts keep insertion order)
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
@@ -11,8 +11,24 @@ load_dotenv(os.path.join(base_dir, "..", ".env"))
 class Config:
     # Set the secret key for the Flask app and JWT
     SECRET_KEY = os.getenv("SECRET_KEY")
-    SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(os.getenv("DATABASE_URI"))
+    # A server database URL in DATABASE_URL, else the SQLite file DATABASE_URI;
+    # engine options by backend, see database.py
+    SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL") or "sqlite:///" + str(
+        os.getenv("DATABASE_URI")
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Connection pool of a server database, per gunicorn worker
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    # Run on every new SQLite connection, {} to keep SQLite's defaults
+    SQLITE_PRAGMAS = {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 256 * 2**20)),
+    }
 
     # JWT config
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
@@ -20,6 +36,84 @@ class Config:
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_SAME_SITE = "None"
+    # Seconds a resolved JWT user is cached for, 0 to disable
+    USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 30))
+    # Seconds a prediction is cached for, until the user's data changes (0 to
+    # disable), and the maximum number of cached predictions
+    PREDICTION_CACHE_TTL = int(os.getenv("PREDICTION_CACHE_TTL", 3600))
+    PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 10000))
+    # Seconds before the cached reference tables are reloaded
+    LOOKUP_CACHE_TTL = int(os.getenv("LOOKUP_CACHE_TTL", 300))
+
+    # Keyset pagination and NDJSON streaming of GET /api/datalog/logs
+    LOGS_PAGE_SIZE = 100
+    LOGS_MAX_PAGE_SIZE = 1000
+    LOGS_STREAM_BATCH_SIZE = 500
+
+    # Model config
+    # Weights exported with `flask models export-lstm` are served with NumPy;
+    # point LSTM_MODEL_PATH at the .h5 file to serve it with TensorFlow instead
+    LSTM_MODEL_PATH = os.getenv(
+        "LSTM_MODEL_PATH", os.path.join(base_dir, "..", "lstm_model.npz")
+    )
+    LSTM_KERAS_MODEL_PATH = os.getenv(
+        "LSTM_KERAS_MODEL_PATH", os.path.join(base_dir, "..", "lstm_model.h5")
+    )
+    XGBOOST_MODEL_PATH = os.getenv(
+        "XGBOOST_MODEL_PATH", os.path.join(base_dir, "..", "xgboost_model.json")
+    )
+    # Column order and scaling the models were trained with, written next to
+    # the models by the training scripts; without them models get raw rows
+    LSTM_PREPROCESSING_PATH = os.getenv(
+        "LSTM_PREPROCESSING_PATH",
+        os.path.join(base_dir, "..", "lstm_model.preprocessing.json"),
+    )
+    XGBOOST_PREPROCESSING_PATH = os.getenv(
+        "XGBOOST_PREPROCESSING_PATH",
+        os.path.join(base_dir, "..", "xgboost_model.preprocessing.json"),
+    )
+    # Per-user model snapshots are stored here
+    MODEL_REGISTRY_DIR = os.getenv(
+        "MODEL_REGISTRY_DIR", os.path.join(base_dir, "model_registry")
+    )
+    MODEL_REGISTRY_BOOST_ROUNDS = 10
+    MODEL_REGISTRY_KEEP_VERSIONS = 3
+    # Comma-separated models to load when a gunicorn worker starts
+    MODEL_WARMUP = os.getenv("MODEL_WARMUP", "")
+    # Processes running prediction jobs, per web worker (0 runs them inline);
+    # by default the cores are shared among the WEB_CONCURRENCY gunicorn workers
+    INFERENCE_WORKERS = int(
+        os.getenv(
+            "INFERENCE_WORKERS",
+            max(1, (os.cpu_count() or 1) // int(os.getenv("WEB_CONCURRENCY", 1))),
+        )
+    )
+    # Seconds a finished prediction job can still be polled
+    INFERENCE_RESULT_TTL = int(os.getenv("INFERENCE_RESULT_TTL", 300))
+    # Job states, shared by the web workers
+    INFERENCE_JOBS_DIR = os.getenv(
+        "INFERENCE_JOBS_DIR", os.path.join(base_dir, "inference_jobs")
+    )
+    # Concurrent LSTM predictions are batched up to this size or wait time
+    LSTM_BATCH_MAX_SIZE = int(os.getenv("LSTM_BATCH_MAX_SIZE", 32))
+    LSTM_BATCH_MAX_WAIT_MS = float(os.getenv("LSTM_BATCH_MAX_WAIT_MS", 5))
+    # Seconds a request waits for its LSTM prediction before a 503
+    LSTM_PREDICT_TIMEOUT = float(os.getenv("LSTM_PREDICT_TIMEOUT", 10))
+
+    # SQL statement counts and times per request as Server-Timing headers, the
+    # slowest statements kept per request, and with both on the report at
+    # /api/_debug/profile (exposes SQL, keep it off in production). The
+    # per-request database metrics are recorded either way
+    QUERY_PROFILING = os.getenv("QUERY_PROFILING", "0") == "1"
+    QUERY_PROFILING_SLOWEST = int(os.getenv("QUERY_PROFILING_SLOWEST", 5))
+    QUERY_PROFILING_REPORT = os.getenv("QUERY_PROFILING_REPORT", "0") == "1"
+
+    # Prometheus metrics at /metrics, see metrics.py; under gunicorn also set
+    # PROMETHEUS_MULTIPROC_DIR to aggregate the workers
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+    # Import-time budget of create_app(), see benchmarks/startup.py
+    STARTUP_IMPORT_BUDGET_MS = float(os.getenv("STARTUP_IMPORT_BUDGET_MS", 1500))
 
 
 class TestConfig(Config):
@@ -30,3 +124,5 @@ class TestConfig(Config):
     WTF_CSRF_ENABLED = False
     SESSION_COOKIE_SECURE = False
     SESSION_COOKIE_SAME_SITE = "Lax"
+    # Run prediction jobs synchronously
+    INFERENCE_WORKERS = 0
@@ -1,10 +1,19 @@
-from flask import Blueprint, request, jsonify, current_app as app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import base64
+import binascii
+import json
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask import current_app as app
+from flask_jwt_extended import jwt_required
 from . import db
 from datetime import datetime, timedelta
-from .schema import User, UserLog, Prodrome, UserProdrome, Aura, UserAura
-from .schema import Trigger, UserTrigger, SeizureEpisode, SeizureType
+from .schema import UserLog, UserProdrome, UserAura, UserTrigger, SeizureEpisode
+from sqlalchemy import tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload, subqueryload
+from .lookup_cache import lookup_cache
+from .prediction_cache import bump_data_version
+from .summary import get_log_summaries, refresh_log_summaries
+from .user import get_current_user
 
 datalog_bp = Blueprint("datalog", __name__, url_prefix="/api/datalog")
 
@@ -13,15 +22,12 @@ datalog_bp = Blueprint("datalog", __name__, url_prefix="/api/datalog")
 @jwt_required()
 def create_user_prodrome():
     app.logger.debug("Received request for user-prodrome creation")
-    # Get the identity of the current user
-    current_user_email = get_jwt_identity()
-
-    # Query the database for the current user
-    user = User.query.filter_by(email=current_user_email).first()
+    # Get the current user, resolved once per request
+    user = get_current_user()
 
     # If the user is not found, return an error
     if not user:
-        app.logger.debug("User not found: %s", current_user_email)  # Debug log
+        app.logger.debug("User not found")  # Debug log
         return jsonify({"message": "User not found"}), 404
 
     # Get the data from the request
@@ -38,7 +44,7 @@ def create_user_prodrome():
 
     # Check if the provided log_id and prodrome_id exist
     log = UserLog.query.get(log_id)
-    prodrome = Prodrome.query.get(prodrome_id)
+    prodrome = lookup_cache.get("prodromes", prodrome_id)
     # Log fetched items
     app.logger.debug("Log: %s, Prodrome: %s", log, prodrome)
 
@@ -57,6 +63,8 @@ def create_user_prodrome():
     # Add the new UserProdrome to the database session and commit
     try:
         db.session.add(new_user_prodrome)
+        refresh_log_summaries([log.id])
+        bump_data_version(user.id)
         db.session.commit()
         # Return a success message with the ID of the new UserProdrome
         return (
@@ -80,11 +88,8 @@ def create_user_prodrome():
 @datalog_bp.route("/user-auras", methods=["POST"])
 @jwt_required()
 def create_user_aura():
-    # Get the identity of the current user
-    current_user_email = get_jwt_identity()
-
-    # Query the database for the current user
-    user = User.query.filter_by(email=current_user_email).first()
+    # Get the current user, resolved once per request
+    user = get_current_user()
 
     # If the user is not found, return an error
     if not user:
@@ -104,7 +109,7 @@ def create_user_aura():
 
     # Check if the provided log_id and aura_id exist
     log = UserLog.query.get(log_id)
-    aura = Aura.query.get(aura_id)
+    aura = lookup_cache.get("auras", aura_id)
 
     if not log or not aura:
         return jsonify({"message": "Log or Aura not found"}), 404
@@ -121,6 +126,8 @@ def create_user_aura():
     # Add the new UserAura to the database session and commit
     try:
         db.session.add(new_user_aura)
+        refresh_log_summaries([log.id])
+        bump_data_version(user.id)
         db.session.commit()
         # Return a success message with the ID of the new UserAura
         return (
@@ -141,11 +148,8 @@ def create_user_aura():
 @datalog_bp.route("/user-triggers", methods=["POST"])
 @jwt_required()
 def create_user_trigger():
-    # Get the identity of the current user
-    current_user_email = get_jwt_identity()
-
-    # Query the database for the current user
-    user = User.query.filter_by(email=current_user_email).first()
+    # Get the current user, resolved once per request
+    user = get_current_user()
 
     # If the user is not found, return an error
     if not user:
@@ -169,7 +173,7 @@ def create_user_trigger():
 
     # Check if the provided log_id and trigger_id exist
     log = UserLog.query.get(log_id)
-    trigger = Trigger.query.get(trigger_id)
+    trigger = lookup_cache.get("triggers", trigger_id)
 
     if not log or not trigger:
         return jsonify({"message": "Log or Trigger not found"}), 404
@@ -190,6 +194,8 @@ def create_user_trigger():
     # Add the new UserTrigger to the database session and commit
     try:
         db.session.add(new_user_trigger)
+        refresh_log_summaries([log.id])
+        bump_data_version(user.id)
         db.session.commit()
         # Return a success message with the ID of the new UserTrigger
         return (
@@ -213,11 +219,8 @@ def create_user_trigger():
 @datalog_bp.route("/seizure-episodes", methods=["POST"])
 @jwt_required()
 def create_seizure_episode():
-    # Get the identity of the current user
-    current_user_email = get_jwt_identity()
-
-    # Query the database for the current user
-    user = User.query.filter_by(email=current_user_email).first()
+    # Get the current user, resolved once per request
+    user = get_current_user()
 
     # If the user is not found, return an error
     if not user:
@@ -252,7 +255,7 @@ def create_seizure_episode():
 
     # Check if the provided log_id and seizure_type_id exist
     log = UserLog.query.get(log_id)
-    seizure_type = SeizureType.query.get(seizure_type_id)
+    seizure_type = lookup_cache.get("seizure_types", seizure_type_id)
 
     if not log or not seizure_type:
         return jsonify({"message": "Log or SeizureType not found"}), 404
@@ -280,6 +283,8 @@ def create_seizure_episode():
     # Add the new SeizureEpisode to the database session and commit
     try:
         db.session.add(new_seizure_episode)
+        refresh_log_summaries([log.id])
+        bump_data_version(user.id)
         db.session.commit()
         # Return a success message with the ID of the new SeizureEpisode
         return (
@@ -300,11 +305,272 @@ def create_seizure_episode():
         )
 
 
+POSTICTAL_SYMPTOMS = ("confusion", "headache", "fatigue")
+
+# Fields accepted for each kind of item in a daily log, with their defaults
+DAILY_LOG_ITEMS = {
+    "prodromes": (
+        UserProdrome,
+        ("prodromes", "Prodrome"),
+        "prodrome_id",
+        {"intensity": None, "note": ""},
+    ),
+    "auras": (
+        UserAura,
+        ("auras", "Aura"),
+        "aura_id",
+        {"is_present": None, "note": ""},
+    ),
+    "triggers": (
+        UserTrigger,
+        ("triggers", "Trigger"),
+        "trigger_id",
+        {"value_numeric": None, "value_boolean": None, "note": ""},
+    ),
+    "seizure_episodes": (
+        SeizureEpisode,
+        ("seizure_types", "SeizureType"),
+        "seizure_type_id",
+        {
+            "duration_sec": None,
+            "frequency": 1,
+            "requires_emergency_intervention": False,
+            "note": "",
+            "postictal_confusion_duration": None,
+            "postictal_confusion_intensity": None,
+            "postictal_headache_duration": None,
+            "postictal_headache_intensity": None,
+            "postictal_fatigue_duration": None,
+            "postictal_fatigue_intensity": None,
+        },
+    ),
+}
+
+
+# JSON type of each item field; null is accepted where the column allows it
+DAILY_LOG_FIELD_TYPES = {
+    "prodrome_id": "integer",
+    "aura_id": "integer",
+    "trigger_id": "integer",
+    "seizure_type_id": "integer",
+    "intensity": "number",
+    "value_numeric": "number",
+    "duration_sec": "number",
+    "frequency": "number",
+    "postictal_confusion_duration": "number",
+    "postictal_confusion_intensity": "number",
+    "postictal_headache_duration": "number",
+    "postictal_headache_intensity": "number",
+    "postictal_fatigue_duration": "number",
+    "postictal_fatigue_intensity": "number",
+    "is_present": "boolean",
+    "value_boolean": "boolean",
+    "requires_emergency_intervention": "boolean",
+    "note": "string",
+}
+JSON_TYPES = {
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "string": (str,),
+}
+
+# Values each kind of item needs, as {error: fields of which one must be set}
+DAILY_LOG_REQUIRED = {
+    "prodromes": {"Missing intensity": ("intensity",)},
+    "auras": {"Missing is_present": ("is_present",)},
+    "triggers": {"Missing value for the trigger": ("value_numeric", "value_boolean")},
+    "seizure_episodes": {"Missing duration_sec": ("duration_sec",)},
+}
+# Fields that may be left out for their default, but not sent as null
+DAILY_LOG_NOT_NULL = ("requires_emergency_intervention",)
+# Allowed (low, high) values, mirroring the DB check constraints
+DAILY_LOG_RANGES = {
+    "intensity": (0, 10),
+    "value_numeric": (0, None),
+    "duration_sec": (0, None),
+    "frequency": (1, None),
+    **{f"postictal_{symptom}_duration": (0, None) for symptom in POSTICTAL_SYMPTOMS},
+    **{f"postictal_{symptom}_intensity": (0, 10) for symptom in POSTICTAL_SYMPTOMS},
+}
+
+
+def _type_error(field):
+    type_name = DAILY_LOG_FIELD_TYPES[field]
+    article = "an" if type_name == "integer" else "a"
+    return f"{field} must be {article} {type_name}"
+
+
+def _has_type(field, value):
+    type_name = DAILY_LOG_FIELD_TYPES[field]
+    # JSON true and false are ints in Python, but not numbers here
+    return isinstance(value, JSON_TYPES[type_name]) and (
+        type_name == "boolean" or not isinstance(value, bool)
+    )
+
+
+def _range_error(field, value):
+    low, high = DAILY_LOG_RANGES[field]
+    if value is None or (value >= low and (high is None or value <= high)):
+        return None
+    if high is not None:
+        return f"{field} must be between {low} and {high}"
+    if low == 0:
+        return f"{field} must not be negative"
+    return f"{field} must be at least {low}"
+
+
+def _validate_daily_log_item(kind, item):
+    """Return an error message for an invalid item, mirroring the DB constraints."""
+    _, _, lookup_field, fields = DAILY_LOG_ITEMS[kind]
+    if not isinstance(item, dict) or not item.get(lookup_field):
+        return f"Missing {lookup_field}"
+
+    values = {field: item.get(field) for field in DAILY_LOG_FIELD_TYPES}
+    for field, value in values.items():
+        if value is not None and not _has_type(field, value):
+            return _type_error(field)
+    for error, alternatives in DAILY_LOG_REQUIRED[kind].items():
+        if all(values[field] is None for field in alternatives):
+            return error
+    for field in DAILY_LOG_NOT_NULL:
+        if field in fields and field in item and item[field] is None:
+            return _type_error(field)
+    range_errors = (
+        _range_error(field, values[field])
+        for field in DAILY_LOG_RANGES
+        if field in fields
+    )
+    return next((error for error in range_errors if error), None)
+
+
+def _insert_log_items(model, log_id, rows):
+    """Insert the rows of one kind of item of a log; returns their ids in order."""
+    if db.session.get_bind().dialect.name != "sqlite":
+        # One batched INSERT .. RETURNING
+        return db.session.scalars(
+            db.insert(model).returning(model.id, sort_by_parameter_order=True), rows
+        ).all()
+
+    # SQLite would run the above one row at a time. Writers are serialized
+    # from the first write of the transaction on, and new rowids are max + 1,
+    # so the rows of one executemany are the last ones of the log.
+    db.session.execute(db.insert(model), rows)
+    new_ids = db.session.scalars(
+        db.select(model.id)
+        .where(model.log_id == log_id)
+        .order_by(model.id.desc())
+        .limit(len(rows))
+    ).all()
+    return new_ids[::-1]
+
+
+def _daily_log_for(user, data):
+    """Return the log a daily survey goes to, or an error response."""
+    # Use the given log, or create a new one
+    log_id = data.get("log_id")
+    if log_id:
+        log = UserLog.query.get(log_id)
+        if not log:
+            return None, (jsonify({"message": "Log not found"}), 404)
+        if log.user_id != user.id:
+            return None, (
+                jsonify({"message": "This log does not belong to the current user"}),
+                403,
+            )
+        return log, None
+
+    try:
+        log_time = (
+            datetime.fromisoformat(data["log_time"])
+            if data.get("log_time")
+            else datetime.now()
+        )
+    except (TypeError, ValueError):
+        return None, (jsonify({"message": "Invalid log_time format"}), 400)
+    return UserLog(user_id=user.id, log_time=log_time, note=data.get("note")), None
+
+
+def _add_daily_log_items(log_id, kind, items):
+    """Insert the valid items of one kind; returns the result of each item."""
+    model, (lookup_kind, lookup_label), lookup_field, fields = DAILY_LOG_ITEMS[kind]
+
+    # Validate every item, keeping the valid ones for a bulk insert
+    results = [None] * len(items)
+    rows, indexes = [], []
+    for index, item in enumerate(items):
+        error = _validate_daily_log_item(kind, item)
+        if not error and lookup_cache.get(lookup_kind, item[lookup_field]) is None:
+            error = f"{lookup_label} not found"
+
+        if error:
+            results[index] = {"index": index, "error": error}
+            continue
+        row = {field: item.get(field, default) for field, default in fields.items()}
+        row.update({"log_id": log_id, lookup_field: item[lookup_field]})
+        rows.append(row)
+        indexes.append(index)
+
+    if rows:
+        new_ids = _insert_log_items(model, log_id, rows)
+        for index, new_id in zip(indexes, new_ids):
+            results[index] = {"index": index, "id": new_id}
+    return results
+
+
+# Submit a whole daily survey (the log and all its items) in one request
+@datalog_bp.route("/daily-log", methods=["POST"])
+@jwt_required()
+def create_daily_log():
+    user = get_current_user()
+
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    data = request.get_json()
+    if not isinstance(data, dict) or not all(
+        isinstance(data.get(kind, []), list) for kind in DAILY_LOG_ITEMS
+    ):
+        return jsonify({"message": "Invalid daily log format"}), 400
+
+    log, error_response = _daily_log_for(user, data)
+    if error_response:
+        return error_response
+
+    try:
+        db.session.add(log)
+        db.session.flush()  # To get the log_id for the items
+        # Read now: the log is expired by the commit and reloading it costs queries
+        log_id = log.id
+
+        results = {
+            kind: _add_daily_log_items(log_id, kind, data.get(kind, []))
+            for kind in DAILY_LOG_ITEMS
+        }
+
+        refresh_log_summaries([log_id])
+        bump_data_version(user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"message": "Failed to save daily log", "error": str(e)}), 500
+
+    return (
+        jsonify(
+            {
+                "message": "Daily log saved successfully",
+                "log_id": log_id,
+                **results,
+            }
+        ),
+        201,
+    )
+
+
 @datalog_bp.route("/user-prodromes/<int:user_prodrome_id>", methods=["PUT"])
 @jwt_required()
 def update_user_prodrome(user_prodrome_id):
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
+    user = get_current_user()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -322,15 +588,23 @@ def update_user_prodrome(user_prodrome_id):
     if note is not None:
         user_prodrome.note = note
 
-    db.session.commit()
+    try:
+        refresh_log_summaries([user_prodrome.log_id])
+        bump_data_version(user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return (
+            jsonify({"message": "Failed to update UserProdrome", "error": str(e)}),
+            500,
+        )
     return jsonify({"message": "UserProdrome updated successfully"}), 200
 
 
 @datalog_bp.route("/user-auras/<int:user_aura_id>", methods=["PUT"])
 @jwt_required()
 def update_user_aura(user_aura_id):
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
+    user = get_current_user()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -348,15 +622,23 @@ def update_user_aura(user_aura_id):
     if note is not None:
         user_aura.note = note
 
-    db.session.commit()
+    try:
+        refresh_log_summaries([user_aura.log_id])
+        bump_data_version(user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return (
+            jsonify({"message": "Failed to update UserAura", "error": str(e)}),
+            500,
+        )
     return jsonify({"message": "UserAura updated successfully"}), 200
 
 
 @datalog_bp.route("/user-triggers/<int:user_trigger_id>", methods=["PUT"])
 @jwt_required()
 def update_user_trigger(user_trigger_id):
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
+    user = get_current_user()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -377,15 +659,23 @@ def update_user_trigger(user_trigger_id):
     if note is not None:
         user_trigger.note = note
 
-    db.session.commit()
+    try:
+        refresh_log_summaries([user_trigger.log_id])
+        bump_data_version(user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return (
+            jsonify({"message": "Failed to update UserTrigger", "error": str(e)}),
+            500,
+        )
     return jsonify({"message": "UserTrigger updated successfully"}), 200
 
 
 @datalog_bp.route("/seizure-episodes/<int:seizure_episode_id>", methods=["PUT"])
 @jwt_required()
 def update_seizure_episode(seizure_episode_id):
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
+    user = get_current_user()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -411,18 +701,24 @@ def update_seizure_episode(seizure_episode_id):
         if field in data:
             setattr(seizure_episode, field, data[field])
 
-    db.session.commit()
+    try:
+        refresh_log_summaries([seizure_episode.log_id])
+        bump_data_version(user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return (
+            jsonify({"message": "Failed to update SeizureEpisode", "error": str(e)}),
+            500,
+        )
     return jsonify({"message": "SeizureEpisode updated successfully"}), 200
 
 
 @datalog_bp.route("/user-prodromes/<int:user_prodrome_id>", methods=["DELETE"])
 @jwt_required()
 def delete_user_prodrome(user_prodrome_id):
-    # Get the identity of the current user from the JWT
-    current_user_email = get_jwt_identity()
-
-    # Retrieve the current user's object from the database
-    user = User.query.filter_by(email=current_user_email).first()
+    # Get the current user, resolved once per request
+    user = get_current_user()
 
     # Check if the user was found
     if not user:
@@ -438,11 +734,13 @@ def delete_user_prodrome(user_prodrome_id):
     try:
         # Delete the UserProdrome from the database
         db.session.delete(user_prodrome)
+        refresh_log_summaries([user_prodrome.log_id])
+        bump_data_version(user.id)
         db.session.commit()
         # Return a success message
         return jsonify({"message": "UserProdrome deleted successfully"}), 200
-    except SQLAlchemyError as e:
-        # In case of database error, rollback the transaction and log the error
+    except Exception as e:
+        # In case of an error, rollback the transaction and log the error
         db.session.rollback()
         return (
             jsonify({"message": "Failed to delete UserProdrome", "error": str(e)}),
@@ -453,8 +751,7 @@ def delete_user_prodrome(user_prodrome_id):
 @datalog_bp.route("/user-auras/<int:user_aura_id>", methods=["DELETE"])
 @jwt_required()
 def delete_user_aura(user_aura_id):
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
+    user = get_current_user()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -465,9 +762,11 @@ def delete_user_aura(user_aura_id):
 
     try:
         db.session.delete(user_aura)
+        refresh_log_summaries([user_aura.log_id])
+        bump_data_version(user.id)
         db.session.commit()
         return jsonify({"message": "UserAura deleted successfully"}), 200
-    except SQLAlchemyError as e:
+    except Exception as e:
         db.session.rollback()
         return jsonify({"message": "Failed to delete UserAura", "error": str(e)}), 500
 
@@ -475,8 +774,7 @@ def delete_user_aura(user_aura_id):
 @datalog_bp.route("/user-triggers/<int:user_trigger_id>", methods=["DELETE"])
 @jwt_required()
 def delete_user_trigger(user_trigger_id):
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
+    user = get_current_user()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -487,9 +785,11 @@ def delete_user_trigger(user_trigger_id):
 
     try:
         db.session.delete(user_trigger)
+        refresh_log_summaries([user_trigger.log_id])
+        bump_data_version(user.id)
         db.session.commit()
         return jsonify({"message": "UserTrigger deleted successfully"}), 200
-    except SQLAlchemyError as e:
+    except Exception as e:
         db.session.rollback()
         return (
             jsonify({"message": "Failed to delete UserTrigger", "error": str(e)}),
@@ -500,8 +800,7 @@ def delete_user_trigger(user_trigger_id):
 @datalog_bp.route("/seizure-episodes/<int:seizure_episode_id>", methods=["DELETE"])
 @jwt_required()
 def delete_seizure_episode(seizure_episode_id):
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
+    user = get_current_user()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -512,9 +811,11 @@ def delete_seizure_episode(seizure_episode_id):
 
     try:
         db.session.delete(seizure_episode)
+        refresh_log_summaries([seizure_episode.log_id])
+        bump_data_version(user.id)
         db.session.commit()
         return jsonify({"message": "SeizureEpisode deleted successfully"}), 200
-    except SQLAlchemyError as e:
+    except Exception as e:
         db.session.rollback()
         return (
             jsonify({"message": "Failed to delete SeizureEpisode", "error": str(e)}),
@@ -522,63 +823,174 @@ def delete_seizure_episode(seizure_episode_id):
         )
 
 
+# Helper function to serialize a log with all its items
+def _serialize_log(log):
+    return {
+        "log_id": log.id,
+        "log_time": log.log_time,
+        "prodromes": [
+            {"id": prod.prodrome_id, "intensity": prod.intensity}
+            for prod in log.prodromes
+        ],
+        "auras": [
+            {"id": aura.aura_id, "is_present": aura.is_present} for aura in log.auras
+        ],
+        "triggers": [
+            {
+                "id": trigger.trigger_id,
+                "value_numeric": trigger.value_numeric,
+                "value_boolean": trigger.value_boolean,
+            }
+            for trigger in log.triggers
+        ],
+        "seizure_episodes": [
+            {
+                "id": seizure.id,
+                "seizure_type_id": seizure.seizure_type_id,
+                "duration_sec": seizure.duration_sec,
+                "frequency": seizure.frequency,
+                "requires_emergency_intervention": seizure.requires_emergency_intervention,
+                "note": seizure.note,
+                "postictal_confusion_duration": seizure.postictal_confusion_duration,
+                "postictal_confusion_intensity": seizure.postictal_confusion_intensity,
+                "postictal_headache_duration": seizure.postictal_headache_duration,
+                "postictal_headache_intensity": seizure.postictal_headache_intensity,
+                "postictal_fatigue_duration": seizure.postictal_fatigue_duration,
+                "postictal_fatigue_intensity": seizure.postictal_fatigue_intensity,
+            }
+            for seizure in log.seizures
+        ],
+    }
+
+
+# Helper functions for the opaque (log_time, id) keyset cursor
+def encode_log_cursor(log):
+    payload = json.dumps([log.log_time.isoformat(), log.id])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_log_cursor(cursor):
+    """Return the (log_time, id) position of a cursor, ValueError if invalid."""
+    try:
+        log_time, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(log_time), int(log_id)
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _logs_after(user_id, position):
+    """Select a user's logs ordered by (log_time, id), after a cursor position."""
+    query = (
+        db.select(UserLog)
+        .filter(UserLog.user_id == user_id)
+        .order_by(UserLog.log_time, UserLog.id)
+    )
+    if position is not None:
+        query = query.filter(tuple_(UserLog.log_time, UserLog.id) > position)
+    return query
+
+
+def _stream_logs(query, batch_size):
+    """Yield logs as NDJSON lines, reading them in batches from a server-side cursor."""
+    result = db.session.execute(
+        query.options(
+            selectinload(UserLog.prodromes),
+            selectinload(UserLog.auras),
+            selectinload(UserLog.triggers),
+            selectinload(UserLog.seizures),
+        ).execution_options(yield_per=batch_size)
+    )
+    for log in result.scalars():
+        yield app.json.dumps(_serialize_log(log)) + "\n"
+
+
 # This endpoint fetches all logs for the authenticated user,
 # including the associated Prodromes, Auras, Triggers, and SeizureEpisodes.
 @datalog_bp.route("/logs", methods=["GET"])
 @jwt_required()
 def get_user_logs():
+    """Return the user's logs ordered by time.
+
+    Query parameters (all optional):
+        limit: page size, enables keyset pagination. The cursor of the next
+            page, if any, is returned in the ``X-Next-Cursor`` header.
+        cursor: value of ``X-Next-Cursor`` from the previous page.
+        format: ``ndjson`` streams one log per line instead of a JSON array.
+            Without ``limit`` it streams every log (after ``cursor``, if
+            given) instead of a page.
+    """
     try:
-        current_user_email = get_jwt_identity()
-        user = User.query.filter_by(email=current_user_email).first()
+        user = get_current_user()
 
         if not user:
             return jsonify({"message": "User not found"}), 404
 
-        user_logs = UserLog.query.filter_by(user_id=user.id).all()
+        position = None
+        if request.args.get("cursor"):
+            try:
+                position = decode_log_cursor(request.args["cursor"])
+            except ValueError:
+                return jsonify({"message": "Invalid cursor"}), 400
+
+        limit = None
+        if "limit" in request.args or "cursor" in request.args:
+            limit = request.args.get("limit", str(app.config["LOGS_PAGE_SIZE"]))
+            limit = int(limit) if limit.isdigit() else 0
+        if limit is not None and not 1 <= limit <= app.config["LOGS_MAX_PAGE_SIZE"]:
+            return (
+                jsonify(
+                    {
+                        "message": "limit must be between 1 and "
+                        f"{app.config['LOGS_MAX_PAGE_SIZE']}"
+                    }
+                ),
+                400,
+            )
 
-        logs_data = []
-        for log in user_logs:
-            logs_data.append(
-                {
-                    "log_id": log.id,
-                    "log_time": log.log_time,
-                    "prodromes": [
-                        {"id": prod.prodrome_id, "intensity": prod.intensity}
-                        for prod in log.prodromes
-                    ],
-                    "auras": [
-                        {"id": aura.aura_id, "is_present": aura.is_present}
-                        for aura in log.auras
-                    ],
-                    "triggers": [
-                        {
-                            "id": trigger.trigger_id,
-                            "value_numeric": trigger.value_numeric,
-                            "value_boolean": trigger.value_boolean,
-                        }
-                        for trigger in log.triggers
-                    ],
-                    "seizure_episodes": [
-                        {
-                            "id": seizure.id,
-                            "seizure_type_id": seizure.seizure_type_id,
-                            "duration_sec": seizure.duration_sec,
-                            "frequency": seizure.frequency,
-                            "requires_emergency_intervention": seizure.requires_emergency_intervention,
-                            "note": seizure.note,
-                            "postictal_confusion_duration": seizure.postictal_confusion_duration,
-                            "postictal_confusion_intensity": seizure.postictal_confusion_intensity,
-                            "postictal_headache_duration": seizure.postictal_headache_duration,
-                            "postictal_headache_intensity": seizure.postictal_headache_intensity,
-                            "postictal_fatigue_duration": seizure.postictal_fatigue_duration,
-                            "postictal_fatigue_intensity": seizure.postictal_fatigue_intensity,
-                        }
-                        for seizure in log.seizures
-                    ],
-                }
+        query = _logs_after(user.id, position)
+
+        if request.args.get("format") == "ndjson":
+            headers = {}
+            if "limit" in request.args:
+                # The headers go out before the body: look up the page boundary
+                boundary = db.session.execute(
+                    query.with_only_columns(UserLog.log_time, UserLog.id)
+                    .offset(limit - 1)
+                    .limit(2)
+                ).all()
+                if len(boundary) > 1:
+                    headers["X-Next-Cursor"] = encode_log_cursor(boundary[0])
+                query = query.limit(limit)
+            return Response(
+                stream_with_context(
+                    _stream_logs(query, app.config["LOGS_STREAM_BATCH_SIZE"])
+                ),
+                mimetype="application/x-ndjson",
+                headers=headers,
             )
 
-        return jsonify(logs_data), 200
+        if limit is not None:
+            # Fetch one extra row to know whether there is a next page
+            query = query.limit(limit + 1)
+        user_logs = (
+            db.session.execute(
+                query.options(
+                    subqueryload(UserLog.prodromes),
+                    subqueryload(UserLog.auras),
+                    subqueryload(UserLog.triggers),
+                    subqueryload(UserLog.seizures),
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        headers = {}
+        if limit is not None and len(user_logs) > limit:
+            user_logs = user_logs[:limit]
+            headers["X-Next-Cursor"] = encode_log_cursor(user_logs[-1])
+
+        return jsonify([_serialize_log(log) for log in user_logs]), 200, headers
 
     except SQLAlchemyError as e:
         # Log the error internally, optionally
@@ -597,8 +1009,7 @@ def get_user_logs():
 @datalog_bp.route("/logs/date", methods=["GET"])
 @jwt_required()
 def get_user_logs_by_date():
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
+    user = get_current_user()
 
     if not user:
         return jsonify({"message": "User not found"}), 404
@@ -614,197 +1025,56 @@ def get_user_logs_by_date():
     except ValueError:
         return jsonify({"message": "Invalid date format, expected YYYY-MM-DD"}), 400
 
-    # Fetch logs for the given date
-    user_logs = UserLog.query.filter(
-        UserLog.user_id == user.id, db.func.date(UserLog.log_time) == log_date
-    ).all()
+    # Fetch logs for the given date, as a half-open [day, day + 1) range so the
+    # (user_id, log_time) index can be used
+    day_start = datetime.combine(log_date, datetime.min.time())
+    user_logs = (
+        UserLog.query.filter(
+            UserLog.user_id == user.id,
+            UserLog.log_time >= day_start,
+            UserLog.log_time < day_start + timedelta(days=1),
+        )
+        .options(
+            subqueryload(UserLog.prodromes),
+            subqueryload(UserLog.auras),
+            subqueryload(UserLog.triggers),
+            subqueryload(UserLog.seizures),
+        )
+        .all()
+    )
 
-    logs_data = []
-    for log in user_logs:
-        log_data = {
-            "log_id": log.id,
-            "log_time": log.log_time,
-            "prodromes": [
-                {"id": prod.prodrome_id, "intensity": prod.intensity}
-                for prod in log.prodromes
-            ],
-            "auras": [
-                {"id": aura.aura_id, "is_present": aura.is_present}
-                for aura in log.auras
-            ],
-            "triggers": [
-                {
-                    "id": trigger.trigger_id,
-                    "value_numeric": trigger.value_numeric,
-                    "value_boolean": trigger.value_boolean,
-                }
-                for trigger in log.triggers
-            ],
-            "seizure_episodes": [
-                {
-                    "id": seizure.id,
-                    "seizure_type_id": seizure.seizure_type_id,
-                    "duration_sec": seizure.duration_sec,
-                    "frequency": seizure.frequency,
-                    "requires_emergency_intervention": seizure.requires_emergency_intervention,
-                    "note": seizure.note,
-                    "postictal_confusion_duration": seizure.postictal_confusion_duration,
-                    "postictal_confusion_intensity": seizure.postictal_confusion_intensity,
-                    "postictal_headache_duration": seizure.postictal_headache_duration,
-                    "postictal_headache_intensity": seizure.postictal_headache_intensity,
-                    "postictal_fatigue_duration": seizure.postictal_fatigue_duration,
-                    "postictal_fatigue_intensity": seizure.postictal_fatigue_intensity,
-                }
-                for seizure in log.seizures
-            ],
-        }
-        logs_data.append(log_data)
+    logs_data = [_serialize_log(log) for log in user_logs]
 
     return jsonify(logs_data), 200
 
 
-# Helper function to process triggers
-def process_triggers(triggers):
-    trigger_descriptions = []
-    for user_trigger in triggers:
-        # Directly use attributes from UserTrigger instance
-        if (
-            user_trigger.trigger.name == "Sleep Quality"
-            and user_trigger.value_numeric <= 5
-        ):
-            trigger_descriptions.append("Poor Sleep")
-        elif (
-            user_trigger.trigger.name == "Stress Level"
-            and user_trigger.value_numeric >= 6
-        ):
-            trigger_descriptions.append("Stress")
-        elif (
-            user_trigger.trigger.name == "Sleep Duration"
-            and user_trigger.value_numeric <= 6
-        ):
-            trigger_descriptions.append("Lack of Sleep")
-        elif user_trigger.trigger.name == "Caffeine" and user_trigger.value_boolean:
-            trigger_descriptions.append("Caffeine")
-        elif user_trigger.trigger.name == "Alcohol" and user_trigger.value_boolean:
-            trigger_descriptions.append("Alcohol")
-        elif user_trigger.trigger.name == "Smoking" and user_trigger.value_boolean:
-            trigger_descriptions.append("Smoking")
-        elif user_trigger.trigger.name == "Drugs" and user_trigger.value_boolean:
-            trigger_descriptions.append("Drugs")
-        elif user_trigger.trigger.name == "Menstruation" and user_trigger.value_boolean:
-            trigger_descriptions.append("Menstruation")
-        elif user_trigger.trigger.name == "Skipped Meal" and user_trigger.value_boolean:
-            trigger_descriptions.append("Skipped Meal")
-        elif user_trigger.trigger.name == "Fever" and user_trigger.value_boolean:
-            trigger_descriptions.append("Fever")
-        elif (
-            user_trigger.trigger.name == "Physical Exertion"
-            and user_trigger.value_numeric >= 5
-        ):
-            trigger_descriptions.append("Physical Exertion")
-        elif (
-            user_trigger.trigger.name == "Flashing Lights"
-            and user_trigger.value_boolean
-        ):
-            trigger_descriptions.append("Flashing Lights")
-        elif (
-            user_trigger.trigger.name == "Skipped Medication"
-            and user_trigger.value_boolean
-        ):
-            trigger_descriptions.append("Skipped Medication")
-        elif (
-            user_trigger.trigger.name == "Change in Medication"
-            and user_trigger.value_boolean
-        ):
-            trigger_descriptions.append("Change in Medication")
-    return trigger_descriptions
-
-
-# Helper function to format postictal symptoms
-def format_postictal_symptoms(seizure):
-    symptoms = []
-    # Check if postictal_confusion_duration is not None and greater than 2
-    if (
-        seizure.postictal_confusion_duration
-        and seizure.postictal_confusion_duration > 2
-    ):
-        intensity = (
-            seizure.postictal_confusion_intensity
-            if seizure.postictal_confusion_intensity
-            else 0
-        )
-        symptoms.append(
-            f"{intensity}/10 confusion for {seizure.postictal_confusion_duration} minutes"
-        )
+# Dashboard views and the number of days they cover
+DASHBOARD_PERIODS = {"weekly": 7, "monthly": 30, "yearly": 365}
 
-    # Check if postictal_headache_duration is not None and greater than 2
-    if seizure.postictal_headache_duration and seizure.postictal_headache_duration > 2:
-        intensity = (
-            seizure.postictal_headache_intensity
-            if seizure.postictal_headache_intensity
-            else 0
-        )
-        symptoms.append(
-            f"{intensity}/10 headache for {seizure.postictal_headache_duration} minutes"
-        )
 
-    # Check if postictal_fatigue_duration is not None and greater than 2
-    if seizure.postictal_fatigue_duration and seizure.postictal_fatigue_duration > 2:
-        intensity = (
-            seizure.postictal_fatigue_intensity
-            if seizure.postictal_fatigue_intensity
-            else 0
-        )
-        symptoms.append(
-            f"{intensity}/10 fatigue for {seizure.postictal_fatigue_duration} minutes"
-        )
+def _dashboard_logs(period):
+    user = get_current_user()
+    if not user:
+        return jsonify({"message": "User not found"}), 404
 
-    # Join all symptoms into a single string, or note absence of significant symptoms
-    return ", ".join(symptoms) if symptoms else "No significant postictal symptoms"
+    since = datetime.utcnow() - timedelta(days=DASHBOARD_PERIODS[period])
+    # Entries are pre-aggregated in daily_log_summary, see summary.py
+    return jsonify(get_log_summaries(user.id, since)), 200
 
 
 @datalog_bp.route("/weekly-logs", methods=["GET"])
 @jwt_required()
 def get_weekly_logs():
-    current_user_email = get_jwt_identity()
-    user = User.query.filter_by(email=current_user_email).first()
-    if not user:
-        return jsonify({"message": "User not found"}), 404
+    return _dashboard_logs("weekly")
 
-    one_week_ago = datetime.utcnow() - timedelta(days=7)
-    user_logs = (
-        UserLog.query.filter(
-            UserLog.user_id == user.id, UserLog.log_time >= one_week_ago
-        )
-        .order_by(UserLog.log_time.desc())
-        .all()
-    )
 
-    formatted_logs = []
-    for log in user_logs:
-        log_entry = {
-            "date": log.log_time.strftime("%Y-%m-%d"),
-            "triggers": process_triggers(log.triggers),
-            "prodromes": [
-                prod.prodrome.name for prod in log.prodromes if prod.intensity > 2
-            ],
-            "auras": [aura.aura.name for aura in log.auras if aura.is_present],
-            "notes": log.note if log.note else "",
-            "seizure": [],
-        }
-
-        # Add seizure information if any
-        for seizure in log.seizures:
-            seizure_details = {
-                "type": seizure.seizure_type.name,
-                "duration": seizure.duration_sec,
-                "frequency": seizure.frequency,
-                "emergencyIntervention": seizure.requires_emergency_intervention,
-                "postictalSymptoms": format_postictal_symptoms(seizure),
-                "note": seizure.note,
-            }
-            log_entry["seizure"].append(seizure_details)
+@datalog_bp.route("/monthly-logs", methods=["GET"])
+@jwt_required()
+def get_monthly_logs():
+    return _dashboard_logs("monthly")
 
-        formatted_logs.append(log_entry)
 
-    return jsonify(formatted_logs), 200
+@datalog_bp.route("/yearly-logs", methods=["GET"])
+@jwt_required()
+def get_yearly_logs():
+    return _dashboard_logs("yearly")
@@ -0,0 +1,58 @@
+"""Engine settings of the database, by backend.
+
+``DATABASE_URL`` selects a server database (e.g. PostgreSQL, with its driver
+installed); its connection pool is sized by ``DB_POOL_SIZE`` and
+``DB_MAX_OVERFLOW``, connections are recycled after ``DB_POOL_RECYCLE``
+seconds and checked with a ping before use, so connections the server
+dropped are replaced instead of failing a request.
+
+Without it the SQLite file ``DATABASE_URI`` is used, and every new
+connection runs ``SQLITE_PRAGMAS``: WAL lets readers work while a writer
+commits, ``synchronous=NORMAL`` only syncs at checkpoints in WAL mode (a
+power loss can drop the last commits but not corrupt the file) and
+``busy_timeout`` makes concurrent writers from other gunicorn workers wait
+for the lock instead of failing with ``database is locked``.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from .schema import db
+
+
+def engine_options(config):
+    """Return the ``SQLALCHEMY_ENGINE_OPTIONS`` for the configured database."""
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite":
+        # SQLAlchemy picks the pool: a queue per file, one connection for :memory:
+        return {}
+    return {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_pre_ping": True,
+    }
+
+
+def sqlite_pragmas_hook(pragmas):
+    """Return a ``connect`` listener running ``PRAGMA name = value`` for each item."""
+    statements = [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    return set_pragmas
+
+
+def init_app(app):
+    """Install the per-connection settings; call right after ``db.init_app``."""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == "sqlite" and app.config["SQLITE_PRAGMAS"]:
+        event.listen(engine, "connect", sqlite_pragmas_hook(app.config["SQLITE_PRAGMAS"]))
@@ -0,0 +1,294 @@
+"""Dense, fixed-schema feature matrices built from the daily logs.
+
+Both prediction paths (XGBoost and LSTM) consume the same matrix: one float32
+row per ``UserLog`` and one column per trigger/prodrome, in the order the
+models were trained on in ``api/models/base_data.py``. Values are aggregated
+in SQL and scattered into the matrix with NumPy, so building it costs a
+handful of queries and no per-row Python work.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import Float, cast, func
+
+from . import db
+from .lookup_cache import lookup_cache
+from .schema import SeizureEpisode, UserLog, UserProdrome, UserTrigger
+
+# Training column order, see api/models/base_data.py
+TRIGGER_COLUMNS = (
+    "sleep quality",
+    "sleep duration",
+    "stress level",
+    "alcohol consumption today",
+    "caffeine consumption today",
+    "drugs consumption today",
+    "smoking",
+    "missing a meal",
+    "fevers",
+    "steps",
+    "high intensity minutes",
+    "flashing light",
+    "monthly periods",
+    "adherence to prescribed medication regimen",
+    "changes in medication dosage or type",
+)
+PRODROME_COLUMNS = (
+    "headache",
+    "numbness or tingling",
+    "tremor",
+    "dizziness",
+    "nausea",
+    "anxiety",
+    "mood changes",
+    "insomnia",
+    "difficulty focusing",
+    "gastrointestinal disturbances",
+)
+FEATURE_COLUMNS = TRIGGER_COLUMNS + PRODROME_COLUMNS
+NUM_FEATURES = len(FEATURE_COLUMNS)
+
+
+class FeatureSchema:
+    """Maps ``Trigger.id`` and ``Prodrome.id`` to matrix columns.
+
+    The maps are arrays indexed by id holding the column index, or -1 for
+    ids that are not model features.
+    """
+
+    def __init__(self, trigger_names, prodrome_names):
+        self.trigger_columns = self._column_map(trigger_names, TRIGGER_COLUMNS, 0)
+        self.prodrome_columns = self._column_map(
+            prodrome_names, PRODROME_COLUMNS, len(TRIGGER_COLUMNS)
+        )
+
+    @staticmethod
+    def _column_map(names_by_id, columns, offset):
+        """Build an id -> column array from an {id: name} mapping."""
+        positions = {name: offset + i for i, name in enumerate(columns)}
+        size = max(names_by_id, default=0) + 1
+        column_map = np.full(size, -1, dtype=np.int64)
+        for item_id, name in names_by_id.items():
+            column_map[item_id] = positions.get(name.strip().lower(), -1)
+        return column_map
+
+    @classmethod
+    def current(cls):
+        """Return the schema of the cached reference tables.
+
+        The schema is rebuilt only when the lookup cache version changes.
+        """
+        cached = getattr(cls, "_current", None)
+        if cached is not None and cached[0] == lookup_cache.version:
+            return cached[1]
+
+        version = lookup_cache.version
+        schema = cls(
+            {i: e.name for i, e in lookup_cache.table("triggers").by_id.items()},
+            {i: e.name for i, e in lookup_cache.table("prodromes").by_id.items()},
+        )
+        cls._current = (version, schema)
+        return schema
+
+
+def feature_labels():
+    """Map each feature column to the name and kind of its Trigger/Prodrome.
+
+    Returns:
+        dict: ``{column: {"name": str, "kind": "trigger" | "prodrome"}}``,
+        named after the reference tables where they have a matching entry.
+        Rebuilt only when the lookup cache version changes.
+    """
+    cached = getattr(feature_labels, "_current", None)
+    if cached is not None and cached[0] == lookup_cache.version:
+        return cached[1]
+
+    version = lookup_cache.version
+    labels = {}
+    for kind, table, columns in (
+        ("trigger", "triggers", TRIGGER_COLUMNS),
+        ("prodrome", "prodromes", PRODROME_COLUMNS),
+    ):
+        names = {
+            entry.name.strip().lower(): entry.name
+            for entry in lookup_cache.table(table).by_id.values()
+        }
+        for column in columns:
+            labels[column] = {"name": names.get(column, column), "kind": kind}
+    feature_labels._current = (version, labels)
+    return labels
+
+
+def feature_label(feature_name):
+    """Return the label of a booster feature name (or ``f<index>``)."""
+    column = feature_name.strip().lower()
+    if column not in FEATURE_COLUMNS and column[1:].isdigit():
+        index = int(column[1:])
+        column = FEATURE_COLUMNS[index] if index < NUM_FEATURES else column
+    return feature_labels().get(column, {"name": feature_name, "kind": None})
+
+
+class FeatureMatrix:
+    """Feature rows of a set of logs, ordered by log time."""
+
+    def __init__(self, log_ids, X, y, log_times=None):
+        self.log_ids = log_ids
+        self.X = X
+        self.y = y
+        self.log_times = (
+            np.array([], dtype="datetime64[us]") if log_times is None else log_times
+        )
+
+    def __len__(self):
+        return len(self.log_ids)
+
+
+def build_feature_matrix(user_id, start=None, end=None, since_log_id=0, schema=None):
+    """Build the feature matrix of a user's logs.
+
+    Args:
+        user_id (int): The owner of the logs.
+        start (datetime): Only include logs at or after this time.
+        end (datetime): Only include logs before this time.
+        since_log_id (int): Only include logs with a greater id.
+        schema (FeatureSchema): Column mapping, from the lookup cache if omitted.
+    Returns:
+        FeatureMatrix: ``X`` is a dense (n_logs, 25) float32 matrix, ``y``
+        flags the logs with at least one seizure episode.
+    """
+    if schema is None:
+        schema = FeatureSchema.current()
+
+    log_filter = [UserLog.user_id == user_id, UserLog.id > since_log_id]
+    if start is not None:
+        log_filter.append(UserLog.log_time >= start)
+    if end is not None:
+        log_filter.append(UserLog.log_time < end)
+
+    logs = db.session.execute(
+        db.select(UserLog.id, UserLog.log_time)
+        .filter(*log_filter)
+        .order_by(UserLog.log_time, UserLog.id)
+    ).all()
+    log_ids = np.array([log_id for log_id, _ in logs], dtype=np.int64)
+    log_times = np.array([log_time for _, log_time in logs], dtype="datetime64[us]")
+    X = np.zeros((len(log_ids), NUM_FEATURES), dtype=np.float32)
+    y = np.zeros(len(log_ids), dtype=np.float32)
+    if not len(log_ids):
+        return FeatureMatrix(log_ids, X, y, log_times)
+
+    # Rows are ordered by time; sort the ids once to map log_id -> row
+    order = np.argsort(log_ids)
+    sorted_ids = log_ids[order]
+
+    def rows_of(ids):
+        return order[np.searchsorted(sorted_ids, ids)]
+
+    prodromes = _fetch(
+        db.select(
+            UserProdrome.log_id,
+            UserProdrome.prodrome_id,
+            func.max(UserProdrome.intensity),
+        )
+        .join(UserLog, UserProdrome.log_id == UserLog.id)
+        .filter(*log_filter)
+        .group_by(UserProdrome.log_id, UserProdrome.prodrome_id),
+        3,
+    )
+    # Numeric triggers take precedence, boolean ones count as 0/1
+    triggers = _fetch(
+        db.select(
+            UserTrigger.log_id,
+            UserTrigger.trigger_id,
+            func.max(
+                func.coalesce(
+                    UserTrigger.value_numeric, cast(UserTrigger.value_boolean, Float), 0
+                )
+            ),
+        )
+        .join(UserLog, UserTrigger.log_id == UserLog.id)
+        .filter(*log_filter)
+        .group_by(UserTrigger.log_id, UserTrigger.trigger_id),
+        3,
+    )
+    seizure_log_ids = _fetch(
+        db.select(SeizureEpisode.log_id)
+        .join(UserLog, SeizureEpisode.log_id == UserLog.id)
+        .filter(*log_filter)
+        .distinct(),
+        1,
+    )
+
+    _scatter(X, rows_of, schema.prodrome_columns, prodromes)
+    _scatter(X, rows_of, schema.trigger_columns, triggers)
+    y[rows_of(seizure_log_ids[:, 0].astype(np.int64))] = 1
+
+    return FeatureMatrix(log_ids, X, y, log_times)
+
+
+def build_daily_features(user_id, day, schema=None):
+    """Return the feature row of a user's most recent log on ``day``.
+
+    Days without a log yield a row of zeros.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    features = build_feature_matrix(
+        user_id, start=start, end=start + timedelta(days=1), schema=schema
+    )
+    if not len(features):
+        return np.zeros(NUM_FEATURES, dtype=np.float32)
+    return features.X[-1]
+
+
+def build_feature_window(user_id, day, window, padding=None, schema=None):
+    """Return the (window, 25) feature rows of the ``window`` days ending on ``day``.
+
+    Each day holds the row of its most recent log, days without a log a row of
+    zeros. As in training (see ``window_dataset`` in api/models/lstm_model.py),
+    days before the user's first log are padding: they hold ``padding``, the
+    row the model's preprocessing maps to zeros (zeros if omitted).
+    """
+    end = datetime.combine(day, datetime.min.time()) + timedelta(days=1)
+    start = end - timedelta(days=window)
+    features = build_feature_matrix(user_id, start=start, end=end, schema=schema)
+
+    rows = np.zeros((window, NUM_FEATURES), dtype=np.float32)
+    days = (
+        features.log_times.astype("datetime64[D]") - np.datetime64(start.date())
+    ).astype(np.int64)
+    # Logs are ordered by time, keep the last one of each day
+    last = np.append(days[1:] != days[:-1], True) if len(days) else days.astype(bool)
+    rows[days[last]] = features.X[last]
+
+    first_day = int(days[0]) if len(days) else window
+    if padding is not None and first_day > 0:
+        logged_before = db.session.scalar(
+            db.select(
+                db.exists().where(UserLog.user_id == user_id, UserLog.log_time < start)
+            )
+        )
+        if not logged_before:
+            rows[:first_day] = padding
+    return rows
+
+
+def _fetch(statement, width):
+    """Run a statement and return its rows as a (n, width) float64 array."""
+    rows = db.session.execute(statement).all()
+    return np.array(rows, dtype=np.float64).reshape(len(rows), width)
+
+
+def _scatter(X, rows_of, column_map, items):
+    """Write (log_id, item_id, value) triples into their matrix cells."""
+    if not len(items):
+        return
+    item_ids = items[:, 1].astype(np.int64)
+    known = item_ids < len(column_map)
+    columns = np.full(len(items), -1, dtype=np.int64)
+    columns[known] = column_map[item_ids[known]]
+    mapped = columns >= 0
+
+    X[rows_of(items[mapped, 0].astype(np.int64)), columns[mapped]] = items[
+        mapped, 2
+    ]
@@ -0,0 +1,252 @@
+"""Run model inference in a local process pool instead of the request thread.
+
+The web worker only builds the feature rows (a few SQL queries) and submits
+them as a job; the LSTM forward pass and the XGBoost fine-tuning run in one
+of ``INFERENCE_WORKERS`` processes, which load the models themselves on first
+use. Clients poll the job until it is done.
+
+Job states are JSON files in ``INFERENCE_JOBS_DIR``, which all gunicorn
+workers share: a poll can reach any worker, not only the one that accepted
+the job. Finished jobs are kept for ``INFERENCE_RESULT_TTL`` seconds.
+
+With ``INFERENCE_WORKERS = 0`` jobs run synchronously when submitted, which
+is what the tests and single-process development setups use.
+"""
+
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from .metrics import PREDICT_SECONDS
+from .model_loader import ModelLoader
+from .model_registry import ModelRegistry
+
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+
+# Per-process state of the pool workers, set up by _init_worker
+_worker_settings = None
+_worker_loader = None
+_worker_registry = None
+
+
+def _init_worker(settings):
+    global _worker_settings, _worker_loader, _worker_registry
+    _worker_settings = settings
+    _worker_loader = ModelLoader()
+    _worker_loader.configure(
+        settings["lstm_path"],
+        settings["xgboost_path"],
+        settings["lstm_preprocessing_path"],
+        settings["xgboost_preprocessing_path"],
+    )
+    _worker_registry = ModelRegistry()
+    _worker_registry.configure(
+        settings["registry_dir"],
+        _worker_loader,
+        num_boost_round=settings["boost_rounds"],
+        keep_versions=settings["keep_versions"],
+    )
+    warm_up = [name for name in settings["warm_up"].split(",") if name]
+    _worker_loader.warm_up(warm_up)
+
+
+def run_lstm(model_input):
+    """Predict the seizure probability of a (1, T, 25) feature window."""
+    model = _worker_loader.get("lstm")
+    with PREDICT_SECONDS.labels("lstm").time():
+        prediction = model.predict(model_input, verbose=0)
+    return {"prediction_lstm": float(prediction.ravel()[0])}
+
+
+def run_xgboost(user_id, X, y, last_log_id):
+    """Fine-tune the user's booster on new rows if any, return its features."""
+    snapshot = _worker_registry.get(user_id)
+    if len(X) and (snapshot is None or last_log_id > snapshot.last_log_id):
+        snapshot = _worker_registry.fit(user_id, X, y, last_log_id)
+    elif snapshot is None:
+        # No logs yet, fall back to the global model
+        snapshot = _worker_registry.base_snapshot()
+    return {
+        "feature_importance": snapshot.feature_importance,
+        "model_version": snapshot.version,
+    }
+
+
+class InferenceJob:
+    """A submitted prediction and the future holding its outcome."""
+
+    def __init__(self, user_id, model, future):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.model = model
+        self.future = future
+        self.submitted_at = time.time()
+
+    @property
+    def status(self):
+        if not self.future.done():
+            return "pending"
+        return "failed" if self.future.exception() else "done"
+
+    def to_dict(self):
+        data = {"job_id": self.id, "model": self.model, "status": self.status}
+        if self.status == "done":
+            data["result"] = self.future.result()
+        elif self.status == "failed":
+            data["error"] = str(self.future.exception())
+        return data
+
+
+class JobStore:
+    """Job states as JSON files, one per job, in a directory shared by processes.
+
+    A state expires ``ttl`` seconds after it was last written. Expired files
+    are deleted when read, and swept at most once per ``ttl`` on writes.
+    """
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        self._swept_at = 0.0
+
+    def save(self, job_id, state):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(job_id)
+        # Written to a temporary file and renamed, so readers never see half
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+        if time.time() - self._swept_at > self.ttl:
+            self._swept_at = time.time()
+            self.sweep()
+
+    def load(self, job_id):
+        """Return the state of a job, or None if unknown or expired."""
+        # Ids come from URLs: only accept our own, never a path
+        if not JOB_ID.fullmatch(job_id):
+            return None
+        path = self._path(job_id)
+        try:
+            if self._expired(path):
+                os.remove(path)
+                return None
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def sweep(self):
+        """Delete the files of expired jobs."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if self._expired(path):
+                    os.remove(path)
+            except OSError:
+                # Deleted by another process
+                pass
+
+    def _expired(self, path):
+        return time.time() - os.path.getmtime(path) >= self.ttl
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+
+class InferencePool:
+    """Process pool and job store, used as a Flask extension."""
+
+    def __init__(self, app=None):
+        self.max_workers = 0
+        self.jobs = None
+        self._settings = None
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.shutdown()
+        self.max_workers = app.config["INFERENCE_WORKERS"]
+        self.jobs = JobStore(
+            app.config["INFERENCE_JOBS_DIR"], app.config["INFERENCE_RESULT_TTL"]
+        )
+        self._settings = {
+            "lstm_path": app.config["LSTM_MODEL_PATH"],
+            "xgboost_path": app.config["XGBOOST_MODEL_PATH"],
+            "lstm_preprocessing_path": app.config["LSTM_PREPROCESSING_PATH"],
+            "xgboost_preprocessing_path": app.config["XGBOOST_PREPROCESSING_PATH"],
+            "registry_dir": app.config["MODEL_REGISTRY_DIR"],
+            "boost_rounds": app.config["MODEL_REGISTRY_BOOST_ROUNDS"],
+            "keep_versions": app.config["MODEL_REGISTRY_KEEP_VERSIONS"],
+            "warm_up": app.config["MODEL_WARMUP"],
+        }
+        app.extensions["inference_pool"] = self
+
+    def submit(self, user_id, model, fn, *args):
+        """Queue ``fn(*args)`` and return the job tracking it."""
+        if self.max_workers:
+            future = self._get_executor().submit(fn, *args)
+        else:
+            future = self._run_inline(fn, *args)
+
+        job = InferenceJob(user_id, model, future)
+        if not future.done():
+            self._save(job)
+        # Written again when finished, so the TTL starts then
+        future.add_done_callback(lambda _: self._save(job))
+        return job
+
+    def get(self, job_id, user_id):
+        """Return the state of a user's job as a dict, None if unknown or expired.
+
+        Jobs of other users are reported as unknown.
+        """
+        state = self.jobs.load(job_id)
+        if state is None or state["user_id"] != user_id:
+            return None
+        return state["job"]
+
+    def _save(self, job):
+        self.jobs.save(job.id, {"user_id": job.user_id, "job": job.to_dict()})
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self):
+        # Started on first use so web workers that never predict stay small
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        # TensorFlow is not fork-safe
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self._settings,),
+                    )
+        return self._executor
+
+    def _run_inline(self, fn, *args):
+        if _worker_settings != self._settings:
+            _init_worker(self._settings)
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
@@ -0,0 +1,130 @@
+"""Process-wide cache of the reference tables.
+
+Prodromes, auras, triggers and seizure types are seeded once (see
+``user_data.py``) and almost never change, so they are kept in memory and
+used for validation and name resolution instead of querying them per item.
+
+The cache is read-through: a table is loaded on first use, again when it is
+older than ``LOOKUP_CACHE_TTL`` (to pick up writes from other processes),
+and on the first miss after a load. Further misses are answered from memory
+until the table expires, so unknown ids cannot make every request query it.
+Commits that add, change or delete reference rows invalidate it.
+``version`` is bumped whenever the cached content changes.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .schema import Aura, Prodrome, SeizureType, Trigger, db
+
+LookupEntry = namedtuple("LookupEntry", ["id", "name", "description"])
+
+LOOKUP_MODELS = {
+    "prodromes": Prodrome,
+    "auras": Aura,
+    "triggers": Trigger,
+    "seizure_types": SeizureType,
+}
+
+
+class LookupTable:
+    """One loaded reference table: id -> entry and name -> id."""
+
+    def __init__(self, entries, reloaded_for_miss=False):
+        self.loaded_at = time.monotonic()
+        self.by_id = {entry.id: entry for entry in entries}
+        self.ids_by_name = {entry.name: entry.id for entry in entries}
+        # Loaded because of a miss: misses are final until it expires
+        self.reloaded_for_miss = reloaded_for_miss
+
+
+class LookupCache:
+    """Read-through cache of the reference tables, used as a Flask extension."""
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self.version = 0
+        self._tables = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get("LOOKUP_CACHE_TTL", 300)
+        app.extensions["lookup_cache"] = self
+        # Preload the tables so the first requests do not pay for it
+        with app.app_context():
+            self.invalidate()
+            for kind in LOOKUP_MODELS:
+                self.table(kind)
+
+    def table(self, kind):
+        """Return a loaded table, reloading it if missing or expired."""
+        table = self._tables.get(kind)
+        if table is None or time.monotonic() - table.loaded_at > self.ttl:
+            table = self._load(kind)
+        return table
+
+    def get(self, kind, item_id):
+        """Return the entry with the given id, or None if it does not exist."""
+        table = self.table(kind)
+        entry = table.by_id.get(item_id)
+        if entry is None and isinstance(item_id, int) and not table.reloaded_for_miss:
+            # The row may have been added by another process since the load
+            entry = self._load(kind, reloaded_for_miss=True).by_id.get(item_id)
+        return entry
+
+    def name(self, kind, item_id):
+        """Return the name of an entry, or None if it does not exist."""
+        entry = self.get(kind, item_id)
+        return entry.name if entry else None
+
+    def id_for(self, kind, name):
+        """Return the id of the entry with the given name, or None."""
+        return self.table(kind).ids_by_name.get(name)
+
+    def invalidate(self):
+        with self._lock:
+            self._tables = {}
+            self.version += 1
+
+    def _load(self, kind, reloaded_for_miss=False):
+        model = LOOKUP_MODELS[kind]
+        rows = db.session.execute(
+            db.select(model.id, model.name, model.description)
+        ).all()
+        table = LookupTable([LookupEntry(*row) for row in rows], reloaded_for_miss)
+        with self._lock:
+            previous = self._tables.get(kind)
+            if previous is not None and previous.by_id != table.by_id:
+                # Changed by another process
+                self.version += 1
+            self._tables[kind] = table
+        return table
+
+
+lookup_cache = LookupCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_lookup_writes(session, flush_context):
+    """Remember that the transaction wrote reference rows."""
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, tuple(LOOKUP_MODELS.values())):
+            session.info["lookup_tables_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("lookup_tables_changed", False):
+        lookup_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("lookup_tables_changed", None)
@@ -0,0 +1,100 @@
+"""Evaluate the LSTM with NumPy instead of TensorFlow.
+
+The network trained in ``api/models/lstm_model.py`` is
+``LSTM(50) -> Dropout(0.2) -> Dense(1, sigmoid)``. At inference time dropout
+is a no-op, so a prediction is a handful of small matrix products, which do
+not justify importing TensorFlow (hundreds of MB per worker).
+
+``flask models export-lstm`` writes the trained weights of ``lstm_model.h5``
+to an ``.npz`` file; ``model_loader.load_lstm_model`` serves such files with
+``NumpyLSTM`` and never imports TensorFlow for them.
+"""
+
+import numpy as np
+
+# Arrays stored in the exported file
+WEIGHT_NAMES = (
+    "lstm_kernel",
+    "lstm_recurrent_kernel",
+    "lstm_bias",
+    "dense_kernel",
+    "dense_bias",
+)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class NumpyLSTM:
+    """A single-layer Keras LSTM with a sigmoid Dense head, in NumPy.
+
+    Gates follow the Keras layout: the kernels are the input, forget, cell and
+    output gate weights concatenated along the last axis.
+    """
+
+    def __init__(self, weights):
+        self.kernel = np.asarray(weights["lstm_kernel"], dtype=np.float32)
+        self.recurrent_kernel = np.asarray(
+            weights["lstm_recurrent_kernel"], dtype=np.float32
+        )
+        self.bias = np.asarray(weights["lstm_bias"], dtype=np.float32)
+        self.dense_kernel = np.asarray(weights["dense_kernel"], dtype=np.float32)
+        self.dense_bias = np.asarray(weights["dense_bias"], dtype=np.float32)
+        self.units = self.recurrent_kernel.shape[0]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as weights:
+            return cls({name: weights[name] for name in WEIGHT_NAMES})
+
+    def with_input_transform(self, weight, bias):
+        """Return a copy that applies ``x @ weight + bias`` to its inputs first.
+
+        The transform is folded into the input kernel and bias, so it adds no
+        work per prediction.
+        """
+        weights = {
+            "lstm_kernel": weight @ self.kernel,
+            "lstm_recurrent_kernel": self.recurrent_kernel,
+            "lstm_bias": self.bias + bias @ self.kernel,
+            "dense_kernel": self.dense_kernel,
+            "dense_bias": self.dense_bias,
+        }
+        return NumpyLSTM(weights)
+
+    def predict(self, x, verbose=0):
+        """Return the (batch, 1) outputs of a (batch, timesteps, features) input.
+
+        Accepts the same arguments as ``keras.Model.predict`` so the two are
+        interchangeable.
+        """
+        x = np.asarray(x, dtype=np.float32)
+        batch_size = x.shape[0]
+        h = np.zeros((batch_size, self.units), dtype=np.float32)
+        c = np.zeros((batch_size, self.units), dtype=np.float32)
+
+        # All input projections at once, the recurrence per timestep
+        projected = x @ self.kernel + self.bias
+        for t in range(x.shape[1]):
+            z = projected[:, t] + h @ self.recurrent_kernel
+            i, f, g, o = np.split(z, 4, axis=1)
+            c = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+            h = _sigmoid(o) * np.tanh(c)
+
+        return _sigmoid(h @ self.dense_kernel + self.dense_bias)
+
+
+def export_lstm_weights(model, path):
+    """Write the weights of a trained Keras LSTM model to an ``.npz`` file."""
+    layers = {layer.__class__.__name__: layer for layer in model.layers}
+    lstm_kernel, lstm_recurrent_kernel, lstm_bias = layers["LSTM"].get_weights()
+    dense_kernel, dense_bias = layers["Dense"].get_weights()
+    np.savez(
+        path,
+        lstm_kernel=lstm_kernel,
+        lstm_recurrent_kernel=lstm_recurrent_kernel,
+        lstm_bias=lstm_bias,
+        dense_kernel=dense_kernel,
+        dense_bias=dense_bias,
+    )
@@ -0,0 +1,167 @@
+"""Prometheus metrics of the API, served at ``GET /metrics``.
+
+Request latency and counts by blueprint and endpoint, the database time and
+statements of each request (from ``profiling.py``), connection pool usage,
+model load and prediction times, LSTM batch sizes and cache hits and misses.
+
+Metrics are module-level objects, updated where things happen (e.g.
+``model_loader.py`` observes ``MODEL_LOAD_SECONDS``). Under gunicorn every
+worker is a separate process: with ``PROMETHEUS_MULTIPROC_DIR`` set, each
+process writes its values to files in that directory and ``/metrics``
+aggregates the files of all workers, whichever worker serves the scrape
+(``gunicorn.conf.py`` clears the directory on start and drops the files of
+dead workers). Without it, the values of the current process are served.
+
+``/metrics`` is outside ``/api``, so nginx does not expose it; Prometheus
+scrapes gunicorn directly.
+"""
+
+import os
+import time
+
+from flask import Response, current_app, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+from .schema import db
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+MODEL_LOAD_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Requests served",
+    ["blueprint", "endpoint", "method", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to build the response",
+    ["blueprint", "endpoint", "method"],
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL statements per request",
+    ["blueprint", "endpoint"],
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements per request",
+    ["blueprint", "endpoint"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+
+DB_POOL_SIZE = Gauge(
+    "db_pool_size", "Connections the pools keep open", multiprocess_mode="livesum"
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "Connections in use",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTIONS = Counter("db_pool_connections", "Database connections opened")
+
+MODEL_LOAD_SECONDS = Histogram(
+    "model_load_seconds", "Time to load a model", ["model"], buckets=MODEL_LOAD_BUCKETS
+)
+PREDICT_SECONDS = Histogram(
+    "model_predict_seconds", "Time of a forward pass of a model", ["model"]
+)
+PREDICT_BATCH_SIZE = Histogram(
+    "model_predict_batch_size",
+    "Inputs per forward pass",
+    ["model"],
+    buckets=BATCH_SIZE_BUCKETS,
+)
+MODEL_FIT_SECONDS = Histogram(
+    "model_fit_seconds", "Time to fine-tune a per-user model", ["model"]
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Cache lookups by result (hit or miss)", ["cache", "result"]
+)
+
+
+def _registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # A fresh registry per scrape, reading the files of every process
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def _labels():
+    return request.blueprint or "", request.endpoint or "<unmatched>"
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
+
+def _on_connect(dbapi_connection, connection_record):
+    DB_POOL_CONNECTIONS.inc()
+
+
+class Metrics:
+    """Records request and database pool metrics, used as a Flask extension."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions["metrics"] = self
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, "checkout", _on_checkout):
+            event.listen(engine, "checkout", _on_checkout)
+            event.listen(engine, "checkin", _on_checkin)
+            event.listen(engine, "connect", _on_connect)
+            # Only queue pools have a fixed size, e.g. not in-memory SQLite
+            if hasattr(engine.pool, "size"):
+                DB_POOL_SIZE.set(engine.pool.size())
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view, methods=["GET"])
+
+    def _start_request(self):
+        g.metrics_started_at = time.perf_counter()
+
+    def _finish_request(self, response):
+        if request.endpoint == "metrics" or "metrics_started_at" not in g:
+            return response
+        blueprint, endpoint = _labels()
+        HTTP_REQUEST_SECONDS.labels(blueprint, endpoint, request.method).observe(
+            time.perf_counter() - g.metrics_started_at
+        )
+        HTTP_REQUESTS.labels(
+            blueprint, endpoint, request.method, str(response.status_code)
+        ).inc()
+
+        # Statements of the request so far, see profiling.py
+        stats = current_app.extensions["query_profiler"].request_stats()
+        if stats is not None:
+            HTTP_REQUEST_DB_SECONDS.labels(blueprint, endpoint).observe(stats.seconds)
+            HTTP_REQUEST_DB_QUERIES.labels(blueprint, endpoint).observe(stats.count)
+        return response
+
+    def metrics_view(self):
+        return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
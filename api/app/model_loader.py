@@ -0,0 +1,172 @@
+"""Load the prediction models on first use instead of at import time.
+
+TensorFlow and XGBoost are only imported when a model is first requested, so
+workers that only serve auth/medication/datalog traffic never pay for them.
+Models can be loaded ahead of traffic with ``warm_up``, which the gunicorn
+``post_fork`` hook calls (see ``api/gunicorn.conf.py``).
+"""
+
+import functools
+import threading
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .metrics import MODEL_LOAD_SECONDS
+
+models_cli = AppGroup("models", help="Export the prediction models.")
+
+
+def load_lstm_model(path, preprocessing_path=None):
+    """Load the LSTM, with NumPy for exported ``.npz`` weights, else with Keras.
+
+    The model takes feature store rows: the preprocessing it was trained with
+    (see preprocessing.py) is folded into the NumPy weights, or applied before
+    the Keras model.
+    """
+    from .preprocessing import PreprocessedModel, load_preprocessor
+
+    preprocessor = load_preprocessor(preprocessing_path)
+    if path.endswith(".npz"):
+        from .lstm_runtime import NumpyLSTM
+
+        model = NumpyLSTM.load(path)
+        if preprocessor.is_identity:
+            return model
+        return model.with_input_transform(preprocessor.weight, preprocessor.bias)
+
+    from tensorflow.keras.models import load_model
+
+    model = load_model(path)
+    if preprocessor.is_identity:
+        return model
+    return PreprocessedModel(model, preprocessor)
+
+
+def load_xgboost_model(path):
+    """Load the XGBoost booster."""
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(path)
+    return booster
+
+
+def load_preprocessing(path):
+    """Load a preprocessing artifact, see preprocessing.py."""
+    from .preprocessing import load_preprocessor
+
+    return load_preprocessor(path)
+
+
+class LazyModel:
+    """A model that is loaded once, on first access, in a thread-safe way."""
+
+    def __init__(self, name, loader, path):
+        self.name = name
+        self.loader = loader
+        self.path = path
+        self.load_seconds = None
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def get(self):
+        # Double-checked locking: only the first caller pays for the load
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    self._model = self.loader(self.path)
+                    self.load_seconds = time.perf_counter() - start
+                    MODEL_LOAD_SECONDS.labels(self.name).observe(self.load_seconds)
+        return self._model
+
+
+class ModelLoader:
+    """Registry of the lazily loaded models, used as a Flask extension."""
+
+    def __init__(self, app=None):
+        self.models = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.configure(
+            app.config["LSTM_MODEL_PATH"],
+            app.config["XGBOOST_MODEL_PATH"],
+            app.config["LSTM_PREPROCESSING_PATH"],
+            app.config["XGBOOST_PREPROCESSING_PATH"],
+        )
+        app.extensions["model_loader"] = self
+
+    def configure(
+        self,
+        lstm_path,
+        xgboost_path,
+        lstm_preprocessing_path=None,
+        xgboost_preprocessing_path=None,
+    ):
+        """Set up the models without an app, e.g. in an inference worker."""
+        self.models = {
+            "lstm": LazyModel(
+                "lstm",
+                functools.partial(
+                    load_lstm_model, preprocessing_path=lstm_preprocessing_path
+                ),
+                lstm_path,
+            ),
+            "xgboost": LazyModel("xgboost", load_xgboost_model, xgboost_path),
+            # The input window of the LSTM; its mapping is folded into "lstm"
+            "lstm_preprocessing": LazyModel(
+                "lstm_preprocessing", load_preprocessing, lstm_preprocessing_path
+            ),
+            # Maps feature store rows to the inputs of the XGBoost model
+            "xgboost_preprocessing": LazyModel(
+                "xgboost_preprocessing", load_preprocessing, xgboost_preprocessing_path
+            ),
+        }
+
+    def get(self, name):
+        """Return a model, loading it if needed."""
+        return self.models[name].get()
+
+    def warm_up(self, names):
+        """Load the given models now, e.g. right after a worker forks."""
+        for name in names:
+            self.get(name)
+
+
+@models_cli.command("export-lstm")
+@click.option("--source", default=None, help="Keras model [LSTM_KERAS_MODEL_PATH].")
+@click.option("--output", default=None, help="Weights file [LSTM_MODEL_PATH].")
+def export_lstm_command(source, output):
+    """Export the Keras LSTM weights for the NumPy runtime."""
+    from tensorflow.keras.models import load_model
+
+    from .lstm_runtime import export_lstm_weights
+
+    source = source or current_app.config["LSTM_KERAS_MODEL_PATH"]
+    output = output or current_app.config["LSTM_MODEL_PATH"]
+    export_lstm_weights(load_model(source), output)
+    click.echo(f"Exported {source} to {output}")
+
+
+@models_cli.command("export-xgboost")
+@click.option("--source", default=None, help="XGBoost model [XGBOOST_MODEL_PATH].")
+@click.option("--output", required=True, help="Trees file (.npz).")
+def export_xgboost_command(source, output):
+    """Flatten the XGBoost trees into arrays for the NumPy evaluator."""
+    from .tree_runtime import FlatForest
+
+    source = source or current_app.config["XGBOOST_MODEL_PATH"]
+    if output == source:
+        raise click.UsageError("Set --output to an .npz file")
+    forest = FlatForest.load(source)
+    forest.save(output)
+    click.echo(f"Exported {len(forest.roots)} trees from {source} to {output}")
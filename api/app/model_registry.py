@@ -0,0 +1,229 @@
+"""Per-user XGBoost model snapshots, versioned and persisted on disk.
+
+Each user gets their own booster, obtained by continuing to boost from the
+global model (or from the user's previous snapshot) on the logs added since
+the last fit. Snapshots are written to ``MODEL_REGISTRY_DIR/<user_id>/`` as
+``v<version>.json`` next to a ``meta.json`` file that records which logs the
+snapshot has already seen, so a fit only happens when new logs exist.
+
+Several processes (gunicorn workers, inference pool workers) may share the
+directory: ``get`` checks ``meta.json`` for newer versions and ``fit`` holds
+an exclusive lock on the user's directory.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+from .cache import TTLCache
+from .metrics import MODEL_FIT_SECONDS
+
+META_FILE = "meta.json"
+IMPORTANCE_TYPES = ("weight", "gain", "cover", "total_gain")
+
+# Importance scores by booster hash. A serialized booster never changes, so
+# entries only expire to bound memory.
+importance_cache = TTLCache(24 * 3600, maxsize=256, name="feature_importance")
+
+
+def booster_hash(booster):
+    """Return a content hash of a booster, stable across processes."""
+    return hashlib.sha256(booster.save_raw("json")).hexdigest()
+
+
+def get_importances(booster, model_hash=None):
+    """Return {importance_type: {feature: score}} for every importance type."""
+    model_hash = model_hash or booster_hash(booster)
+    importances = importance_cache.get(model_hash)
+    if importances is None:
+        importances = {
+            importance_type: booster.get_score(importance_type=importance_type)
+            for importance_type in IMPORTANCE_TYPES
+        }
+        importance_cache.set(model_hash, importances)
+    return importances
+
+
+def get_feature_importance(booster, importances=None):
+    """Return the five most relevant features of a booster, by weight."""
+    weights = (importances or get_importances(booster))["weight"]
+    return sorted(weights, key=weights.get, reverse=True)[:5]
+
+
+class ModelSnapshot:
+    """A fitted booster together with the metadata describing it."""
+
+    def __init__(self, booster, version, last_log_id):
+        self.booster = booster
+        self.version = version
+        self.last_log_id = last_log_id
+        # Computed once per model, so repeated reads are O(1)
+        self.model_hash = booster_hash(booster)
+        self.importances = get_importances(booster, self.model_hash)
+        self.feature_importance = get_feature_importance(booster, self.importances)
+
+
+class ModelRegistry:
+    """Store and serve per-user boosters.
+
+    Follows the Flask extension pattern used by ``jwt`` and ``migrate``:
+    create it at import time and bind it with ``init_app``.
+    """
+
+    def __init__(self, app=None):
+        self.root_dir = None
+        self.num_boost_round = 10
+        self.keep_versions = 3
+        self._loader = None
+        self._base = None
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._user_locks = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.configure(
+            app.config["MODEL_REGISTRY_DIR"],
+            app.extensions["model_loader"],
+            num_boost_round=app.config.get("MODEL_REGISTRY_BOOST_ROUNDS", 10),
+            keep_versions=app.config.get("MODEL_REGISTRY_KEEP_VERSIONS", 3),
+        )
+        app.extensions["model_registry"] = self
+
+    def configure(self, root_dir, loader, num_boost_round=10, keep_versions=3):
+        """Set up the registry without an app, e.g. in an inference worker."""
+        self.root_dir = root_dir
+        self.num_boost_round = num_boost_round
+        self.keep_versions = keep_versions
+        self._loader = loader
+        self._base = None
+        self._snapshots = {}
+
+    def base_snapshot(self):
+        """Return the global model as version 0, loading it on first use."""
+        if self._base is None:
+            booster = self._loader.get("xgboost")
+            with self._lock:
+                if self._base is None:
+                    self._base = ModelSnapshot(booster, version=0, last_log_id=0)
+        return self._base
+
+    def get(self, user_id):
+        """Return the latest snapshot of a user, or None if never fitted."""
+        user_id = int(user_id)
+        meta = self._read_meta(user_id)
+        if meta is None:
+            return None
+
+        snapshot = self._snapshots.get(user_id)
+        # Another process may have stored a newer version
+        if snapshot is None or snapshot.version != meta["version"]:
+            snapshot = self._load(user_id, meta)
+            self._snapshots[user_id] = snapshot
+        return snapshot
+
+    def fit(self, user_id, X, y, last_log_id):
+        """Continue boosting a user's model on new rows and store a new version.
+
+        Args:
+            user_id (int): The owner of the model.
+            X (array-like): Feature rows of the logs added since the last fit.
+            y (array-like): Seizure occurrence for each row.
+            last_log_id (int): The most recent log id included in ``X``.
+        Returns:
+            ModelSnapshot: The new snapshot, or the current one if it already
+            covers ``last_log_id`` (e.g. a concurrent request fitted first).
+        """
+        import xgboost as xgb
+
+        user_id = int(user_id)
+        with self._user_lock(user_id), self._dir_lock(user_id):
+            current = self.get(user_id)
+            if current is not None and current.last_log_id >= last_log_id:
+                return current
+
+            parent = current or self.base_snapshot()
+            dtrain = xgb.DMatrix(
+                np.asarray(X, dtype=np.float32),
+                label=np.asarray(y, dtype=np.float32),
+                feature_names=parent.booster.feature_names,
+            )
+            with MODEL_FIT_SECONDS.labels("xgboost").time():
+                booster = xgb.train(
+                    {"objective": "binary:logistic", "tree_method": "hist"},
+                    dtrain,
+                    num_boost_round=self.num_boost_round,
+                    xgb_model=parent.booster,
+                )
+
+            snapshot = ModelSnapshot(booster, parent.version + 1, last_log_id)
+            self._save(user_id, snapshot)
+            self._snapshots[user_id] = snapshot
+            return snapshot
+
+    def _user_lock(self, user_id):
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    @contextmanager
+    def _dir_lock(self, user_id):
+        """Hold an exclusive lock on the user's directory, across processes."""
+        user_dir = self._user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        with open(os.path.join(user_dir, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _user_dir(self, user_id):
+        return os.path.join(self.root_dir, str(user_id))
+
+    def _read_meta(self, user_id):
+        meta_path = os.path.join(self._user_dir(user_id), META_FILE)
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _load(self, user_id, meta):
+        import xgboost as xgb
+
+        booster = xgb.Booster()
+        booster.load_model(
+            os.path.join(self._user_dir(user_id), f"v{meta['version']}.json")
+        )
+        return ModelSnapshot(booster, meta["version"], meta["last_log_id"])
+
+    def _save(self, user_id, snapshot):
+        user_dir = self._user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        snapshot.booster.save_model(
+            os.path.join(user_dir, f"v{snapshot.version}.json")
+        )
+
+        # Write the metadata atomically so readers never see a partial file
+        meta = {
+            "version": snapshot.version,
+            "last_log_id": snapshot.last_log_id,
+            "created_at": datetime.utcnow().isoformat(),
+        }
+        tmp_path = os.path.join(user_dir, META_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(user_dir, META_FILE))
+
+        # Prune old versions
+        stale_version = snapshot.version - self.keep_versions
+        stale_path = os.path.join(user_dir, f"v{stale_version}.json")
+        if stale_version > 0 and os.path.exists(stale_path):
+            os.remove(stale_path)
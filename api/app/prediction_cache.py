@@ -0,0 +1,53 @@
+"""Per-user cache of prediction results.
+
+A prediction only depends on the user's logs and their items, so each user
+has a ``data_version`` counter (``users.data_version``) that every daily log
+create/update/delete bumps in the same transaction as the change. Cached
+results are keyed by that version: a write makes the old entries unreachable
+(they are dropped when they expire or are evicted), and because the version
+lives in the database, writes handled by other workers are seen too.
+Checking the cache costs one primary key lookup.
+"""
+
+from flask import current_app
+
+from .schema import User, db
+
+
+def bump_data_version(user_id):
+    """Increment a user's data version, committed with the data change."""
+    db.session.execute(
+        db.update(User)
+        .where(User.id == user_id)
+        .values(data_version=User.data_version + 1)
+    )
+
+
+def get_data_version(user_id):
+    """Return a user's data version, or None if the user does not exist."""
+    return db.session.execute(
+        db.select(User.data_version).filter_by(id=user_id)
+    ).scalar()
+
+
+def cached_prediction(model, user_id, compute, *key):
+    """Return the cached result of ``compute()`` for the user's data version.
+
+    Args:
+        model (str): Name of the prediction, part of the cache key.
+        user_id (int): The user the prediction is for.
+        compute (callable): Computes the result on a miss.
+        key: Further inputs the result depends on, e.g. the day.
+    """
+    version = get_data_version(user_id)
+    if version is None:
+        # Unknown users are not cached, so the cache cannot be flooded
+        return compute()
+
+    cache = current_app.extensions["prediction_cache"]
+    cache_key = (model, str(user_id), version, *key)
+    result = cache.get(cache_key)
+    if result is None:
+        result = compute()
+        cache.set(cache_key, result)
+    return result
@@ -0,0 +1,69 @@
+# predictions_jobs.py
+from datetime import date
+from flask import Blueprint, jsonify, request, url_for
+from flask_jwt_extended import jwt_required
+from . import inference_pool, model_registry
+from .inference import run_lstm, run_xgboost
+from .predictions_lstm import prepare_data_for_lstm
+from .predictions_xgb import get_latest_log_id, prepare_data_for_xgboost
+from .user import get_current_user
+
+jobs_bp = Blueprint("predictions_jobs", __name__, url_prefix="/api/predictions")
+
+
+def _lstm_job_args(user):
+    # Today's feature row, shaped for the LSTM
+    return (prepare_data_for_lstm(user.id, date.today()),)
+
+
+def _xgboost_job_args(user):
+    # Only the logs added since the stored snapshot are sent to the worker
+    snapshot = model_registry.get(user.id)
+    since_log_id = snapshot.last_log_id if snapshot else 0
+    X, y = prepare_data_for_xgboost(user.id, since_log_id=since_log_id)
+    return user.id, X, y, get_latest_log_id(user.id)
+
+
+# Job function and argument builder of each model
+PREDICTION_JOBS = {
+    "lstm": (run_lstm, _lstm_job_args),
+    "xgboost": (run_xgboost, _xgboost_job_args),
+}
+
+
+@jobs_bp.route("/jobs", methods=["POST"])
+@jwt_required()
+def submit_prediction_job():
+    user = get_current_user()
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    data = request.get_json(silent=True) or {}
+    model = data.get("model")
+    if model not in PREDICTION_JOBS:
+        return (
+            jsonify({"message": f"model must be one of {sorted(PREDICTION_JOBS)}"}),
+            400,
+        )
+
+    # Features are read here, inference runs in the process pool
+    fn, build_args = PREDICTION_JOBS[model]
+    job = inference_pool.submit(user.id, model, fn, *build_args(user))
+
+    poll_url = url_for("predictions_jobs.get_prediction_job", job_id=job.id)
+    return jsonify(job.to_dict()), 202, {"Location": poll_url}
+
+
+@jobs_bp.route("/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def get_prediction_job(job_id):
+    user = get_current_user()
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    # Read from the shared job store: any worker can answer
+    job = inference_pool.get(job_id, user.id)
+    if job is None:
+        return jsonify({"message": "Job not found or expired"}), 404
+
+    return jsonify(job), 200
@@ -1,82 +1,65 @@
-import numpy as np
-from tensorflow.keras.models import load_model
-from .dailylog import get_user_logs_by_date
-from api.app import app
-from datetime import datetime
-from flask import jsonify, request
-
-# Load the LSTM model outside of the endpoint
-lstm_model_loaded = load_model("lstm_model.h5")
-
-
-def fetch_logs_for_today():
-    # Get today's date
-    today_date = datetime.now().strftime("%Y-%m-%d")
-
-    # Call the imported function with today's date
-    logs_response, status_code = get_user_logs_by_date(today_date)
-
-    # Check the status code
-    if status_code == 200:
-        # If status code is 200, return the logs data
-        return logs_response
-    else:
-        # If status code is not 200, return an error response
-        return jsonify({"error": logs_response}), status_code
+from flask_jwt_extended import jwt_required
+from datetime import date
 
+import numpy as np
+from flask import Blueprint, current_app, jsonify
+from . import lstm_batcher, model_loader
+from .feature_store import build_feature_window
+from .prediction_cache import cached_prediction
+from .user import get_current_user
 
-def prepare_data_for_lstm(logs_data):
-    # Initialize lists to store triggers and prodromes data
-    triggers_data = []
-    prodromes_data = []
+lstm_bp = Blueprint("predictions_lstm", __name__, url_prefix="/api")
 
-    # Iterate over each log
-    for log in logs_data:
-        # Extract triggers data
-        for trigger in log["triggers"]:
-            # Assuming triggers can be either numeric or boolean
-            if "value_numeric" in trigger:
-                triggers_data.append(
-                    [
-                        trigger["value_numeric"],
-                        0,  # For boolean value (not present in this case)
-                    ]
-                )
-            elif "value_boolean" in trigger:
-                triggers_data.append(
-                    [
-                        0,  # For numeric value (not present in this case)
-                        int(trigger["value_boolean"]),
-                    ]
-                )
 
-        # Extract prodromes data
-        for prodrome in log["prodromes"]:
-            prodromes_data.append(prodrome["intensity"])
+def prepare_data_for_lstm(user_id, day):
+    # The days up to today the model was trained to look back over, padded
+    # before the user's first log the way the training windows are
+    preprocessor = model_loader.get("lstm_preprocessing")
+    features = build_feature_window(
+        user_id, day, preprocessor.window, preprocessor.padding_row()
+    )
+    return features[np.newaxis]
 
-    # Convert lists to numpy arrays
-    triggers_data = np.array(triggers_data)
-    prodromes_data = np.array(prodromes_data)
 
-    # Combine triggers and prodromes data into one array
-    combined_data = np.concatenate((triggers_data, prodromes_data), axis=1)
-    reshaped_data = combined_data.reshape((1, 1, combined_data.shape[0]))
+# API endpoint for LSTM model output
+@lstm_bp.route("/predictions_lstm", methods=["GET"])
+@jwt_required()
+def get_lstm_predictions():
+    user = get_current_user()
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+
+    # Recomputed only when the user's data changes or the day does
+    today = date.today()
+    try:
+        prediction_lstm_float = cached_prediction(
+            "lstm", user.id, lambda: predict_lstm(user.id, today), today
+        )
+    except TimeoutError:
+        # The batcher is backed up; the client may retry
+        return (
+            jsonify({"message": "Prediction timed out, try again later"}),
+            503,
+            {"Retry-After": "1"},
+        )
 
-    return reshaped_data
+    # Return the predictions
+    return jsonify({"prediction_lstm": prediction_lstm_float})
 
 
-# API endpoint for LSTM model output
-@app.route("/api/predictions_lstm", methods=["GET"])
-def get_lstm_predictions():
-    # Fetch logs for today
-    logs_data = fetch_logs_for_today()
+def predict_lstm(user_id, day):
+    # Prepare data for LSTM model from the last days' logs
+    model_input = prepare_data_for_lstm(user_id, day)
 
-    # Prepare data for LSTM model
-    model_input = prepare_data_for_lstm(logs_data)
+    # Predict in one forward pass with the concurrent requests, see batching.py
+    prediction_lstm = lstm_batcher.predict(
+        model_input[0], timeout=current_app.config["LSTM_PREDICT_TIMEOUT"]
+    )
+    return float(prediction_lstm.ravel()[0])
 
-    # Make predictions using the loaded LSTM model
-    prediction_lstm = lstm_model_loaded.predict(model_input)
-    prediction_lstm_float = float(prediction_lstm)
 
-    # Return the predictions
-    return jsonify({"prediction_lstm": prediction_lstm_float})
+# Batch size and queue wait histograms of the LSTM batcher
+@lstm_bp.route("/predictions_lstm/batching", methods=["GET"])
+@jwt_required()
+def get_lstm_batching_stats():
+    return jsonify(lstm_batcher.stats())
@@ -1,117 +1,125 @@
 # predictions_xgb.py
-import pandas as pd
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine, func, case
-from . import db
-from flask import jsonify, request, abort
-import xgboost as xgb
-from api.app import app
-from .schema import UserLog, UserProdrome, UserTrigger, SeizureEpisode
-
-
-# Load the XGBoost model
-model_xgb = xgb.XGBClassifier()
-model_xgb.load_model("xgboost_model.json")
-
-
-@app.route("/api/predictions/xgboost", methods=["GET"])
+from sqlalchemy import func
+from . import db, model_loader, model_registry
+from flask import Blueprint, jsonify, request, abort
+from flask_jwt_extended import jwt_required
+from werkzeug.exceptions import HTTPException
+from .feature_store import build_feature_matrix, feature_label
+from .model_registry import IMPORTANCE_TYPES
+from .prediction_cache import cached_prediction
+from .schema import UserLog
+from .user import get_current_user
+
+xgb_bp = Blueprint("predictions_xgb", __name__, url_prefix="/api/predictions")
+
+
+@xgb_bp.route("/xgboost", methods=["GET"])
+@jwt_required()
 def get_xgboost_predictions():
-    try:
-        user_id = request.args.get("user_id")
-        if not user_id:
-            abort(400, "User ID is required.")
-
-        # Prepare data for XGBoost model
-        model_input = prepare_data_for_xgboost(user_id)
-
-        # Retrain the XGBoost model using all user data
-        fine_tune_xgboost_model(model_xgb, *model_input)
+    user = get_current_user()
+    if not user:
+        return jsonify({"message": "User not found"}), 404
 
-        # Get the list of most relevant features from the retrained model
-        feature_importance = get_feature_importance(model_xgb)
+    try:
+        # Recomputed only when the user's data changes
+        result = cached_prediction(
+            "xgboost", user.id, lambda: predict_xgboost(user.id)
+        )
 
         # Return the list of most relevant features
-        return jsonify({"feature_importance": feature_importance})
+        response = jsonify(result)
+        # Unchanged models answer conditional requests with 304
+        response.add_etag()
+        return response.make_conditional(request)
+    except HTTPException:
+        raise
     except Exception as e:
         abort(500, str(e))
 
 
-def prepare_data_for_xgboost(user_id):
-    # Connect to the database
-    engine = db.engine
-    Session = sessionmaker(bind=engine)
-    session = Session()
-
-    # Query user data including prodromes, triggers, and seizure occurrences for the specified user
-    user_data = (
-        session.query(
-            UserProdrome.log_id,
-            UserProdrome.prodrome_id,
-            UserProdrome.intensity,
-            UserTrigger.trigger_id,
-            UserTrigger.value_boolean,
-            UserTrigger.value_numeric,
-            func.exists()
-            .where(SeizureEpisode.log_id == UserProdrome.log_id)
-            .label("has_seizures"),
-        )
-        .join(UserProdrome.log)
-        .outerjoin(UserTrigger, UserProdrome.log_id == UserTrigger.log_id)
-        .filter(UserLog.user_id == user_id)
-        .group_by(UserProdrome.log_id)
-        .all()
+@xgb_bp.route("/xgboost/importance", methods=["GET"])
+@jwt_required()
+def get_xgboost_importance():
+    """Feature importance of the user's current model, by importance type.
+
+    Scores are read from the importance cache of the model registry and are
+    never recomputed for a model version; the model is not refitted here.
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({"message": "User not found"}), 404
+    importance_type = request.args.get("importance_type")
+    if importance_type is not None and importance_type not in IMPORTANCE_TYPES:
+        abort(400, f"importance_type must be one of {', '.join(IMPORTANCE_TYPES)}.")
+
+    snapshot = model_registry.get(user.id) or model_registry.base_snapshot()
+    types = [importance_type] if importance_type else IMPORTANCE_TYPES
+    response = jsonify(
+        {
+            "model_version": snapshot.version,
+            "importance": {
+                name: format_importance(snapshot.importances[name]) for name in types
+            },
+        }
     )
+    response.add_etag()
+    return response.make_conditional(request)
 
-    # Close the session
-    session.close()
 
-    # Create lists to store features (X_train) and target variable (y_train)
-    X_train = []
-    y_train = []
+def predict_xgboost(user_id):
+    # Continue boosting the user's model only if logs were added since the
+    # last fit; otherwise the stored snapshot is served as is
+    snapshot = model_registry.get(user_id)
+    last_fitted_log_id = snapshot.last_log_id if snapshot else 0
+    latest_log_id = get_latest_log_id(user_id)
+
+    if latest_log_id > last_fitted_log_id:
+        # Prepare data for XGBoost model from the new logs only
+        model_input = prepare_data_for_xgboost(
+            user_id, since_log_id=last_fitted_log_id
+        )
+        snapshot = fine_tune_xgboost_model(
+            user_id, *model_input, last_log_id=latest_log_id
+        )
+    elif snapshot is None:
+        # No logs yet, fall back to the global model
+        snapshot = model_registry.base_snapshot()
 
-    # Iterate over the query results
-    for (
-        log_id,
-        prodrome_id,
-        intensity,
-        trigger_id,
-        value_boolean,
-        value_numeric,
-        has_seizures,
-    ) in user_data:
-        # Store features in a list
-        features = []
+    return {
+        "feature_importance": get_feature_importance(snapshot),
+        "model_version": snapshot.version,
+    }
 
-        # Store prodrome intensity if available
-        if prodrome_id is not None:
-            features.append(intensity)
 
-        # Store trigger value if available
-        if trigger_id is not None:
-            # Check if the trigger value is boolean or numeric
-            if value_boolean is not None:
-                features.append(value_boolean)
-            elif value_numeric is not None:
-                features.append(value_numeric)
+def get_latest_log_id(user_id):
+    """Return the id of the most recent log of a user, or 0 if none."""
+    latest_log_id = db.session.execute(
+        db.select(func.max(UserLog.id)).filter_by(user_id=user_id)
+    ).scalar()
+    return latest_log_id or 0
 
-        # Append features to X_train
-        X_train.append(features)
 
-        # Append seizure occurrence to y_train
-        y_train.append(has_seizures)
+def prepare_data_for_xgboost(user_id, since_log_id=0):
+    # One fixed-width feature row per log, mapped to the inputs of the model
+    features = build_feature_matrix(int(user_id), since_log_id=since_log_id)
+    preprocessor = model_loader.get("xgboost_preprocessing")
+    return preprocessor.transform(features.X), features.y
 
-    return X_train, y_train
 
+def fine_tune_xgboost_model(user_id, user_x_train, user_y_train, last_log_id):
+    # Continue boosting the user's snapshot and store it as a new version
+    return model_registry.fit(user_id, user_x_train, user_y_train, last_log_id)
 
-def fine_tune_xgboost_model(model_xgb, user_x_train, user_y_train):
-    # Retrain the XGBoost model using all user data
-    model_xgb.partial_fit(user_x_train, user_y_train)
 
+def get_feature_importance(snapshot):
+    # Computed once when the snapshot is created or loaded
+    return snapshot.feature_importance
 
-def get_feature_importance(model_xgb):
-    # Get the list of most relevant features from the XGBoost model
-    booster = model_xgb.get_booster()
-    feature_importance = booster.get_score(importance_type="weight")
-    features_list = list(feature_importance.keys())
 
-    return features_list[:5]
+def format_importance(scores):
+    """Return ``{feature: score}`` as a list labelled with Trigger/Prodrome names."""
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [
+        {**feature_label(feature), "feature": feature, "score": score}
+        for feature, score in ranked
+    ]
@@ -0,0 +1,133 @@
+"""The input preprocessing the models were trained with.
+
+The training scripts in ``api/models`` save a JSON artifact next to each
+model (``lstm_model.preprocessing.json`` for ``lstm_model.h5``): the input
+columns in model order, each the name of a trigger or prodrome, the mean and
+scale each column was standardized with, and for sequence models the number
+of days per input window (1 if absent). Database ids are not stored;
+they are mapped to columns by name (see ``FeatureSchema``), so an artifact
+works with any database.
+
+Loaded once, an artifact becomes a single affine map from feature store rows
+(``FEATURE_COLUMNS`` order) to model inputs, ``x @ weight + bias``, where
+``weight`` both reorders and scales the columns. For the NumPy LSTM the map
+is folded into the input kernel when the model is loaded, so it costs
+nothing per prediction.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from .feature_store import FEATURE_COLUMNS, NUM_FEATURES, TRIGGER_COLUMNS
+
+PREPROCESSING_VERSION = 1
+
+
+def preprocessing_path(model_path):
+    """Return the artifact path of a model, e.g. lstm_model.preprocessing.json."""
+    return os.path.splitext(model_path)[0] + ".preprocessing.json"
+
+
+class Preprocessor:
+    """Standardizes feature store rows into the column order of a model."""
+
+    def __init__(self, columns, mean=None, scale=None, window=1):
+        self.columns = [column.strip().lower() for column in columns]
+        self.window = int(window)
+        if self.window < 1:
+            raise ValueError("window needs at least one day")
+        positions = {column: i for i, column in enumerate(FEATURE_COLUMNS)}
+        unknown = [column for column in self.columns if column not in positions]
+        if unknown:
+            raise ValueError(f"Unknown feature columns: {', '.join(unknown)}")
+
+        n_columns = len(self.columns)
+        self.mean = np.zeros(n_columns) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.scale = np.ones(n_columns) if scale is None else np.asarray(scale, dtype=np.float64)
+        if self.mean.shape != (n_columns,) or self.scale.shape != (n_columns,):
+            raise ValueError("mean and scale need one value per column")
+
+        self.positions = [positions[column] for column in self.columns]
+        self.weight = np.zeros((NUM_FEATURES, n_columns), dtype=np.float32)
+        self.weight[self.positions, np.arange(n_columns)] = 1 / self.scale
+        self.bias = (-self.mean / self.scale).astype(np.float32)
+        self.is_identity = bool(
+            self.columns == list(FEATURE_COLUMNS)
+            and not self.mean.any()
+            and (self.scale == 1).all()
+        )
+
+    @classmethod
+    def identity(cls):
+        """The feature store rows as they are, for models trained on raw values."""
+        return cls(FEATURE_COLUMNS)
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != PREPROCESSING_VERSION:
+            raise ValueError(
+                f"Unsupported preprocessing version {data.get('version')!r}, "
+                f"expected {PREPROCESSING_VERSION}"
+            )
+        return cls(
+            [column["name"] for column in data["columns"]],
+            data["mean"],
+            data["scale"],
+            data.get("window", 1),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def to_dict(self):
+        return {
+            "version": PREPROCESSING_VERSION,
+            "columns": [
+                {
+                    "name": column,
+                    "kind": "trigger" if column in TRIGGER_COLUMNS else "prodrome",
+                }
+                for column in self.columns
+            ],
+            "mean": self.mean.tolist(),
+            "scale": self.scale.tolist(),
+            "window": self.window,
+        }
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def padding_row(self):
+        """The feature store row mapped to zeros, i.e. to the padding of a window."""
+        row = np.zeros(NUM_FEATURES, dtype=np.float32)
+        row[self.positions] = self.mean
+        return row
+
+    def transform(self, X):
+        """Map (..., NUM_FEATURES) feature rows to (..., len(columns)) model inputs."""
+        if self.is_identity:
+            return X
+        return np.asarray(X, dtype=np.float32) @ self.weight + self.bias
+
+
+class PreprocessedModel:
+    """A model whose inputs go through a ``Preprocessor`` first."""
+
+    def __init__(self, model, preprocessor):
+        self.model = model
+        self.preprocessor = preprocessor
+
+    def predict(self, x, verbose=0):
+        return self.model.predict(self.preprocessor.transform(x), verbose=verbose)
+
+
+def load_preprocessor(path):
+    """Load an artifact; models without one were trained on raw feature rows."""
+    if path is None or not os.path.exists(path):
+        return Preprocessor.identity()
+    return Preprocessor.load(path)
@@ -0,0 +1,225 @@
+"""Per-request SQL query profiling.
+
+``QueryProfiler`` listens to ``before_cursor_execute``/``after_cursor_execute``
+on the engine and records every statement into the collectors active on the
+current thread: one per request, and any opened with ``collect()`` (e.g. by
+the ``query_counter`` test fixture). A collector keeps the statement count,
+the total database time and the slowest statements. Requests always get a
+collector, so the request metrics (``metrics.py``) have their statement
+count and database time whatever the settings below.
+
+With ``QUERY_PROFILING`` each response carries the figures of its request as
+a ``Server-Timing`` header (shown in the browser's network panel):
+
+    Server-Timing: db;dur=3.2;desc="5 queries", app;dur=11.8
+
+With ``QUERY_PROFILING_REPORT`` (off by default, it exposes SQL) the
+per-endpoint totals since startup and the slowest statements are served at
+``GET /api/_debug/profile``. Queries of streamed response bodies run after
+the response has been returned and are not counted.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, jsonify, request
+from sqlalchemy import event
+
+from .schema import db
+
+# Characters of a statement kept in the slowest statement lists
+STATEMENT_MAX_LENGTH = 500
+
+
+class QueryStats:
+    """Statements recorded by one collector."""
+
+    def __init__(self, keep_slowest=5, keep_statements=False):
+        self.count = 0
+        self.seconds = 0.0
+        self.keep_slowest = keep_slowest
+        # Every statement, in order, if kept
+        self.statements = [] if keep_statements else None
+        # Min-heap of (seconds, tiebreak, statement), the fastest first
+        self._slowest = []
+        self._tiebreak = itertools.count()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        if self.statements is not None:
+            self.statements.append(statement)
+        self._keep(seconds, statement[:STATEMENT_MAX_LENGTH])
+
+    def merge(self, other):
+        """Add the statements recorded by another collector."""
+        self.count += other.count
+        self.seconds += other.seconds
+        for seconds, _, statement in other._slowest:
+            self._keep(seconds, statement)
+
+    def _keep(self, seconds, statement):
+        if not self.keep_slowest:
+            return
+        item = (seconds, next(self._tiebreak), statement)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, item)
+        elif item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    @property
+    def slowest(self):
+        """The slowest statements as (milliseconds, statement), slowest first."""
+        return [
+            (round(seconds * 1000, 3), statement)
+            for seconds, _, statement in sorted(self._slowest, reverse=True)
+        ]
+
+
+class EndpointStats:
+    """Totals of the requests to one endpoint."""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_seconds = 0.0
+
+    def add(self, stats):
+        self.requests += 1
+        self.queries += stats.count
+        self.max_queries = max(self.max_queries, stats.count)
+        self.db_seconds += stats.seconds
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "queries": self.queries,
+            "queries_per_request": round(self.queries / self.requests, 2),
+            "max_queries": self.max_queries,
+            "db_ms": round(self.db_seconds * 1000, 3),
+            "db_ms_per_request": round(self.db_seconds * 1000 / self.requests, 3),
+        }
+
+
+class QueryProfiler:
+    """Counts and times the SQL statements of each request, used as a Flask extension."""
+
+    def __init__(self, app=None):
+        self.keep_slowest = 5
+        self.endpoints = {}
+        self._slowest = QueryStats()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.keep_slowest = app.config["QUERY_PROFILING_SLOWEST"]
+        self.reset()
+        app.extensions["query_profiler"] = self
+
+        # Always listening, so collect() also works with profiling off
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+        # Every request is counted, for the request metrics (see metrics.py);
+        # the header, the slowest statements and the totals need profiling on
+        app.before_request(self._start_request)
+        app.teardown_request(self._end_request)
+        if app.config["QUERY_PROFILING"]:
+            app.after_request(self._finish_request)
+        if app.config["QUERY_PROFILING_REPORT"]:
+            app.add_url_rule(
+                "/api/_debug/profile", "query_profile", self.report_view, methods=["GET"]
+            )
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+            self._slowest = QueryStats(self.keep_slowest)
+
+    @property
+    def _collectors(self):
+        if not hasattr(self._local, "collectors"):
+            self._local.collectors = []
+        return self._local.collectors
+
+    @contextmanager
+    def collect(self, keep_slowest=None, keep_statements=False):
+        """Record the statements this thread runs inside the block.
+
+        Yields:
+            QueryStats: Filled in as statements are executed.
+        """
+        stats = QueryStats(
+            self.keep_slowest if keep_slowest is None else keep_slowest, keep_statements
+        )
+        self._collectors.append(stats)
+        try:
+            yield stats
+        finally:
+            self._collectors.remove(stats)
+
+    def request_stats(self):
+        """The statements of the current request so far, None outside a request."""
+        request = getattr(self._local, "request", None)
+        return request[1] if request else None
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started_at"].pop()
+        for stats in self._collectors:
+            stats.record(statement, seconds)
+
+    def _start_request(self):
+        profiling = current_app.config["QUERY_PROFILING"]
+        stats = QueryStats(self.keep_slowest if profiling else 0)
+        self._local.request = (time.perf_counter(), stats)
+        self._collectors.append(stats)
+
+    def _finish_request(self, response):
+        started_at, stats = self._local.request
+        app_ms = (time.perf_counter() - started_at) * 1000
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.seconds * 1000:.2f};desc="{stats.count} queries", '
+            f"app;dur={app_ms:.2f}",
+        )
+
+        endpoint = request.endpoint or "<unmatched>"
+        with self._lock:
+            self.endpoints.setdefault(endpoint, EndpointStats()).add(stats)
+            self._slowest.merge(stats)
+        return response
+
+    def _end_request(self, exc):
+        # Also runs when a response could not be built
+        _, stats = getattr(self._local, "request", (None, None))
+        if stats is not None:
+            del self._local.request
+            self._collectors.remove(stats)
+
+    def report(self):
+        """Per-endpoint totals since startup and the slowest statements."""
+        with self._lock:
+            return {
+                "endpoints": {
+                    name: stats.to_dict() for name, stats in sorted(self.endpoints.items())
+                },
+                "slowest_statements": [
+                    {"ms": ms, "statement": statement}
+                    for ms, statement in self._slowest.slowest
+                ],
+            }
+
+    def report_view(self):
+        return jsonify(self.report())
@@ -32,6 +32,9 @@ class User(Base):
     # Because the app needs this information and it might not match gender
     has_menstruation = db.Column(db.Boolean, default=False, nullable=False)
 
+    # Bumped by every daily log write, keys the prediction cache
+    data_version = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
     # Relationship to UserLogs; delete logs when user is deleted
     logs = db.relationship(
         "UserLog", back_populates="user", cascade="all, delete-orphan"
@@ -305,8 +308,19 @@ class UserLog(Base):
     auras = db.relationship("UserAura", back_populates="log")
     triggers = db.relationship("UserTrigger", back_populates="log")
     seizures = db.relationship("SeizureEpisode", back_populates="log")
+    summary = db.relationship(
+        "DailyLogSummary",
+        back_populates="log",
+        uselist=False,
+        cascade="all, delete-orphan",
+    )
     note = db.Column(db.String, nullable=True)
 
+    __table_args__ = (
+        # Logs are always read per user and time range
+        db.Index("ix_user_logs_user_id_log_time", "user_id", "log_time"),
+    )
+
     @hybrid_property
     def total_episodes(self):
         """Calculate the total number of episodes."""
@@ -328,3 +342,18 @@ class UserLog(Base):
     @has_seizures.expression
     def has_seizures(cls):
         return cls.total_episodes > 0
+
+
+class DailyLogSummary(Base):
+    """Pre-aggregated dashboard entry of a UserLog, maintained by app/summary.py"""
+
+    __tablename__ = "daily_log_summary"
+
+    # Read by joining the log, filtered on its (user_id, log_time) index
+    log_id = db.Column(
+        db.Integer, db.ForeignKey("user_logs.id", ondelete="CASCADE"), primary_key=True
+    )
+    entry = db.Column(db.JSON, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    log = db.relationship("UserLog", back_populates="summary")
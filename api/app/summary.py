@@ -0,0 +1,232 @@
+"""Pre-aggregated dashboard entries, one ``DailyLogSummary`` row per log.
+
+The weekly, monthly and yearly views show trigger descriptions, significant
+prodromes, present auras and seizure details of each log. Building those from
+the raw item rows on every request costs time proportional to the number of
+items, so the entries are computed once and stored:
+
+- the datalog handlers call ``refresh_log_summaries`` with the logs they
+  changed, before committing;
+- views summarize logs that have no row yet (e.g. written before the table
+  existed) the first time they read them;
+- ``flask summaries rebuild`` recomputes every row, e.g. after a reference
+  table is renamed.
+"""
+
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy.orm import subqueryload
+
+from .lookup_cache import lookup_cache
+from .schema import DailyLogSummary, UserLog, db
+
+summaries_cli = AppGroup("summaries", help="Manage the dashboard log summaries.")
+
+
+# Numeric thresholds; triggers saved with only a boolean value never reach them
+def _at_most(value, threshold):
+    return value is not None and value <= threshold
+
+
+def _at_least(value, threshold):
+    return value is not None and value >= threshold
+
+
+# Helper function to process triggers
+def process_triggers(triggers):
+    trigger_descriptions = []
+    for user_trigger in triggers:
+        # Resolve the trigger name from the cached reference table
+        name = lookup_cache.name("triggers", user_trigger.trigger_id)
+        if name == "Sleep Quality" and _at_most(user_trigger.value_numeric, 5):
+            trigger_descriptions.append("Poor Sleep")
+        elif name == "Stress Level" and _at_least(user_trigger.value_numeric, 6):
+            trigger_descriptions.append("Stress")
+        elif name == "Sleep Duration" and _at_most(user_trigger.value_numeric, 6):
+            trigger_descriptions.append("Lack of Sleep")
+        elif name == "Caffeine" and user_trigger.value_boolean:
+            trigger_descriptions.append("Caffeine")
+        elif name == "Alcohol" and user_trigger.value_boolean:
+            trigger_descriptions.append("Alcohol")
+        elif name == "Smoking" and user_trigger.value_boolean:
+            trigger_descriptions.append("Smoking")
+        elif name == "Drugs" and user_trigger.value_boolean:
+            trigger_descriptions.append("Drugs")
+        elif name == "Menstruation" and user_trigger.value_boolean:
+            trigger_descriptions.append("Menstruation")
+        elif name == "Skipped Meal" and user_trigger.value_boolean:
+            trigger_descriptions.append("Skipped Meal")
+        elif name == "Fever" and user_trigger.value_boolean:
+            trigger_descriptions.append("Fever")
+        elif name == "Physical Exertion" and _at_least(user_trigger.value_numeric, 5):
+            trigger_descriptions.append("Physical Exertion")
+        elif name == "Flashing Lights" and user_trigger.value_boolean:
+            trigger_descriptions.append("Flashing Lights")
+        elif name == "Skipped Medication" and user_trigger.value_boolean:
+            trigger_descriptions.append("Skipped Medication")
+        elif name == "Change in Medication" and user_trigger.value_boolean:
+            trigger_descriptions.append("Change in Medication")
+    return trigger_descriptions
+
+
+# Helper function to format postictal symptoms
+def format_postictal_symptoms(seizure):
+    symptoms = []
+    # Check if postictal_confusion_duration is not None and greater than 2
+    if (
+        seizure.postictal_confusion_duration
+        and seizure.postictal_confusion_duration > 2
+    ):
+        intensity = (
+            seizure.postictal_confusion_intensity
+            if seizure.postictal_confusion_intensity
+            else 0
+        )
+        symptoms.append(
+            f"{intensity}/10 confusion for {seizure.postictal_confusion_duration} minutes"
+        )
+
+    # Check if postictal_headache_duration is not None and greater than 2
+    if seizure.postictal_headache_duration and seizure.postictal_headache_duration > 2:
+        intensity = (
+            seizure.postictal_headache_intensity
+            if seizure.postictal_headache_intensity
+            else 0
+        )
+        symptoms.append(
+            f"{intensity}/10 headache for {seizure.postictal_headache_duration} minutes"
+        )
+
+    # Check if postictal_fatigue_duration is not None and greater than 2
+    if seizure.postictal_fatigue_duration and seizure.postictal_fatigue_duration > 2:
+        intensity = (
+            seizure.postictal_fatigue_intensity
+            if seizure.postictal_fatigue_intensity
+            else 0
+        )
+        symptoms.append(
+            f"{intensity}/10 fatigue for {seizure.postictal_fatigue_duration} minutes"
+        )
+
+    # Join all symptoms into a single string, or note absence of significant symptoms
+    return ", ".join(symptoms) if symptoms else "No significant postictal symptoms"
+
+
+def build_summary_entry(log):
+    """Return the dashboard entry of a log with its items loaded."""
+    return {
+        "date": log.log_time.strftime("%Y-%m-%d"),
+        "triggers": process_triggers(log.triggers),
+        "prodromes": [
+            lookup_cache.name("prodromes", prod.prodrome_id)
+            for prod in log.prodromes
+            if prod.intensity > 2
+        ],
+        "auras": [
+            lookup_cache.name("auras", aura.aura_id)
+            for aura in log.auras
+            if aura.is_present
+        ],
+        "notes": log.note if log.note else "",
+        "seizure": [
+            {
+                "type": lookup_cache.name("seizure_types", seizure.seizure_type_id),
+                "duration": seizure.duration_sec,
+                "frequency": seizure.frequency,
+                "emergencyIntervention": seizure.requires_emergency_intervention,
+                "postictalSymptoms": format_postictal_symptoms(seizure),
+                "note": seizure.note,
+            }
+            for seizure in log.seizures
+        ],
+    }
+
+
+def refresh_log_summaries(log_ids):
+    """Recompute the summaries of the given logs in the current transaction.
+
+    Pending changes are flushed first and the logs' items are reloaded, so the
+    summaries reflect what is about to be committed. The caller commits.
+
+    Returns:
+        dict: The new entries by log id.
+    """
+    log_ids = set(log_ids)
+    if not log_ids:
+        return {}
+
+    # populate_existing replaces collections loaded earlier in the session
+    logs = db.session.scalars(
+        db.select(UserLog)
+        .filter(UserLog.id.in_(log_ids))
+        .options(
+            subqueryload(UserLog.triggers),
+            subqueryload(UserLog.prodromes),
+            subqueryload(UserLog.auras),
+            subqueryload(UserLog.seizures),
+            subqueryload(UserLog.summary),
+        )
+        .execution_options(populate_existing=True)
+    ).all()
+
+    now = datetime.utcnow()
+    entries = {}
+    for log in logs:
+        entry = build_summary_entry(log)
+        if log.summary is None:
+            log.summary = DailyLogSummary()
+        log.summary.entry = entry
+        log.summary.updated_at = now
+        entries[log.id] = entry
+    return entries
+
+
+def get_log_summaries(user_id, since):
+    """Return the dashboard entries of a user's logs since a time, newest first.
+
+    The logs are selected on their (user_id, log_time) index and each joined
+    to its summary by primary key. Logs without a summary row are summarized
+    and stored on the way.
+    """
+    rows = db.session.execute(
+        db.select(UserLog.id, DailyLogSummary.entry)
+        .outerjoin(DailyLogSummary, DailyLogSummary.log_id == UserLog.id)
+        .filter(UserLog.user_id == user_id, UserLog.log_time >= since)
+        .order_by(UserLog.log_time.desc())
+    ).all()
+
+    missing = [log_id for log_id, entry in rows if entry is None]
+    if missing:
+        entries = refresh_log_summaries(missing)
+        db.session.commit()
+        rows = [(log_id, entry or entries[log_id]) for log_id, entry in rows]
+
+    return [entry for _, entry in rows]
+
+
+def rebuild_summaries(user_id=None, batch_size=500):
+    """Recompute the summaries of all logs (or of one user), in batches.
+
+    Returns:
+        int: The number of logs summarized.
+    """
+    query = db.select(UserLog.id).order_by(UserLog.id)
+    if user_id is not None:
+        query = query.filter(UserLog.user_id == user_id)
+    log_ids = db.session.scalars(query).all()
+
+    for start in range(0, len(log_ids), batch_size):
+        refresh_log_summaries(log_ids[start:start + batch_size])
+        db.session.commit()
+    return len(log_ids)
+
+
+@summaries_cli.command("rebuild")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this user.")
+@click.option("--batch-size", type=int, default=500, show_default=True)
+def rebuild_command(user_id, batch_size):
+    """Recompute the dashboard summaries from the raw log items."""
+    count = rebuild_summaries(user_id=user_id, batch_size=batch_size)
+    click.echo(f"Rebuilt {count} log summaries")
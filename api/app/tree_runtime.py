@@ -0,0 +1,206 @@
+"""Score XGBoost models with NumPy instead of the xgboost runtime.
+
+``FlatForest`` holds every tree of a booster in contiguous arrays (one entry
+per node: split feature, threshold, left/right child, default direction for
+missing values and leaf value) and evaluates a batch of rows by advancing all
+(row, tree) pairs one level at a time, so a prediction is ``max_depth``
+vectorized gathers instead of a per-row, per-tree walk.
+
+Only what the models of this project use is supported: ``gbtree`` boosters
+with numerical splits and a ``binary:logistic`` (or raw margin) objective.
+"""
+
+import json
+
+import numpy as np
+
+ARRAY_NAMES = (
+    "feature",
+    "threshold",
+    "left",
+    "right",
+    "default_left",
+    "value",
+    "roots",
+)
+# Rows scored at once, see FlatForest.predict_margin
+ROW_CHUNK = 512
+
+
+class FlatForest:
+    """The trees of a booster, flattened into node arrays."""
+
+    def __init__(self, arrays, base_margin, objective, feature_names=None):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.default_left = arrays["default_left"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.base_margin = float(base_margin)
+        self.objective = objective
+        self.feature_names = feature_names
+        self.is_leaf = self.left < 0
+        # Leaves point to themselves so finished rows stay put
+        node_ids = np.arange(len(self.left), dtype=np.int32)
+        self.left = np.where(self.is_leaf, node_ids, self.left)
+        self.right = np.where(self.is_leaf, node_ids, self.right)
+        # (left, right) pairs, indexed by 2 * node + went_right
+        self.children = np.stack([self.left, self.right], axis=1).ravel()
+        self.max_depth = _max_depth(self.left, self.right, self.is_leaf, self.roots)
+
+    @classmethod
+    def from_model_json(cls, model):
+        """Flatten a model saved with ``Booster.save_model`` (as a parsed dict)."""
+        learner = model["learner"]
+        booster = learner["gradient_booster"]
+        if booster["name"] != "gbtree":
+            raise ValueError(f"Unsupported booster {booster['name']!r}")
+
+        trees = booster["model"]["trees"]
+        parts = {name: [] for name in ARRAY_NAMES}
+        offset = 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError("Categorical splits are not supported")
+            left = np.asarray(tree["left_children"], dtype=np.int32)
+            right = np.asarray(tree["right_children"], dtype=np.int32)
+            leaf = left < 0
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+
+            parts["feature"].append(np.asarray(tree["split_indices"], dtype=np.int32))
+            # For leaves, split_conditions holds the leaf value
+            parts["threshold"].append(np.where(leaf, np.inf, conditions))
+            parts["value"].append(np.where(leaf, conditions, 0))
+            parts["left"].append(np.where(leaf, -1, left + offset))
+            parts["right"].append(np.where(leaf, -1, right + offset))
+            parts["default_left"].append(np.asarray(tree["default_left"], dtype=bool))
+            parts["roots"].append(offset)
+            offset += len(left)
+
+        arrays = {
+            "feature": np.concatenate(parts["feature"]).astype(np.int32),
+            "threshold": np.concatenate(parts["threshold"]).astype(np.float32),
+            "left": np.concatenate(parts["left"]).astype(np.int32),
+            "right": np.concatenate(parts["right"]).astype(np.int32),
+            "default_left": np.concatenate(parts["default_left"]),
+            "value": np.concatenate(parts["value"]).astype(np.float32),
+            "roots": np.asarray(parts["roots"], dtype=np.int32),
+        }
+        objective = learner["objective"]["name"]
+        base_score = float(learner["learner_model_param"]["base_score"])
+        return cls(
+            arrays,
+            _base_margin(objective, base_score),
+            objective,
+            learner.get("feature_names") or None,
+        )
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Flatten an in-memory ``xgboost.Booster``."""
+        return cls.from_model_json(json.loads(booster.save_raw("json")))
+
+    @classmethod
+    def load(cls, path):
+        """Load a forest from a ``.npz`` file, or flatten an XGBoost ``.json`` model."""
+        if path.endswith(".json"):
+            with open(path) as f:
+                return cls.from_model_json(json.load(f))
+
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in ARRAY_NAMES}
+            # Stored as (base_margin, objective, feature names...)
+            meta = [str(item) for item in data["meta"]]
+        return cls(arrays, float(meta[0]), meta[1], meta[2:] or None)
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=np.where(self.is_leaf, -1, self.left),
+            right=np.where(self.is_leaf, -1, self.right),
+            default_left=self.default_left,
+            value=self.value,
+            roots=self.roots,
+            meta=np.array(
+                [repr(self.base_margin), self.objective, *(self.feature_names or [])]
+            ),
+        )
+
+    @property
+    def nbytes(self):
+        return sum(
+            array.nbytes
+            for array in (
+                self.feature,
+                self.threshold,
+                self.left,
+                self.right,
+                self.default_left,
+                self.value,
+                self.roots,
+                self.is_leaf,
+                self.children,
+            )
+        )
+
+    def predict_margin(self, X):
+        """Return the raw margin of each row of a (n_rows, n_features) matrix."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        # Rows are scored in chunks so the (rows, trees) work arrays stay in cache
+        return np.concatenate(
+            [
+                self._predict_chunk(X[start:start + ROW_CHUNK])
+                for start in range(0, len(X), ROW_CHUNK)
+            ]
+            or [np.zeros(0, dtype=np.float32)]
+        )
+
+    def _predict_chunk(self, X):
+        n_rows, n_features = X.shape
+        values_flat = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int32) * n_features)[:, None]
+        has_missing = np.isnan(values_flat).any()
+
+        # One current node per (row, tree)
+        nodes = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        for _ in range(self.max_depth):
+            values = values_flat[row_offsets + self.feature[nodes]]
+            go_left = values < self.threshold[nodes]
+            if has_missing:
+                go_left |= np.isnan(values) & self.default_left[nodes]
+            nodes = self.children[2 * nodes + ~go_left]
+        return self.value[nodes].sum(axis=1, dtype=np.float32) + self.base_margin
+
+    def predict(self, X):
+        """Return the model output, i.e. probabilities for ``binary:logistic``."""
+        margin = self.predict_margin(X)
+        if self.objective == "binary:logistic":
+            return 1.0 / (1.0 + np.exp(-margin))
+        return margin
+
+    def predict_proba(self, X):
+        """Return (n_rows, 2) class probabilities, like ``XGBClassifier``."""
+        positive = self.predict(X)
+        return np.column_stack([1.0 - positive, positive])
+
+
+def _base_margin(objective, base_score):
+    # base_score is stored in probability space for logistic objectives
+    if objective == "binary:logistic":
+        return float(np.log(base_score / (1.0 - base_score)))
+    return base_score
+
+
+def _max_depth(left, right, is_leaf, roots):
+    """Return the number of levels needed for every root to reach a leaf."""
+    nodes = roots
+    depth = 0
+    while not is_leaf[nodes].all():
+        inner = nodes[~is_leaf[nodes]]
+        nodes = np.concatenate([left[inner], right[inner]])
+        depth += 1
+    return depth
@@ -4,31 +4,63 @@ such as updating the user profile, changing the password.
 
 from datetime import date, datetime
 
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import (
-    get_jwt_identity,
-    jwt_required,
-)
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import get_current_user as get_jwt_user
+from flask_jwt_extended import get_jwt_identity, jwt_required
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import raiseload
+from sqlalchemy.orm import make_transient_to_detached
 
-from . import db
+from . import db, jwt
 from .schema import User
 
 user_bp = Blueprint("user", __name__, url_prefix="/api/user")
 
 
-def get_current_user():
-    """Get the current user Object from the database."""
-    current_user_email = get_jwt_identity()
+@jwt.user_lookup_loader
+def load_user(jwt_header, jwt_data):
+    """Resolve the user of a JWT, once per request.
+
+    flask_jwt_extended memoizes the result for the rest of the request. Across
+    requests, the user's columns are kept in a short-TTL cache keyed by the
+    identity, so a cached user is attached to the session without a query.
+    """
+    identity = jwt_data[current_app.config["JWT_IDENTITY_CLAIM"]]
+    user_cache = current_app.extensions["user_cache"]
+
+    columns = user_cache.get(identity)
+    if columns is not None:
+        user = User(**columns)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
 
     # Load the user object
     user = db.session.execute(
-        db.select(User).filter_by(email=current_user_email)
+        db.select(User).filter_by(email=identity)
     ).scalar_one_or_none()
+    if user:
+        user_cache.set(
+            identity,
+            {column.key: getattr(user, column.key) for column in User.__table__.columns},
+        )
     return user
 
 
+@jwt.user_lookup_error_loader
+def user_not_found(jwt_header, jwt_data):
+    """The JWT is valid but its user no longer exists."""
+    return jsonify({"message": "User not found"}), 404
+
+
+def get_current_user():
+    """Get the current user Object, resolved once per request."""
+    return get_jwt_user()
+
+
+def invalidate_cached_user(identity):
+    """Drop a user from the cache after changing or deleting it."""
+    current_app.extensions["user_cache"].invalidate(identity)
+
+
 @user_bp.route("/profile", methods=["GET"])
 @jwt_required()
 def get_user_profile():
@@ -72,6 +104,9 @@ def update_user_profile():
                 return {"message": "You must be at least 18 years old."}, 400
 
         db.session.commit()
+        # Cached under the token's identity, the old email if it was changed
+        invalidate_cached_user(get_jwt_identity())
+        invalidate_cached_user(user.email)
 
     except SQLAlchemyError:
         db.session.rollback()
@@ -103,6 +138,7 @@ def change_password():
 
         user.set_password(new_password)
         db.session.commit()
+        invalidate_cached_user(user.email)
 
         return {"message": "Password changed successfully."}, 200
     except Exception as e:
@@ -123,6 +159,7 @@ def delete_account():
     try:
         db.session.delete(user)
         db.session.commit()
+        invalidate_cached_user(user.email)
         return {"message": "Account deleted successfully."}, 200
 
     except SQLAlchemyError:
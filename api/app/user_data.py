@@ -1,358 +1,469 @@
-# user_data.py
-# Import Statements
-import random
-from datetime import datetime, timedelta
-import numpy as np
+"""Seed the database with realistic fake data, e.g. for load tests.
+
+``flask seed database --users 1000 --days 365 --seed 0`` adds the reference
+tables (prodromes, auras, triggers, seizure types) if they are missing, then
+users with one log per day and the items of each log. Item values follow the
+training data of the models (``api/models/base_data.py``). Every column of a
+table is drawn for a whole batch of users at once with NumPy, and each table is
+inserted with one ``executemany`` per batch, all in a single transaction (on
+SQLite with synchronous writes turned off). The same seed and parameters
+yield the same data.
+
+Dashboard summaries are computed on first read, or ahead of time with
+``flask summaries rebuild``.
+"""
 
+import time
+from datetime import date
+
+import click
+import numpy as np
 from faker import Faker
+from flask.cli import AppGroup
 from werkzeug.security import generate_password_hash
-from __init__ import db
+
 from .schema import (
-    User,
+    Aura,
     Medication,
-    UserLog,
     Prodrome,
-    UserProdrome,
-    Aura,
-    UserAura,
+    SeizureEpisode,
+    SeizureType,
     Trigger,
+    User,
+    UserAura,
+    UserLog,
+    UserProdrome,
     UserTrigger,
-    SeizureType,
-    SeizureEpisode,
+    db,
 )
 
-fake = Faker()
-
-
-# Function to generate fake users
-def generate_fake_users(n):
-    for _ in range(n):
-        # Generate a random birthdate between 18 and 100 years ago
-        birthdate = fake.date_between(start_date="-100y", end_date="-18y")
-        # Assume 50% of the users may want to track menstruation
-        menstruation = random.choice([True, False])
-        user = User(
-            email=fake.email(),
-            password_hash=generate_password_hash("password"),
-            birthdate=birthdate,
-            has_menstruation=menstruation,
-        )
-        db.session.add(user)
-    db.session.commit()
-
-
-# Function to generate fake medications
-def generate_fake_medications(n):
-    users = User.query.all()
-    for user in users:
-        for _ in range(n):
-            medication = Medication(
-                user_id=user.id,
-                name=fake.word(),
-                dosage_mg=random.randint(1, 500),
-                frequency=random.uniform(0.5, 3),
-                start_date=fake.date_between(start_date="-1y", end_date="today"),
-                end_date=(
-                    fake.date_between(start_date="today", end_date="+1y")
-                    if random.choice([True, False])
-                    else None
-                ),
-                reason_for_stop=fake.text(max_nb_chars=200),
-            )
-            db.session.add(medication)
-    db.session.commit()
-
-
-# Function to generate fake user logs
-def generate_fake_logs(n):
-    users = User.query.all()
-    for user in users:
-        for _ in range(n):
-            log = UserLog(
-                user_id=user.id,
-                log_time=fake.date_time_between(start_date="-1y", end_date="now"),
-            )
-            db.session.add(log)
-    db.session.commit()
-
-
-# Function to add prodromes
-def add_prodromes():
-    prodrome_data = {
-        "Headache": "A painful sensation in any part of the head, ranging from sharp to dull, that may occur with other symptoms.",
-        "Numbness or tingling": "A loss of sensation or feeling in a part of your body, often felt in extremities.",
-        "Tremor": "An involuntary, rhythmic muscle contraction leading to shaking movements in one or more parts of the body.",
-        "Dizziness": "A sensation of spinning around and losing one’s balance.",
-        "Nausea": "A feeling of sickness with an inclination to vomit.",
-        "Anxiety": "A feeling of worry, nervousness, or unease about something with an uncertain outcome.",
-        "Mood Changes": "Variations in a person’s mood or emotional state.",
-        "Insomnia": "Difficulty falling asleep or staying asleep as long as desired.",
-        "Difficulty Focusing": "A hard time maintaining attention or concentrating on tasks.",
-        "Gastrointestinal Disturbances": "Problems with the gastrointestinal tract, including stomach pain, constipation, or diarrhea.",
-    }
-    for name, description in prodrome_data.items():
-        prodrome = Prodrome(name=name, description=description)
-        db.session.add(prodrome)
-    db.session.commit()
-
-
-# Function to generate fake user prodromes
-def add_user_prodromes():
-    users = User.query.all()
-    prodromes = Prodrome.query.all()
-    for user in users:
-        for _ in range(100):
-            log_date = datetime.today() - timedelta(days=100)
-            log = UserLog(user_id=user.id, log_time=log_date)
-            db.session.add(log)
-            db.session.flush()  # To get the log_id for the UserProdrome
-            for prodrome in prodromes:
-                intensity = generate_prodrome_intensity(prodrome.name)
-                if intensity > 0:
-                    user_prodrome = UserProdrome(
-                        log_id=log.id, prodrome_id=prodrome.id, intensity=intensity
-                    )
-                    db.session.add(user_prodrome)
-        db.session.commit()
+seed_cli = AppGroup("seed", help="Fill the database with fake data.")
 
+PRODROMES = {
+    "Headache": "A painful sensation in any part of the head, ranging from sharp to dull, that may occur with other symptoms.",
+    "Numbness or tingling": "A loss of sensation or feeling in a part of your body, often felt in extremities.",
+    "Tremor": "An involuntary, rhythmic muscle contraction leading to shaking movements in one or more parts of the body.",
+    "Dizziness": "A sensation of spinning around and losing one’s balance.",
+    "Nausea": "A feeling of sickness with an inclination to vomit.",
+    "Anxiety": "A feeling of worry, nervousness, or unease about something with an uncertain outcome.",
+    "Mood Changes": "Variations in a person’s mood or emotional state.",
+    "Insomnia": "Difficulty falling asleep or staying asleep as long as desired.",
+    "Difficulty Focusing": "A hard time maintaining attention or concentrating on tasks.",
+    "Gastrointestinal Disturbances": (
+        "Problems with the gastrointestinal tract, including stomach pain, "
+        "constipation, or diarrhea."
+    ),
+}
 
-# Function to generate prodrome intensity
-def generate_prodrome_intensity(name):
-    if name in [
-        "Headache",
-        "Anxiety",
-        "Mood changes",
-        "Insomnia",
-        "Difficulty focusing",
-    ]:
-        return np.random.choice(
-            [i for i in range(6, 11)] + [i for i in range(6)], p=[0.14] * 5 + [0.05] * 6
-        )
-    elif name in ["gastrointestinal disturbances", "tremor"]:
-        return np.random.choice(range(11), p=[0.85] + [0.015] * 10)
-    elif name == "dizziness" or name == "nausea":
-        return np.random.choice(range(11), p=[0.75] + [0.025] * 10)
-    else:  # 'numbness or tingling'
-        return np.random.choice(range(11), p=[0.7] + [0.03] * 10)
+AURAS = {
+    "Visual Disturbances": (
+        "Vision difficulties, colored or flashing lights, or hallucinations "
+        "(seeing something that isn’t actually there)."
+    ),
+    "Hearing Sounds": "Ear ringing or buzzing, or sound hallucinations.",
+    "Unusual Smell or Taste": "Perceiving strange smells or tastes without an apparent source.",
+    "A ‘rising’ Feeling in the Stomach": (
+        "A sensation similar to the feeling of butterflies in the stomach that "
+        "seems to rise upwards."
+    ),
+    "Feeling of Déjà Vu or Jamais Vu": (
+        "Sensing that something has been experienced before (Déjà Vu) or "
+        "feeling as if everything is unfamiliar (Jamais Vu)."
+    ),
+}
+
+TRIGGERS = {
+    "Sleep quality": "Quality of sleep experienced by the user.",
+    "Sleep duration": "Duration of sleep experienced by the user.",
+    "Stress level": "Level of stress experienced by the user.",
+    "Alcohol consumption today": "Amount of alcohol consumed by the user on the current day.",
+    "Caffeine consumption today": "Amount of caffeine consumed by the user on the current day.",
+    "Drugs consumption today": "Consumption of drugs by the user on the current day.",
+    "Smoking": "Smoking activity of the user.",
+    "Missing a meal": "Occurrence of missing a meal by the user.",
+    "Fevers": "Occurrence of fevers experienced by the user.",
+    "Steps": "Number of steps taken by the user.",
+    "High intensity minutes": "Duration of high-intensity physical activity experienced by the user.",
+    "Flashing light": "Exposure to flashing lights experienced by the user.",
+    "Monthly periods": "Menstrual periods experienced by the user.",
+    "Adherence to prescribed medication regimen": "Adherence to the prescribed medication regimen by the user.",
+    "Changes in medication dosage or type": "Changes in medication dosage or type experienced by the user.",
+}
+
+SEIZURE_TYPES = {
+    "Generalized Tonic-Clonic": None,
+    "Absence": None,
+    "Myoclonic": None,
+    "Atonic": None,
+    "Focal": None,
+}
+
+
+AURA_PROBABILITY = 0.1
+SEIZURE_PROBABILITY = 0.05
+MEDICATION_NAMES = (
+    "Levetiracetam",
+    "Lamotrigine",
+    "Valproate",
+    "Carbamazepine",
+    "Oxcarbazepine",
+    "Topiramate",
+    "Lacosamide",
+    "Zonisamide",
+)
+# Distinct first/last names drawn from Faker once per run
+NAME_POOL_SIZE = 200
+
+
+def add_reference_rows(model, data):
+    """Add the entries of ``{name: description}`` that are not in the table yet."""
+    existing = set(db.session.scalars(db.select(model.name)))
+    rows = [
+        {"name": name, "description": description}
+        for name, description in data.items()
+        if name not in existing
+    ]
+    if rows:
+        db.session.execute(db.insert(model.__table__), rows)
+    return len(rows)
+
+
+def add_prodromes():
+    return add_reference_rows(Prodrome, PRODROMES)
 
 
-# Function to add auras
 def add_auras():
-    aura_data = {
-        "Visual Disturbances": "Vision difficulties, colored or flashing lights, or hallucinations (seeing something that isn’t actually there).",
-        "Hearing Sounds": "Ear ringing or buzzing, or sound hallucinations.",
-        "Unusual Smell or Taste": "Perceiving strange smells or tastes without an apparent source.",
-        "A ‘rising’ Feeling in the Stomach": "A sensation similar to the feeling of butterflies in the stomach that seems to rise upwards.",
-        "Feeling of Déjà Vu or Jamais Vu": "Sensing that something has been experienced before (Déjà Vu) or feeling as if everything is unfamiliar (Jamais Vu).",
-    }
-    for name, description in aura_data.items():
-        aura = Aura(name=name, description=description)
-        db.session.add(aura)
-    db.session.commit()
-
-
-# Function to generate fake user auras
-def add_user_auras():
-    users = User.query.all()
-    auras = Aura.query.all()
-    for user in users:
-        for _ in range(100):
-            log_date = datetime.today() - timedelta(days=100)
-            log = UserLog(user_id=user.id, log_time=log_date)
-            db.session.add(log)
-            db.session.flush()  # To get the log_id for the UserAura
-            for aura in auras:
-                if random.random() < 0.1:  # 10% chance of experiencing aura
-                    user_aura = UserAura(log_id=log.id, aura_id=aura.id)
-                    db.session.add(user_aura)
-        db.session.commit()
+    return add_reference_rows(Aura, AURAS)
 
 
-# Function to add triggers
 def add_triggers():
-    trigger_data = {
-        "Sleep quality": "Quality of sleep experienced by the user.",
-        "Sleep duration": "Duration of sleep experienced by the user.",
-        "Stress level": "Level of stress experienced by the user.",
-        "Alcohol consumption today": "Amount of alcohol consumed by the user on the current day.",
-        "Caffeine consumption today": "Amount of caffeine consumed by the user on the current day.",
-        "Drugs consumption today": "Consumption of drugs by the user on the current day.",
-        "Smoking": "Smoking activity of the user.",
-        "Missing a meal": "Occurrence of missing a meal by the user.",
-        "Fevers": "Occurrence of fevers experienced by the user.",
-        "Steps": "Number of steps taken by the user.",
-        "High intensity minutes": "Duration of high-intensity physical activity experienced by the user.",
-        "Flashing light": "Exposure to flashing lights experienced by the user.",
-        "Monthly periods": "Menstrual periods experienced by the user.",
-        "Adherence to prescribed medication regimen": "Adherence to the prescribed medication regimen by the user.",
-        "Changes in medication dosage or type": "Changes in medication dosage or type experienced by the user.",
-    }
-    for name, description in trigger_data.items():
-        trigger = Trigger(name=name, description=description)
-        db.session.add(trigger)
-    db.session.commit()
-
-
-# Function to generate fake user triggers
-def add_user_triggers():
-    users = User.query.all()
-    triggers = Trigger.query.all()
-    for user in users:
-        for _ in range(100):
-            log_date = datetime.today() - timedelta(days=100)
-            log = UserLog(user_id=user.id, log_time=log_date)
-            db.session.add(log)
-            db.session.flush()  # To get the log_id for the UserTrigger
-            for trigger in triggers:
-                if trigger.name in [
-                    "Drugs consumption today",
-                    "Fevers",
-                    "Missing a meal",
-                    "Flashing light",
-                    "Adherence to prescribed medication regimen",
-                    "Changes in medication dosage or type",
-                ]:
-                    value_boolean = np.random.choice([True, False], p=[0.05, 0.95])
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_boolean=value_boolean,
-                    )
-                elif trigger.name == "Sleep quality":
-                    value_numeric = np.random.choice(
-                        [i for i in range(6, 11)] + [i for i in range(5)],
-                        p=[0.15] * 5 + [0.05] * 5,
-                    )
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                elif trigger.name == "Sleep duration":
-                    value_numeric = np.random.normal(7, 1.5).clip(0, 12)
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                elif trigger.name == "Stress level":
-                    value_numeric = np.random.choice(
-                        [i for i in range(4, 11)] + [i for i in range(4)],
-                        p=[0.12] * 7 + [0.04] * 4,
-                    )
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                elif trigger.name == "Alcohol consumption today":
-                    value_numeric = np.random.choice(
-                        [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
-                        p=[
-                            0.4,
-                            0.15,
-                            0.1,
-                            0.1,
-                            0.05,
-                            0.05,
-                            0.05,
-                            0.025,
-                            0.025,
-                            0.025,
-                            0.025,
-                        ],
-                    )
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                elif trigger.name == "Caffeine consumption today":
-                    value_numeric = np.random.choice(
-                        range(5), p=[0.2, 0.3, 0.25, 0.15, 0.1]
-                    )
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                elif trigger.name == "Smoking":
-                    value_numeric = np.random.choice(range(21), p=[0.4] + [0.03] * 20)
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                elif trigger.name == "Steps":
-                    value_numeric = np.random.normal(5000, 2500).clip(0)
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                elif trigger.name == "High intensity minutes":
-                    value_numeric = np.random.normal(30, 15).clip(0, 150)
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                elif trigger.name == "Monthly periods":
-                    value_numeric = np.random.randint(1, 29)
-                    user_trigger = UserTrigger(
-                        log_id=log.id,
-                        trigger_id=trigger.id,
-                        value_numeric=value_numeric,
-                    )
-                db.session.add(user_trigger)
-    db.session.commit()
-
-
-# Function to add seizure types
+    return add_reference_rows(Trigger, TRIGGERS)
+
+
 def add_seizure_types():
-    seizure_types = [
-        "Generalized Tonic-Clonic",
-        "Absence",
-        "Myoclonic",
-        "Atonic",
-        "Focal",
-    ]
-    for seizure_type in seizure_types:
-        type_obj = SeizureType(name=seizure_type)
-        db.session.add(type_obj)
-    db.session.commit()
-
-
-# Function to generate fake seizure episodes
-def add_seizure_episodes():
-    users = User.query.all()
-    seizure_types = SeizureType.query.all()
-    for user in users:
-        for _ in range(10):
-            seizure_date = fake.date_time_between(start_date="-1y", end_date="now")
-            seizure_type = random.choice(seizure_types)
-            seizure_duration = random.randint(10, 300)  # Duration in seconds
-            seizure_notes = fake.text(max_nb_chars=200)
-            requires_emergency_intervention = fake.boolean(chance_of_getting_true=10)
-            postictal_confusion_duration = random.uniform(0, 60)
-            postictal_confusion_intensity = random.randint(0, 10)
-            postictal_headache_duration = random.uniform(0, 60)
-            postictal_headache_intensity = random.randint(0, 10)
-            postictal_fatigue_duration = random.uniform(0, 60)
-            postictal_fatigue_intensity = random.randint(0, 10)
-            episode = SeizureEpisode(
-                log_id=user.log.id,
-                seizure_type_id=seizure_type.id,
-                duration_sec=seizure_duration,
-                frequency=1,  # Default frequency
-                requires_emergency_intervention=requires_emergency_intervention,
-                postictal_confusion_duration=postictal_confusion_duration,
-                postictal_confusion_intensity=postictal_confusion_intensity,
-                postictal_headache_duration=postictal_headache_duration,
-                postictal_headache_intensity=postictal_headache_intensity,
-                postictal_fatigue_duration=postictal_fatigue_duration,
-                postictal_fatigue_intensity=postictal_fatigue_intensity,
-                note=seizure_notes,
-            )
-            db.session.add(episode)
-    db.session.commit()
+    return add_reference_rows(SeizureType, SEIZURE_TYPES)
+
+
+def _records(columns):
+    """Turn {column: array} into the list of row dicts executemany takes."""
+    names = list(columns)
+    values = [np.asarray(column).tolist() for column in columns.values()]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _insert(model, columns, returning=False):
+    """Insert the rows of {column: array} with one executemany.
+
+    With ``returning``, the ids of the new rows are returned in order.
+    """
+    records = _records(columns)
+    if not records:
+        return np.zeros(0, dtype=np.int64)
+    table = model.__table__
+    if not returning:
+        db.session.execute(table.insert(), records)
+        return None
+    if db.session.get_bind().dialect.name != "sqlite":
+        # One batched INSERT .. RETURNING, as in the bulk daily-log endpoint
+        ids = db.session.scalars(
+            table.insert().returning(table.c.id, sort_by_parameter_order=True),
+            records,
+        ).all()
+        return np.asarray(ids, dtype=np.int64)
+
+    # SQLite would run the above one row at a time. The seed holds the write
+    # lock from its first insert on, so the ids after the current maximum are
+    # free to assign up front.
+    first_id = (db.session.scalar(db.select(db.func.max(table.c.id))) or 0) + 1
+    ids = np.arange(first_id, first_id + len(records), dtype=np.int64)
+    for record, record_id in zip(records, ids.tolist()):
+        record["id"] = record_id
+    db.session.execute(table.insert(), records)
+    return ids
+
+
+def _days(start, offsets):
+    return (np.datetime64(start, "D") + offsets.astype("timedelta64[D]")).astype(
+        "datetime64[D]"
+    )
+
+
+class Seeder:
+    """Generates users and their logs in vectorized batches."""
+
+    def __init__(self, days=365, seed=None, medications=2, today=None):
+        self.days = days
+        self.medications = medications
+        self.rng = np.random.default_rng(seed)
+        self.today = today or date.today()
+        self.counts = {}
+        # One hash for every seeded user: hashing is deliberately slow
+        self.password_hash = generate_password_hash("password")
+        faker = Faker()
+        faker.seed_instance(seed)
+        self.first_names = np.array([faker.first_name() for _ in range(NAME_POOL_SIZE)])
+        self.last_names = np.array([faker.last_name() for _ in range(NAME_POOL_SIZE)])
+
+        def ids_by_name(model):
+            return {
+                name.strip().lower(): item_id
+                for item_id, name in db.session.execute(db.select(model.id, model.name))
+            }
+
+        self.prodromes = ids_by_name(Prodrome)
+        self.auras = ids_by_name(Aura)
+        self.triggers = ids_by_name(Trigger)
+        self.seizure_types = np.array(list(ids_by_name(SeizureType).values()))
+
+        # The distributions the models are trained on. Imported here: the
+        # training scripts need pandas, which the app does not load otherwise
+        from ..models import base_data
+
+        self.generate_persistent_changes = base_data.generate_persistent_changes
+        self.prodrome_samplers = {
+            name.lower(): sample for name, sample in base_data.PRODROMES.items()
+        }
+        # A trigger is a sampler, or the daily change probability of a state
+        self.trigger_samplers = {
+            name.lower(): sample for name, sample in base_data.TRIGGERS.items()
+        }
+
+    def _count(self, model, n):
+        self.counts[model.__tablename__] = self.counts.get(model.__tablename__, 0) + n
+
+    def add_users(self, n, first_index):
+        rng = self.rng
+        ages_days = rng.integers(18 * 365, 100 * 365, n)
+        indexes = np.arange(first_index, first_index + n)
+        user_ids = _insert(
+            User,
+            {
+                "first_name": rng.choice(self.first_names, n),
+                "last_name": rng.choice(self.last_names, n),
+                "email": np.char.add(
+                    np.char.add("user", indexes.astype(str)), "@seed.example.com"
+                ),
+                "password_hash": np.full(n, self.password_hash, dtype=object),
+                "birthdate": _days(self.today, -ages_days),
+                "has_menstruation": rng.random(n) < 0.5,
+                "data_version": np.zeros(n, dtype=np.int64),
+            },
+            returning=True,
+        )
+        self._count(User, n)
+        self.add_medications(user_ids)
+        self.add_logs(user_ids)
+        return user_ids
+
+    def add_medications(self, user_ids):
+        rng = self.rng
+        n = len(user_ids) * self.medications
+        start_offsets = rng.integers(1, 366, n)
+        stopped = rng.random(n) < 0.5
+        # Stopped after the start, at the latest today
+        end_offsets = rng.integers(0, start_offsets)
+        end_dates = _days(self.today, -end_offsets).astype(object)
+        end_dates[~stopped] = None
+        _insert(
+            Medication,
+            {
+                "user_id": np.repeat(user_ids, self.medications),
+                "name": rng.choice(MEDICATION_NAMES, n),
+                "dosage_mg": rng.integers(1, 501, n).astype(float),
+                "frequency": rng.integers(1, 6, n),
+                "start_date": _days(self.today, -start_offsets),
+                "end_date": end_dates,
+                "is_stopped": stopped,
+                "reason_for_stop": np.full(n, "", dtype=object),
+            },
+        )
+        self._count(Medication, n)
+
+    def add_logs(self, user_ids):
+        rng = self.rng
+        n = len(user_ids) * self.days
+        # One log per user and day, at a random time of the day
+        day_offsets = np.tile(np.arange(self.days, 0, -1), len(user_ids))
+        seconds = rng.integers(0, 24 * 3600, n).astype("timedelta64[s]")
+        log_times = (_days(self.today, -day_offsets) + seconds).astype("datetime64[us]")
+        log_ids = _insert(
+            UserLog,
+            {"user_id": np.repeat(user_ids, self.days), "log_time": log_times},
+            returning=True,
+        )
+        self._count(UserLog, n)
+
+        self.add_prodromes(log_ids)
+        self.add_auras(log_ids)
+        self.add_triggers(log_ids)
+        self.add_seizure_episodes(log_ids)
+
+    def add_prodromes(self, log_ids):
+        log_column, prodrome_column, intensity_column = [], [], []
+        for name, prodrome_id in self.prodromes.items():
+            if name not in self.prodrome_samplers:
+                continue
+            intensity = self.prodrome_samplers[name](self.rng, len(log_ids))
+            present = intensity > 0
+            log_column.append(log_ids[present])
+            prodrome_column.append(np.full(present.sum(), prodrome_id))
+            intensity_column.append(intensity[present])
+        self._insert_items(
+            UserProdrome,
+            log_id=log_column,
+            prodrome_id=prodrome_column,
+            intensity=intensity_column,
+        )
+
+    def add_auras(self, log_ids):
+        log_column, aura_column = [], []
+        for aura_id in self.auras.values():
+            present = self.rng.random(len(log_ids)) < AURA_PROBABILITY
+            log_column.append(log_ids[present])
+            aura_column.append(np.full(present.sum(), aura_id))
+        n = sum(len(ids) for ids in log_column)
+        self._insert_items(
+            UserAura,
+            log_id=log_column,
+            aura_id=aura_column,
+            is_present=[np.ones(n, dtype=bool)],
+        )
+
+    def add_triggers(self, log_ids):
+        n = len(log_ids)
+        log_column, trigger_column, numeric_column, boolean_column = [], [], [], []
+        for name, trigger_id in self.triggers.items():
+            if name not in self.trigger_samplers:
+                continue
+            values = self._trigger_values(self.trigger_samplers[name], n)
+            log_column.append(log_ids)
+            trigger_column.append(np.full(n, trigger_id))
+            if values.dtype == bool:
+                numeric_column.append(np.full(n, None, dtype=object))
+                boolean_column.append(values.astype(object))
+            else:
+                numeric_column.append(values.astype(float).astype(object))
+                boolean_column.append(np.full(n, None, dtype=object))
+        self._insert_items(
+            UserTrigger,
+            log_id=log_column,
+            trigger_id=trigger_column,
+            value_numeric=numeric_column,
+            value_boolean=boolean_column,
+        )
+
+    def _trigger_values(self, sample, n):
+        if callable(sample):
+            return sample(self.rng, n)
+        if not n:
+            return np.zeros(0, dtype=bool)
+        # A state persisting across each user's days, logs being in user and
+        # day order
+        return np.concatenate(
+            [
+                self.generate_persistent_changes(self.days, sample, self.rng)
+                for _ in range(n // self.days)
+            ]
+        )
+
+    def add_seizure_episodes(self, log_ids):
+        rng = self.rng
+        if not len(self.seizure_types):
+            return
+        log_ids = log_ids[rng.random(len(log_ids)) < SEIZURE_PROBABILITY]
+        n = len(log_ids)
+        _insert(
+            SeizureEpisode,
+            {
+                "log_id": log_ids,
+                "seizure_type_id": rng.choice(self.seizure_types, n),
+                "duration_sec": rng.integers(10, 301, n),
+                "frequency": np.ones(n, dtype=np.int64),
+                "requires_emergency_intervention": rng.random(n) < 0.1,
+                "postictal_confusion_duration": rng.uniform(0, 60, n),
+                "postictal_confusion_intensity": rng.integers(0, 11, n),
+                "postictal_headache_duration": rng.uniform(0, 60, n),
+                "postictal_headache_intensity": rng.integers(0, 11, n),
+                "postictal_fatigue_duration": rng.uniform(0, 60, n),
+                "postictal_fatigue_intensity": rng.integers(0, 11, n),
+            },
+        )
+        self._count(SeizureEpisode, n)
+
+    def _insert_items(self, model, **columns):
+        columns = {
+            name: np.concatenate(parts) if parts else np.zeros(0)
+            for name, parts in columns.items()
+        }
+        _insert(model, columns)
+        self._count(model, len(columns["log_id"]))
+
+
+def _tune_sqlite():
+    """Relax durability for the bulk load; returns the setting to restore."""
+    if db.session.get_bind().dialect.name != "sqlite":
+        return None
+    synchronous = db.session.execute(db.text("PRAGMA synchronous")).scalar()
+    db.session.execute(db.text("PRAGMA synchronous = OFF"))
+    db.session.execute(db.text("PRAGMA temp_store = MEMORY"))
+    db.session.execute(db.text("PRAGMA cache_size = -65536"))
+    return synchronous
+
+
+def seed_database(users=100, days=365, seed=None, batch_size=100, medications=2):
+    """Add ``users`` users with ``days`` daily logs each, in one transaction.
+
+    Args:
+        users (int): Users to add.
+        days (int): Logs per user, one per day up to yesterday.
+        seed (int): Seed of the random values; None for fresh entropy.
+        batch_size (int): Users generated and inserted at once.
+        medications (int): Medications per user.
+    Returns:
+        dict: Rows inserted per table, the elapsed seconds and rows/sec.
+    """
+    started = time.perf_counter()
+    synchronous = _tune_sqlite()
+    try:
+        add_prodromes()
+        add_auras()
+        add_triggers()
+        add_seizure_types()
+
+        seeder = Seeder(days=days, seed=seed, medications=medications)
+        first_index = db.session.scalar(db.select(db.func.max(User.id))) or 0
+        for start in range(0, users, batch_size):
+            seeder.add_users(min(batch_size, users - start), first_index + start + 1)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if synchronous is not None:
+            db.session.execute(db.text(f"PRAGMA synchronous = {int(synchronous)}"))
+
+    seconds = time.perf_counter() - started
+    rows = sum(seeder.counts.values())
+    return {
+        "tables": seeder.counts,
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(rows / seconds) if seconds else rows,
+    }
+
+
+@seed_cli.command("database")
+@click.option("--users", type=int, default=100, show_default=True)
+@click.option("--days", type=int, default=365, show_default=True, help="Logs per user.")
+@click.option("--seed", type=int, default=None, help="Seed for reproducible data.")
+@click.option("--batch-size", type=int, default=100, show_default=True, help="Users per batch.")
+@click.option("--medications", type=int, default=2, show_default=True, help="Per user.")
+def seed_database_command(users, days, seed, batch_size, medications):
+    """Add fake users with daily logs, e.g. for load tests."""
+    stats = seed_database(users, days, seed, batch_size, medications)
+    for table, count in stats["tables"].items():
+        click.echo(f"{table}: {count} rows")
+    click.echo(
+        f"Inserted {stats['rows']} rows in {stats['seconds']}s "
+        f"({stats['rows_per_second']} rows/s)"
+    )
@@ -0,0 +1,5 @@
+"""Performance benchmarks for the API.
+
+Each module can be run on its own from the repository root, e.g.
+``python -m api.benchmarks.startup``.
+"""
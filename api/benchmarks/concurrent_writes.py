@@ -0,0 +1,140 @@
+"""Write throughput of ``POST /api/datalog/daily-log`` with concurrent workers.
+
+Each worker is a separate process with its own ``create_app()``, like a
+gunicorn worker, and submits ``--requests`` daily logs (two prodromes and a
+trigger) for its own user into one shared SQLite file, starting together.
+Every worker count runs once with SQLite's defaults (rollback journal,
+``synchronous=FULL``, the driver's 5 s lock timeout) and once with the
+``SQLITE_PRAGMAS`` of the config (WAL, see ``app/database.py``), on a fresh
+database each time. Failed writes (``database is locked`` surfaces as a 500)
+are counted as errors.
+
+Usage (from the repository root):
+    python -m api.benchmarks.concurrent_writes [--workers 1,2,4,8] [--requests 200]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from api.app.config import Config
+
+MODES = ("default", "tuned")
+
+
+def _config(db_path, mode):
+    settings = {
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path,
+        "SECRET_KEY": "benchmark",
+        "JWT_SECRET_KEY": "benchmark",
+        "INFERENCE_WORKERS": 0,
+    }
+    if mode == "default":
+        settings["SQLITE_PRAGMAS"] = {}
+    return type("BenchmarkConfig", (Config,), settings)
+
+
+def _prepare(db_path, mode, workers):
+    """Create the database with one user per worker; returns the reference ids."""
+    from api.app import create_app, db
+    from api.app.user_data import seed_database
+
+    app = create_app(config_class=_config(db_path, mode))
+    with app.app_context():
+        seed_database(users=workers, days=0, seed=0, medications=0)
+        journal_mode = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+        emails = db.session.scalars(db.text("SELECT email FROM users ORDER BY id")).all()
+        prodromes = db.session.scalars(db.text("SELECT id FROM prodromes LIMIT 2")).all()
+        trigger = db.session.scalar(db.text("SELECT id FROM triggers LIMIT 1"))
+        db.session.remove()
+        db.engine.dispose()
+    return journal_mode, emails, prodromes, trigger
+
+
+def _worker(db_path, mode, email, prodromes, trigger, requests, barrier):
+    from flask_jwt_extended import create_access_token
+
+    from api.app import create_app
+
+    app = create_app(config_class=_config(db_path, mode))
+    with app.app_context():
+        token = create_access_token(identity=email)
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+    daily_log = {
+        "prodromes": [{"prodrome_id": i, "intensity": 5} for i in prodromes],
+        "triggers": [{"trigger_id": trigger, "value_numeric": 7}],
+    }
+
+    barrier.wait()
+    started = time.time()
+    latencies, errors = [], 0
+    for _ in range(requests):
+        request_started = time.perf_counter()
+        response = client.post("/api/datalog/daily-log", json=daily_log, headers=headers)
+        latencies.append(time.perf_counter() - request_started)
+        errors += response.status_code != 201
+    return started, time.time(), latencies, errors
+
+
+def measure(workers, requests, mode):
+    """Return the write throughput of ``workers`` concurrent processes."""
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "writes.db")
+        journal_mode, emails, prodromes, trigger = _prepare(db_path, mode, workers)
+
+        with context.Manager() as manager, ProcessPoolExecutor(
+            workers, mp_context=context
+        ) as executor:
+            barrier = manager.Barrier(workers)
+            futures = [
+                executor.submit(
+                    _worker, db_path, mode, email, prodromes, trigger, requests, barrier
+                )
+                for email in emails
+            ]
+            results = [future.result() for future in futures]
+
+    elapsed = max(end for _, end, _, _ in results) - min(start for start, _, _, _ in results)
+    latencies_ms = np.concatenate([latencies for _, _, latencies, _ in results]) * 1000
+    errors = sum(errors for _, _, _, errors in results)
+    writes = workers * requests - errors
+    return {
+        "mode": mode,
+        "journal_mode": journal_mode,
+        "workers": workers,
+        "writes": writes,
+        "errors": errors,
+        "writes_per_second": round(writes / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated counts")
+    parser.add_argument("--requests", type=int, default=200, help="per worker")
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args(argv)
+
+    results = [
+        measure(int(workers), args.requests, mode)
+        for workers in args.workers.split(",")
+        for mode in args.modes.split(",")
+    ]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+"""Load test of the main API endpoints against a seeded database.
+
+A SQLite database is filled with ``--users`` users and ``--days`` daily logs
+each by ``app/user_data.py``, then every scenario in ``SCENARIOS`` is run on
+its own: ``--requests`` requests spread over ``--concurrency`` threads, each
+for a random seeded user. Requests go to ``create_app()`` in-process through
+the Flask test client, or with ``--gunicorn N`` over HTTP to N local gunicorn
+workers started with ``gunicorn.conf.py``. The same ``--seed`` gives the
+same data and the same request sequence.
+
+Each scenario reports p50/p95/p99 latency, requests per second, errors and
+the SQL queries per request (from the ``Server-Timing`` header over HTTP, so
+the gunicorn workers run with ``QUERY_PROFILING=1``), as JSON.
+
+Regressions are found by comparing with a stored run: ``--output`` saves the
+results, ``--compare`` diffs them against a baseline and fails when a p95 or
+the throughput is worse by more than ``--tolerance`` or a scenario issues
+more queries per request than before.
+
+Usage (from the repository root):
+    python -m api.benchmarks.load_test --users 200 --days 365 --output baseline.json
+    python -m api.benchmarks.load_test --users 200 --days 365 --compare baseline.json
+    python -m api.benchmarks.load_test --gunicorn 4 --concurrency 8 --db /tmp/load.db
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+from flask_jwt_extended import create_access_token
+
+from api.app import create_app, db
+from api.app.config import Config
+from api.app.schema import User
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# Password of every seeded user, see user_data.py
+PASSWORD = "password"
+JWT_SECRET_KEY = "load-test"
+# Extra queries per request (on average) that count as a regression; cache
+# expiry makes the average vary slightly between runs
+QUERY_REGRESSION = 0.5
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def _login(user, rng):
+    return "POST", "/api/auth/login", {"email": user["email"], "password": PASSWORD}
+
+
+def _logs(user, rng):
+    return "GET", "/api/datalog/logs?limit=100", None
+
+
+def _logs_by_date(user, rng):
+    day = user["today"] - timedelta(days=rng.randint(1, user["days"]))
+    return "GET", f"/api/datalog/logs/date?date={day.isoformat()}", None
+
+
+def _weekly_logs(user, rng):
+    return "GET", "/api/datalog/weekly-logs", None
+
+
+def _medications(user, rng):
+    return "GET", "/api/medications/?page=1&per_page=20", None
+
+
+def _predictions_lstm(user, rng):
+    return "GET", "/api/predictions_lstm", None
+
+
+def _predictions_xgboost(user, rng):
+    return "GET", "/api/predictions/xgboost", None
+
+
+# Scenario name: builds (method, path, JSON body) for a user
+SCENARIOS = {
+    "login": _login,
+    "logs": _logs,
+    "logs_by_date": _logs_by_date,
+    "weekly_logs": _weekly_logs,
+    "medications": _medications,
+    "predictions_lstm": _predictions_lstm,
+    "predictions_xgboost": _predictions_xgboost,
+}
+
+
+def _config(db_path):
+    return type(
+        "LoadTestConfig",
+        (Config,),
+        {
+            "SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path,
+            "SECRET_KEY": "load-test",
+            "JWT_SECRET_KEY": JWT_SECRET_KEY,
+            "INFERENCE_WORKERS": 0,
+        },
+    )
+
+
+def prepare_database(db_path, users, days, seed):
+    """Seed ``db_path`` unless it exists, and return the users with a token each."""
+    from api.app.user_data import seed_database
+
+    app = create_app(config_class=_config(db_path))
+    with app.app_context():
+        seeded = None
+        if not db.session.scalar(db.select(db.func.count(User.id))):
+            seeded = seed_database(users=users, days=days, seed=seed)
+        # Bypass the login endpoint, whose password hashing would dominate
+        accounts = [
+            {
+                "id": user_id,
+                "email": email,
+                "token": create_access_token(identity=email),
+                "days": days,
+                "today": date.today(),
+            }
+            for user_id, email in db.session.execute(
+                db.select(User.id, User.email).order_by(User.id)
+            )
+        ]
+        db.session.remove()
+        db.engine.dispose()
+    return app, accounts, seeded
+
+
+class InProcessClient:
+    """Sends requests to the app through the Flask test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.query_profiler = app.extensions["query_profiler"]
+
+    def request(self, method, path, headers, body):
+        with self.query_profiler.collect(keep_slowest=0) as queries:
+            response = self.client.open(path, method=method, headers=headers, json=body)
+            response.close()
+        return response.status_code, queries.count
+
+    def close(self):
+        pass
+
+
+class HttpClient:
+    """Sends requests over one keep-alive HTTP connection."""
+
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+
+    def request(self, method, path, headers, body):
+        headers = dict(headers)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        # Counted by the server, see app/profiling.py
+        match = SERVER_TIMING_QUERIES.search(response.getheader("Server-Timing") or "")
+        return response.status, int(match.group(1)) if match else None
+
+    def close(self):
+        self.connection.close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def gunicorn_server(db_path, workers, timeout=60):
+    """Run ``main:app`` with ``workers`` gunicorn workers; yields the port."""
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URI": db_path,
+        "SECRET_KEY": "load-test",
+        "JWT_SECRET_KEY": JWT_SECRET_KEY,
+        "INFERENCE_WORKERS": "0",
+        # Server-Timing headers, for the queries per request
+        "QUERY_PROFILING": "1",
+    }
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn",
+            "-c", os.path.join("api", "gunicorn.conf.py"),
+            "-b", f"127.0.0.1:{port}",
+            "-w", str(workers),
+            "api.main:app",
+        ],
+        cwd=ROOT_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.2)
+        yield port
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def build_plan(name, accounts, requests, seed):
+    """Return the requests of a scenario: (method, path, headers, body) tuples."""
+    # Seeded per scenario, so selecting scenarios does not change the others
+    rng = random.Random(f"{seed}-{name}")
+    plan = []
+    for _ in range(requests):
+        user = rng.choice(accounts)
+        method, path, body = SCENARIOS[name](user, rng)
+        plan.append((method, path, {"Authorization": f"Bearer {user['token']}"}, body))
+    return plan
+
+
+def run_scenario(make_client, plan, concurrency, warmup=5):
+    """Send the requests of a plan from ``concurrency`` threads and summarize them."""
+
+    def send(requests):
+        client = make_client()
+        try:
+            for method, path, headers, body in plan[:warmup]:
+                client.request(method, path, headers, body)
+            results = []
+            for method, path, headers, body in requests:
+                started = time.perf_counter()
+                status, queries = client.request(method, path, headers, body)
+                results.append((time.perf_counter() - started, status, queries))
+            return results
+        finally:
+            client.close()
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        started = time.perf_counter()
+        parts = executor.map(send, [plan[i::concurrency] for i in range(concurrency)])
+        results = [result for part in parts for result in part]
+        elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array([seconds for seconds, _, _ in results]) * 1000
+    queries = [count for _, status, count in results if count is not None]
+    statuses = {}
+    for _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(results),
+        "errors": sum(1 for _, status, _ in results if status >= 400),
+        "statuses": statuses,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "rps": round(len(results) / elapsed, 1),
+        "queries_per_request": round(float(np.mean(queries)), 2) if queries else None,
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Diff the scenarios of two runs; returns the comparison and the regressions."""
+    comparison, regressions = {}, []
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        diff = {
+            "p95_ratio": round(current["p95_ms"] / previous["p95_ms"], 3),
+            "rps_ratio": round(current["rps"] / previous["rps"], 3),
+        }
+        if diff["p95_ratio"] > 1 + tolerance:
+            regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        if diff["rps_ratio"] < 1 - tolerance:
+            regressions.append(f"{name}: {previous['rps']} -> {current['rps']} requests/s")
+        if None not in (current["queries_per_request"], previous["queries_per_request"]):
+            diff["queries_delta"] = round(
+                current["queries_per_request"] - previous["queries_per_request"], 2
+            )
+            if diff["queries_delta"] >= QUERY_REGRESSION:
+                regressions.append(
+                    f"{name}: {previous['queries_per_request']} -> "
+                    f"{current['queries_per_request']} queries/request"
+                )
+        comparison[name] = diff
+
+    if results["settings"] != baseline["settings"]:
+        comparison["warning"] = "settings differ from the baseline"
+    return comparison, regressions
+
+
+def run(args, db_path):
+    app, accounts, seeded = prepare_database(db_path, args.users, args.days, args.seed)
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    results = {
+        "settings": {
+            "mode": f"gunicorn-{args.gunicorn}" if args.gunicorn else "in-process",
+            "users": len(accounts),
+            "days": args.days,
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "seeding": seeded,
+        "scenarios": {},
+    }
+
+    if args.gunicorn:
+        with gunicorn_server(db_path, args.gunicorn) as port:
+            for name in names:
+                plan = build_plan(name, accounts, args.requests, args.seed)
+                results["scenarios"][name] = run_scenario(
+                    lambda: HttpClient(port), plan, args.concurrency
+                )
+    else:
+        for name in names:
+            plan = build_plan(name, accounts, args.requests, args.seed)
+            results["scenarios"][name] = run_scenario(
+                lambda: InProcessClient(app), plan, args.concurrency
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365, help="logs per user")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=500, help="per scenario")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--scenarios", help=f"comma-separated, from {', '.join(SCENARIOS)}"
+    )
+    parser.add_argument(
+        "--gunicorn", type=int, metavar="WORKERS", help="serve with gunicorn workers"
+    )
+    parser.add_argument("--db", help="SQLite file to reuse (seeded when missing)")
+    parser.add_argument("--output", help="save the results, e.g. as a baseline")
+    parser.add_argument("--compare", metavar="BASELINE", help="results to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed p95 and throughput change against the baseline",
+    )
+    args = parser.parse_args(argv)
+
+    if args.db:
+        results = run(args, os.path.abspath(args.db))
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            results = run(args, os.path.join(tmp_dir, "load_test.db"))
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        results["comparison"], regressions = compare(results, baseline, args.tolerance)
+        results["regressions"] = regressions
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Latency of ``GET /api/datalog/logs/date`` as a user's history grows.
+
+For each history size a fresh SQLite database is filled with one user and
+that many logs (one per hour, going back in time), then the endpoint is
+called repeatedly for a day in the middle of the history. With the
+``(user_id, log_time)`` index and a range filter the lookup is a B-tree seek,
+so latency should stay flat; ``--max-ratio`` fails the run otherwise.
+
+Usage (from the repository root):
+    python -m api.benchmarks.logs_by_date [--sizes 100,1000,10000,100000]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from api.app import create_app, db
+from api.app.config import TestConfig
+from api.app.schema import User, UserLog
+
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+EMAIL = "bench@example.com"
+
+
+def _make_app(db_path):
+    config = type(
+        "BenchmarkConfig",
+        (TestConfig,),
+        {"SQLALCHEMY_DATABASE_URI": "sqlite:///" + db_path, "USER_CACHE_TTL": 30},
+    )
+    return create_app(config_class=config)
+
+
+def _seed(num_logs):
+    """Create the user and ``num_logs`` hourly logs, return the middle day."""
+    user = User(
+        first_name="Bench",
+        last_name="User",
+        email=EMAIL,
+        password_hash="x",
+        birthdate=date(1990, 1, 1),
+    )
+    db.session.add(user)
+    db.session.flush()
+
+    end = datetime(2024, 1, 1)
+    db.session.execute(
+        db.insert(UserLog),
+        [
+            {"user_id": user.id, "log_time": end - timedelta(hours=i)}
+            for i in range(num_logs)
+        ],
+    )
+    db.session.commit()
+    return (end - timedelta(hours=num_logs // 2)).date()
+
+
+def _query_plan(day):
+    """Return SQLite's plan for the range filter used by the endpoint."""
+    start = datetime.combine(day, datetime.min.time())
+    rows = db.session.execute(
+        text(
+            "EXPLAIN QUERY PLAN SELECT * FROM user_logs "
+            "WHERE user_id = :user_id AND log_time >= :start AND log_time < :end"
+        ),
+        {"user_id": 1, "start": start, "end": start + timedelta(days=1)},
+    ).all()
+    return " / ".join(row[-1] for row in rows)
+
+
+def measure(num_logs, requests=200):
+    """Return latency statistics (in ms) of the endpoint for one history size."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app = _make_app(os.path.join(tmp_dir, "bench.db"))
+        with app.app_context():
+            db.create_all()
+            day = _seed(num_logs)
+            plan = _query_plan(day)
+            token = create_access_token(identity=EMAIL)
+
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        url = f"/api/datalog/logs/date?date={day.isoformat()}"
+
+        # Warm up the user and lookup caches
+        for _ in range(5):
+            assert client.get(url, headers=headers).status_code == 200
+
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get(url, headers=headers)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200
+
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+    timings.sort()
+    return {
+        "logs": num_logs,
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        "plan": plan,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="comma-separated history sizes",
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument(
+        "--max-ratio",
+        type=float,
+        default=3.0,
+        help="fail if p50 of the largest history exceeds this multiple of the smallest",
+    )
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    results = [measure(size, args.requests) for size in sizes]
+    ratio = results[-1]["p50_ms"] / results[0]["p50_ms"]
+    print(json.dumps({"results": results, "p50_ratio": round(ratio, 2)}, indent=2))
+    return 1 if ratio > args.max_ratio else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Import-time budget for the Flask app factory.
+
+Runs ``create_app()`` in a fresh interpreter under ``python -X importtime``
+and fails if the cumulative import time exceeds ``STARTUP_IMPORT_BUDGET_MS``.
+Heavy ML libraries must not be imported at startup, so the modules listed in
+``FORBIDDEN_MODULES`` fail the check as well.
+
+Usage (from the repository root):
+    python -m api.benchmarks.startup [--budget-ms 1500] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from api.app.config import Config
+
+# Loaded lazily by model_loader.py, never at import time
+FORBIDDEN_MODULES = ("tensorflow", "keras", "xgboost")
+
+STARTUP_CODE = (
+    "from api.app import create_app\n"
+    "from api.app.config import TestConfig\n"
+    "create_app(TestConfig)\n"
+)
+
+
+def measure_startup():
+    """Import the app in a fresh interpreter and collect import timings.
+
+    Returns:
+        dict: ``total_ms`` (cumulative time of top-level imports), and
+        ``modules``, a list of (name, self_us, cumulative_us) tuples.
+    """
+    root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=root_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Nested imports are indented; only top-level ones add to the total
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative_us)
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return {"total_ms": total_us / 1000, "modules": modules}
+
+
+def check_startup(budget_ms):
+    """Return a list of problems with the app startup, empty if within budget."""
+    report = measure_startup()
+    problems = []
+    if report["total_ms"] > budget_ms:
+        problems.append(
+            f"create_app() imports took {report['total_ms']:.0f} ms "
+            f"(budget {budget_ms:.0f} ms)"
+        )
+    imported = {name.split(".")[0] for name, _, _ in report["modules"]}
+    for module in FORBIDDEN_MODULES:
+        if module in imported:
+            problems.append(f"{module} is imported at startup")
+    return report, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=Config.STARTUP_IMPORT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to show")
+    args = parser.parse_args()
+
+    report, problems = check_startup(args.budget_ms)
+    slowest = sorted(report["modules"], key=lambda m: m[1], reverse=True)[: args.top]
+    print(
+        json.dumps(
+            {
+                "total_ms": round(report["total_ms"], 1),
+                "budget_ms": args.budget_ms,
+                "slowest_self_us": {name: self_us for name, self_us, _ in slowest},
+                "problems": problems,
+            },
+            indent=2,
+        )
+    )
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""Latency and memory of the NumPy tree evaluator against XGBClassifier.
+
+Scores random feature rows (1, 100 and 10k at a time) with
+``XGBClassifier.predict_proba`` and with ``FlatForest.predict_proba`` from
+``app/tree_runtime.py``, and reports p50/p99 latency per batch size. Memory is
+reported as the resident set growth of loading each model (for XGBoost this
+includes importing the library) and as the peak Python-level allocation of a
+10k-row call, measured with tracemalloc (XGBoost's native buffers are not
+visible to tracemalloc, so only the NumPy figure is meaningful there).
+
+Usage (from the repository root):
+    python -m api.benchmarks.xgboost_scoring [--model xgboost_model.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from api.app.config import Config
+from api.app.tree_runtime import FlatForest
+
+BATCH_SIZES = (1, 100, 10000)
+
+
+def _rss_mb():
+    with open("/proc/self/statm") as f:
+        resident_pages = int(f.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def _latencies_ms(fn, X, repeats):
+    fn(X)  # Warm up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(timings, 50)), 4),
+        "p99_ms": round(float(np.percentile(timings, 99)), 4),
+    }
+
+
+def _peak_alloc_mb(fn, X):
+    tracemalloc.start()
+    try:
+        fn(X)
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def run(model_path, repeats=200, seed=0):
+    rss = _rss_mb()
+    forest = FlatForest.load(model_path)
+    forest_rss_mb = _rss_mb() - rss
+
+    rss = _rss_mb()
+    import xgboost as xgb
+
+    classifier = xgb.XGBClassifier()
+    classifier.load_model(model_path)
+    xgboost_rss_mb = _rss_mb() - rss
+
+    rng = np.random.default_rng(seed)
+    n_features = classifier.get_booster().num_features()
+    results = []
+    for batch_size in BATCH_SIZES:
+        X = rng.integers(0, 10, size=(batch_size, n_features)).astype(np.float32)
+        # Fewer repeats for large batches to keep the run short
+        batch_repeats = max(10, repeats // max(1, batch_size // 100))
+        expected = classifier.predict_proba(X)
+        actual = forest.predict_proba(X)
+        results.append(
+            {
+                "rows": batch_size,
+                "xgboost": _latencies_ms(classifier.predict_proba, X, batch_repeats),
+                "numpy": _latencies_ms(forest.predict_proba, X, batch_repeats),
+                "max_abs_diff": float(np.abs(expected - actual).max()),
+            }
+        )
+
+    X = rng.integers(0, 10, size=(BATCH_SIZES[-1], n_features)).astype(np.float32)
+    return {
+        "model": model_path,
+        "trees": len(forest.roots),
+        "nodes": len(forest.feature),
+        "max_depth": forest.max_depth,
+        "memory": {
+            "numpy_arrays_mb": round(forest.nbytes / 2**20, 3),
+            "numpy_load_rss_mb": round(forest_rss_mb, 1),
+            "xgboost_load_rss_mb": round(xgboost_rss_mb, 1),
+            "numpy_peak_alloc_10k_mb": _peak_alloc_mb(forest.predict_proba, X),
+        },
+        "latency": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model", default=Config.XGBOOST_MODEL_PATH)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(os.path.abspath(args.model), args.repeats), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
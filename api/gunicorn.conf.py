@@ -0,0 +1,51 @@
+"""Gunicorn settings for the API.
+
+Usage: gunicorn -c gunicorn.conf.py main:app
+
+Set the number of workers with WEB_CONCURRENCY (read by gunicorn) rather
+than -w: INFERENCE_WORKERS defaults to the cores divided by it, so the
+prediction process pools of all workers together use each core once.
+Prediction jobs are polled from any worker through INFERENCE_JOBS_DIR, see
+app/inference.py.
+
+Workers are sync (one request at a time) unless started with --threads:
+concurrent LSTM predictions are only batched within a threaded worker (see
+app/batching.py); a sync worker predicts each window at once.
+
+Set PROMETHEUS_MULTIPROC_DIR to serve the metrics of all workers at
+/metrics, see app/metrics.py.
+"""
+
+import glob
+import os
+
+
+def on_starting(server):
+    """Start with an empty metrics directory: counters restart with the server."""
+    directory = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+
+def post_fork(server, worker):
+    """Load the models listed in MODEL_WARMUP in each freshly forked worker.
+
+    Models are loaded after the fork (not in the master) because TensorFlow
+    is not fork-safe. Loading the app here is safe: gunicorn caches it and
+    the worker reuses it when it starts serving.
+    """
+    app = worker.app.wsgi()
+    names = [name for name in app.config["MODEL_WARMUP"].split(",") if name]
+    if names:
+        server.log.info("Warming up models %s in worker %s", names, worker.pid)
+        app.extensions["model_loader"].warm_up(names)
+
+
+def child_exit(server, worker):
+    """Drop the live gauges of a dead worker; its counters are kept."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
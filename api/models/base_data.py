@@ -1,64 +1,251 @@
+"""Synthetic training data for the seizure prediction models.
+
+Each row is one day: the triggers, the prodromes and whether a seizure
+episode occurred. Rows are generated in chunks so arbitrarily large datasets
+fit in bounded memory, and every column draws from its own random stream
+(spawned from a single seed), so a seed reproduces the same rows whatever the
+chunk size.
+
+Usage:
+    python base_data.py --rows 100000000 --seed 0 --output dataset.npy
+    python base_data.py --rows 1000000 --seed 0 --output dataset.parquet
+
+``.npy`` files hold a float32 matrix with the columns in ``COLUMN_NAMES``
+order (the label last); ``.parquet`` files keep the column names and dtypes
+and need pyarrow.
+"""
+
+import argparse
+import json
+import os
+import sys
 
-import pandas as pd
 import numpy as np
-import random
-from datetime import datetime, timedelta
+import pandas as pd
+
+# The scripts run from this directory and use the API's modules (the
+# preprocessing artifact, the feature store) from the repository root
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+NUM_SAMPLES = 10_000
+# Rows generated (and written) at once
+CHUNK_SIZE = 1_000_000
+LABEL = 'Episodes Occurrences'
+
+
+def _choice(values, p=None):
+    def sample(rng, n):
+        return rng.choice(values, p=p, size=n)
+    return sample
+
+
+def _normal(mean, std, low=0, high=None):
+    def sample(rng, n):
+        return rng.normal(mean, std, n).clip(low, high)
+    return sample
+
+
+def _integers(low, high):
+    def sample(rng, n):
+        return rng.integers(low, high, n)
+    return sample
 
-num_samples = 10_000
 
 # Helper function to generate persistent changes for certain variables
-def generate_persistent_changes(n, change_prob=0.01):
-    changes = [False] * n  # Assume no change to start with
-    for i in range(1, n):
-        if np.random.rand() < change_prob:
-            changes[i] = not changes[i-1]  # Change state
-        else:
-            changes[i] = changes[i-1]  # Remain in the same state
-    return changes
+def generate_persistent_changes(n, change_prob=0.01, rng=None, initial=False, first_row=True):
+    """Return ``n`` boolean states, each flipping the previous one with ``change_prob``.
+
+    The state of row i is the parity of the flips up to i, so it is computed
+    with a cumulative sum instead of a loop. ``initial`` is the state before
+    the first row, to continue a previous chunk; the first row of a dataset
+    (``first_row``) never flips, so datasets start in the False state.
+    """
+    rng = rng or np.random.default_rng()
+    flips = rng.random(n) < change_prob
+    if first_row and n:
+        flips[0] = False
+    return (np.cumsum(flips) + initial) % 2 == 1
+
+
+_skewed_high = _choice([i for i in range(4, 11)] + [i for i in range(4)], p=[0.12]*7 + [(1 - (7 * 0.12))/4]*4)
 
 # Triggers
-triggers = pd.DataFrame({
-    'sleep quality': np.random.choice([i for i in range(6, 11)] + [i for i in range(5)], p=[0.15]*5 + [0.05]*5, size=num_samples),
-    'sleep duration': np.random.normal(7, 1.5, num_samples).clip(0, 12),
-    'stress level': np.random.choice([i for i in range(4, 11)] + [i for i in range(4)], p=[0.12]*7 + [0.04]*4, size=num_samples),
-    'alcohol consumption today': np.random.choice([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10], p=[0.4, 0.15, 0.1, 0.1, 0.05, 0.05, 0.05, 0.025, 0.025, 0.025, 0.025], size=num_samples),
-    'caffeine consumption today': np.random.choice(range(5), p=[0.2, 0.3, 0.25, 0.15, 0.1], size=num_samples),
-    'drugs consumption today': np.random.choice([True, False], p=[0.05, 0.95], size=num_samples),
-    'smoking': np.random.choice(range(21), p=[0.4] + [0.03]*20, size=num_samples),
-    'missing a meal': np.random.choice([True, False], p=[0.1, 0.9], size=num_samples),
-    'fevers': np.random.choice([True, False], p=[0.02, 0.98], size=num_samples),
-    'Steps': np.random.normal(5000, 2500, num_samples).clip(0),
-    'High intensity minutes': np.random.normal(30, 15, num_samples).clip(0, 150),
-    'flashing light': np.random.choice([True, False], p=[0.1, 0.9], size=num_samples),
-    'Monthly periods': np.random.randint(1, 29, num_samples), 
-    'Adherence to prescribed medication regimen': generate_persistent_changes(num_samples, 0.02),
-    'Changes in medication dosage or type': generate_persistent_changes(num_samples, 0.03),
-})
+TRIGGERS = {
+    'sleep quality': _choice([i for i in range(6, 11)] + [i for i in range(5)], p=[0.15]*5 + [0.05]*5),
+    'sleep duration': _normal(7, 1.5, 0, 12),
+    'stress level': _choice([i for i in range(4, 11)] + [i for i in range(4)], p=[0.12]*7 + [0.04]*4),
+    'alcohol consumption today': _choice([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10], p=[0.4, 0.15, 0.1, 0.1, 0.05, 0.05, 0.05, 0.025, 0.025, 0.025, 0.025]),
+    'caffeine consumption today': _choice(range(5), p=[0.2, 0.3, 0.25, 0.15, 0.1]),
+    'drugs consumption today': _choice([True, False], p=[0.05, 0.95]),
+    'smoking': _choice(range(21), p=[0.4] + [0.03]*20),
+    'missing a meal': _choice([True, False], p=[0.1, 0.9]),
+    'fevers': _choice([True, False], p=[0.02, 0.98]),
+    'Steps': _normal(5000, 2500),
+    'High intensity minutes': _normal(30, 15, 0, 150),
+    'flashing light': _choice([True, False], p=[0.1, 0.9]),
+    'Monthly periods': _integers(1, 29),
+    # Persistent states, by their probability of changing from one day to the next
+    'Adherence to prescribed medication regimen': 0.02,
+    'Changes in medication dosage or type': 0.03,
+}
 
 # Prodromes
-prodromes = pd.DataFrame({
-    'headache': np.random.choice([i for i in range(6, 11)] + [i for i in range(6)], p=[0.14]*5 + [0.05]*6, size=num_samples),
-    'numbness or tingling': np.random.choice(range(11), p=[0.7] + [0.03]*10, size=num_samples),
-    'tremor': np.random.choice(range(11), p=[0.85] + [0.015]*10, size=num_samples),
-    'dizziness': np.random.choice(range(11), p=[0.75] + [0.025]*10, size=num_samples),
-    'nausea': np.random.choice(range(11), p=[0.8] + [0.02]*10, size=num_samples),
-    'anxiety': np.random.choice([i for i in range(4, 11)] + [i for i in range(4)], p=[0.12]*7 + [(1 - (7 * 0.12))/4]*4, size=num_samples),
-    'Mood changes':  np.random.choice([i for i in range(4, 11)] + [i for i in range(4)], p=[0.12]*7 + [(1 - (7 * 0.12))/4]*4, size=num_samples),
-    'Insomnia':  np.random.choice([i for i in range(4, 11)] + [i for i in range(4)], p=[0.12]*7 + [(1 - (7 * 0.12))/4]*4, size=num_samples),
-    'Difficulty focusing':  np.random.choice([i for i in range(4, 11)] + [i for i in range(4)], p=[0.12]*7 + [(1 - (7 * 0.12))/4]*4, size=num_samples),
-    'gastrointestinal disturbances': np.random.choice(range(11), p=[0.85] + [0.015]*10, size=num_samples),
-})
+PRODROMES = {
+    'headache': _choice([i for i in range(6, 11)] + [i for i in range(6)], p=[0.14]*5 + [0.05]*6),
+    'numbness or tingling': _choice(range(11), p=[0.7] + [0.03]*10),
+    'tremor': _choice(range(11), p=[0.85] + [0.015]*10),
+    'dizziness': _choice(range(11), p=[0.75] + [0.025]*10),
+    'nausea': _choice(range(11), p=[0.8] + [0.02]*10),
+    'anxiety': _skewed_high,
+    'Mood changes': _skewed_high,
+    'Insomnia': _skewed_high,
+    'Difficulty focusing': _skewed_high,
+    'gastrointestinal disturbances': _choice(range(11), p=[0.85] + [0.015]*10),
+}
 
 # Episodes Occurrences - Assuming episodic occurrence, not daily
-episodes_occurrences = pd.DataFrame({
-    'Episodes Occurrences': np.random.choice([True, False], p=[0.05, 0.95], size=num_samples),
-})
+EPISODES = {
+    LABEL: _choice([True, False], p=[0.05, 0.95]),
+}
+
+COLUMNS = {**TRIGGERS, **PRODROMES, **EPISODES}
+COLUMN_NAMES = list(COLUMNS)
+
+
+def generate_dataset(n=NUM_SAMPLES, seed=None, chunk_size=CHUNK_SIZE):
+    """Yield ``n`` rows of the dataset as DataFrames of at most ``chunk_size`` rows.
+
+    Args:
+        n (int): Number of rows.
+        seed (int | np.random.SeedSequence): The same seed yields the same rows
+            for any chunk size; None draws fresh entropy.
+        chunk_size (int): Rows per yielded DataFrame, bounds the memory used.
+    """
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    rngs = dict(zip(COLUMN_NAMES, (np.random.default_rng(s) for s in seed_sequence.spawn(len(COLUMNS)))))
+    states = {name: False for name, spec in COLUMNS.items() if not callable(spec)}
+
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+        chunk = {}
+        for name, spec in COLUMNS.items():
+            if callable(spec):
+                chunk[name] = spec(rngs[name], size)
+            else:
+                chunk[name] = generate_persistent_changes(
+                    size, spec, rngs[name], initial=states[name], first_row=start == 0
+                )
+                states[name] = chunk[name][-1]
+        yield pd.DataFrame(chunk, index=pd.RangeIndex(start, start + size))
+
+
+def write_dataset(path, n, seed=None, chunk_size=CHUNK_SIZE):
+    """Stream ``n`` generated rows to an ``.npy`` or ``.parquet`` file.
+
+    Returns:
+        int: The entropy of the seed sequence, to reproduce the file when no
+        seed was given.
+    """
+    seed_sequence = np.random.SeedSequence(seed)
+    chunks = generate_dataset(n, seed_sequence, chunk_size)
+
+    if path.endswith('.npy'):
+        # Written through a memory map, one chunk at a time
+        matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(n, len(COLUMNS)))
+        for chunk in chunks:
+            matrix[chunk.index.start:chunk.index.stop] = chunk.to_numpy(dtype=np.float32)
+        matrix.flush()
+        del matrix
+    elif path.endswith('.parquet'):
+        # One row group per chunk
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        raise ValueError(f"Unsupported dataset format: {path!r} (use .npy or .parquet)")
+
+    return seed_sequence.entropy
+
+
+def count_rows(path):
+    """Return the number of rows of a file written by ``write_dataset``."""
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).metadata.num_rows
+    return np.load(path, mmap_mode='r').shape[0]
+
+
+def iter_chunks(path, chunk_size=CHUNK_SIZE, start=0, stop=None):
+    """Yield rows ``[start, stop)`` of a dataset file as float32 matrices.
+
+    Columns are in ``COLUMN_NAMES`` order, so the label is the last one. At
+    most one chunk is held in memory at a time.
+    """
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=COLUMN_NAMES):
+            rows = slice(max(start - offset, 0), None if stop is None else max(stop - offset, 0))
+            offset += batch.num_rows
+            chunk = batch.to_pandas().to_numpy(dtype=np.float32)[rows]
+            if len(chunk):
+                yield chunk
+            if stop is not None and offset >= stop:
+                return
+        return
+
+    matrix = np.load(path, mmap_mode='r')
+    stop = len(matrix) if stop is None else min(stop, len(matrix))
+    for offset in range(start, stop, chunk_size):
+        yield np.array(matrix[offset:min(offset + chunk_size, stop)], dtype=np.float32)
+
+
+def save_preprocessing(model_path, mean=None, scale=None, window=1):
+    """Write the preprocessing artifact of a model trained on these columns.
+
+    The artifact format and its path next to the model are the API's (see
+    ``api/app/preprocessing.py``), so what is written here is what is served:
+    the feature columns in model order, the mean and scale each was
+    standardized with (none for raw values), and the days per input window of
+    sequence models.
+    """
+    from api.app.preprocessing import Preprocessor, preprocessing_path
+
+    path = preprocessing_path(model_path)
+    Preprocessor(COLUMN_NAMES[:-1], mean, scale, window).save(path)
+    return path
+
+
+def get_fake_dataset(n=NUM_SAMPLES, seed=None):
+    #function to export the dataset as a single DataFrame
+    return pd.concat(list(generate_dataset(n, seed, chunk_size=max(n, 1))) or [pd.DataFrame(columns=COLUMN_NAMES)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the synthetic training dataset.')
+    parser.add_argument('--rows', type=int, default=NUM_SAMPLES)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--output', required=True, help='.npy or .parquet file')
+    args = parser.parse_args()
 
-# Combine all datasets into one
-fake_dataset = pd.concat([triggers, prodromes, episodes_occurrences], axis=1)
+    entropy = write_dataset(args.output, args.rows, args.seed, args.chunk_size)
+    print(json.dumps({'output': args.output, 'rows': args.rows, 'seed': entropy}))
 
-fake_dataset.head()
 
-def get_fake_dataset():
-    #fundtion to export the dataset from the file
-    return fake_dataset
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,29 @@
-
 #lstm_evaluation
+import argparse
+
+import numpy as np
 from tensorflow.keras.models import load_model
 
-from lstm_model import get_split_dataset
+from lstm_model import WINDOW, get_split_dataset
+
+parser = argparse.ArgumentParser(description='Evaluate the LSTM on the validation users of a dataset.')
+parser.add_argument('--data', required=True, help='.npy or .parquet file written by base_data.py')
+parser.add_argument('--window', type=int, default=WINDOW)
+args = parser.parse_args()
 
 # Load the model
 model_loaded = load_model('lstm_model.h5')
 
-X_train, X_test, y_train, y_test = get_split_dataset()
+_, test_dataset, _ = get_split_dataset(args.data, args.window)
 
-test_loss, test_accuracy = model_loaded.evaluate(X_test, y_test, verbose=2)
+test_loss, test_accuracy = model_loaded.evaluate(test_dataset, verbose=2)
 print(f"Test Loss: {test_loss}")
 print(f"Test Accuracy: {test_accuracy}")
 
+X_test, y_test = next(iter(test_dataset))
 predictions = model_loaded.predict(X_test, verbose=2)
 binary_predictions = (predictions > 0.5).astype(int)
 
 # compare some predictions with actual values
 for i in range(10):
-    print(f"Predicted: {binary_predictions[i]}, Actual: {y_test[i]}")
+    print(f"Predicted: {binary_predictions[i]}, Actual: {np.asarray(y_test)[i]}")
@@ -1,44 +1,241 @@
+"""Train the LSTM on sliding windows of each user's last days.
 
-#lstm_model
+Every training example is the sequence of a user's last ``--window`` daily
+feature rows (days before the first log are zeros once standardized),
+labelled with whether the last day had a seizure episode. Windows never cross
+users. The window length is saved with the preprocessing artifact, so the API
+builds the same windows when serving.
+
+Sequences come from a dataset file written by ``base_data.py``, read in
+chunks and split into users of ``--days-per-user`` consecutive rows, or with
+``--from-db`` from the feature store of the API (one sequence per user with
+logs). The ``tf.data`` pipeline caches the decoded sequences, builds the
+windows in a parallel map and prefetches batches while the model trains.
+
+Usage:
+    python base_data.py --rows 1000000 --seed 0 --output dataset.npy
+    python lstm_model.py --data dataset.npy --window 7
+    python lstm_model.py --from-db --window 7
+
+Step time and the share of it spent waiting for the input pipeline (stall)
+are reported per epoch.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 
-#from base_data.py import get_fake_dataset
-from base_data import get_fake_dataset
+from base_data import (
+    CHUNK_SIZE, COLUMN_NAMES, NUM_SAMPLES, count_rows, iter_chunks, save_preprocessing, write_dataset,
+)
+
+NUM_FEATURES = len(COLUMN_NAMES) - 1
+WINDOW = 7
+DAYS_PER_USER = 365
+BATCH_SIZE = 64
+
+
+def file_sequences(path, days_per_user=DAYS_PER_USER, start_user=0, stop_user=None, chunk_size=CHUNK_SIZE):
+    """Yield (features, labels) of users ``[start_user, stop_user)`` of a dataset file."""
+    # Whole users per chunk
+    chunk_size = max(days_per_user, chunk_size - chunk_size % days_per_user)
+    start = start_user * days_per_user
+    stop = None if stop_user is None else stop_user * days_per_user
+    for chunk in iter_chunks(path, chunk_size, start, stop):
+        for offset in range(0, len(chunk), days_per_user):
+            rows = chunk[offset:offset + days_per_user]
+            yield rows[:, :-1], rows[:, -1]
+
+
+def feature_store_sequences(user_ids=None):
+    """Yield (features, labels) of every user with logs, from the API database."""
+    from api.app import create_app, db
+    from api.app.feature_store import build_feature_matrix
+    from api.app.schema import UserLog
+
+    app = create_app()
+    with app.app_context():
+        if user_ids is None:
+            user_ids = db.session.execute(db.select(UserLog.user_id).distinct()).scalars().all()
+        for user_id in user_ids:
+            features = build_feature_matrix(user_id)
+            yield features.X, features.y
+
+
+def feature_statistics(sequences):
+    """Return the per-feature mean and standard deviation, in one streaming pass."""
+    count, total, total_squares = 0, np.zeros(NUM_FEATURES), np.zeros(NUM_FEATURES)
+    for features, _ in sequences:
+        count += len(features)
+        total += features.sum(axis=0, dtype=np.float64)
+        total_squares += np.square(features, dtype=np.float64).sum(axis=0)
+    mean = total / max(count, 1)
+    std = np.sqrt(np.maximum(total_squares / max(count, 1) - mean ** 2, 0))
+    # Constant features are left unscaled
+    std[std == 0] = 1
+    return mean.astype(np.float32), std.astype(np.float32)
+
+
+def window_dataset(sequences, mean, std, window=WINDOW, batch_size=BATCH_SIZE,
+                   shuffle_buffer=None, cache=''):
+    """Build a batched ``tf.data`` pipeline of (window, features) examples.
+
+    Args:
+        sequences (callable): Returns an iterator of per-user (features, labels).
+        mean, std: Feature statistics the inputs are standardized with.
+        window (int): Days per example.
+        shuffle_buffer (int): Shuffle the windows with this buffer, if given.
+        cache (str): File prefix to cache the sequences on disk; '' caches in
+            memory, None disables the cache.
+    """
+    dataset = tf.data.Dataset.from_generator(
+        sequences,
+        output_signature=(
+            tf.TensorSpec(shape=(None, NUM_FEATURES), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        ),
+    )
+    if cache is not None:
+        # Later epochs skip reading and decoding the source
+        dataset = dataset.cache(cache)
+
+    def to_windows(features, labels):
+        features = (features - mean) / std
+        # One window per day, ending on that day
+        padded = tf.pad(features, [[window - 1, 0], [0, 0]])
+        windows = tf.signal.frame(padded, window, 1, axis=0)
+        return tf.data.Dataset.from_tensor_slices((windows, labels))
+
+    dataset = dataset.interleave(
+        to_windows,
+        cycle_length=tf.data.AUTOTUNE,
+        num_parallel_calls=tf.data.AUTOTUNE,
+        deterministic=shuffle_buffer is None,
+    )
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def build_model(window=None):
+    model = Sequential([
+        tf.keras.Input(shape=(window, NUM_FEATURES)),
+        LSTM(50),
+        Dropout(0.2),
+        Dense(1, activation='sigmoid')
+    ])
+    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+    return model
+
+
+def train_epoch(model, dataset):
+    """Train one epoch, returning step time and input pipeline stall statistics."""
+    step_times, wait = [], 0.0
+    iterator = iter(dataset)
+    epoch_started = time.perf_counter()
+    while True:
+        started = time.perf_counter()
+        batch = next(iterator, None)
+        waited = time.perf_counter() - started
+        if batch is None:
+            break
+        logs = model.train_on_batch(*batch, return_dict=True)
+        wait += waited
+        step_times.append(time.perf_counter() - started)
+    elapsed = time.perf_counter() - epoch_started
+    if not step_times:
+        raise ValueError('The training dataset is empty')
+    return {
+        **{name: round(float(value), 4) for name, value in logs.items()},
+        'steps': len(step_times),
+        'step_ms_p50': round(float(np.percentile(step_times, 50)) * 1000, 2),
+        'step_ms_mean': round(float(np.mean(step_times)) * 1000, 2),
+        'input_stall_pct': round(100 * wait / elapsed, 1),
+    }
+
 
-fake_dataset = get_fake_dataset()
+def get_split_dataset(path, window=WINDOW, days_per_user=DAYS_PER_USER, validation_fraction=0.2,
+                      batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE, cache_dir=None):
+    """Return the training and validation pipelines of a dataset file, split by user.
 
-X = fake_dataset.drop('Episodes Occurrences', axis=1).values
-y = fake_dataset['Episodes Occurrences'].values
+    Also returns the (mean, std) the features are standardized with.
+    """
+    n_users = count_rows(path) // days_per_user
+    n_train = int(n_users * (1 - validation_fraction))
 
-# Standardize the dataset
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+    def sequences(start, stop):
+        return lambda: file_sequences(path, days_per_user, start, stop, chunk_size)
 
-# Reshape input to be [samples, time steps, features]
-X_scaled = X_scaled.reshape((X_scaled.shape[0], 1, X_scaled.shape[1]))
+    mean, std = feature_statistics(sequences(0, n_train)())
+    cache = '' if cache_dir is None else os.path.join(cache_dir, 'sequences')
+    train = window_dataset(
+        sequences(0, n_train), mean, std, window, batch_size,
+        shuffle_buffer=16 * batch_size, cache=cache and cache + '-train',
+    )
+    valid = window_dataset(
+        sequences(n_train, n_users), mean, std, window, batch_size,
+        cache=cache and cache + '-valid',
+    )
+    return train, valid, (mean, std)
 
-# Split the dataset
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.2, random_state=42)
 
-def get_split_dataset():
-    return X_train, X_test, y_train, y_test
+def main():
+    parser = argparse.ArgumentParser(description='Train the LSTM on per-user windows.')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--data', help='.npy or .parquet file written by base_data.py')
+    source.add_argument('--from-db', action='store_true', help='read the feature store of the API')
+    parser.add_argument('--rows', type=int, default=NUM_SAMPLES * 10, help='rows to generate without --data')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--window', type=int, default=WINDOW)
+    parser.add_argument('--days-per-user', type=int, default=DAYS_PER_USER)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--cache-dir', help='cache the sequences on disk instead of in memory')
+    parser.add_argument('--output', default='lstm_model.h5')
+    args = parser.parse_args()
 
-# Create the LSTM model
-model = Sequential([
-    LSTM(50, input_shape=(X_train.shape[1], X_train.shape[2])),
-    Dropout(0.2),
-    Dense(1, activation='sigmoid')
-])
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.from_db:
+            mean, std = feature_statistics(feature_store_sequences())
+            train = window_dataset(
+                feature_store_sequences, mean, std, args.window, args.batch_size,
+                shuffle_buffer=16 * args.batch_size,
+            )
+            valid = None
+            statistics = (mean, std)
+        else:
+            path = args.data
+            if path is None:
+                path = os.path.join(tmp, 'dataset.npy')
+                write_dataset(path, args.rows, args.seed, args.chunk_size)
+            train, valid, statistics = get_split_dataset(
+                path, args.window, args.days_per_user, batch_size=args.batch_size,
+                chunk_size=args.chunk_size, cache_dir=args.cache_dir,
+            )
 
-# Compile the model
-model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+        # Serving uses whatever history is available, so the length is not fixed
+        model = build_model()
+        for epoch in range(args.epochs):
+            stats = {'epoch': epoch + 1, **train_epoch(model, train)}
+            if valid is not None:
+                stats['validation'] = {
+                    name: round(float(value), 4)
+                    for name, value in model.evaluate(valid, verbose=0, return_dict=True).items()
+                }
+            print(json.dumps(stats))
 
-# Train the model
-history = model.fit(X_train, y_train, epochs=10, batch_size=64, validation_data=(X_test, y_test), verbose=2)
+    # Save the model in HDF5 format, with the scaling the API applies to its inputs
+    model.save(args.output)
+    save_preprocessing(args.output, *statistics, window=args.window)
 
 
-# Save the model in HDF5 format
-model.save('lstm_model.h5')
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,150 @@
+"""Train the global XGBoost model from chunked on-disk data.
+
+Rows are streamed from an ``.npy``/``.parquet`` file written by
+``base_data.py`` through XGBoost's ``DataIter`` external-memory interface, so
+the training set never has to fit in RAM: XGBoost pages the quantized chunks
+to ``--cache-dir``. The last ``--validation-fraction`` of the rows is used for
+early stopping.
+
+Usage:
+    python base_data.py --rows 100000000 --seed 0 --output dataset.npy
+    python xgboost_model.py --data dataset.npy --n-jobs 4
+
+Without ``--data``, ``--rows`` rows are generated to a temporary file first.
+"""
+
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+
 import xgboost as xgb
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-from base_data import get_fake_dataset
 
+from base_data import (
+    CHUNK_SIZE, COLUMN_NAMES, NUM_SAMPLES, count_rows, iter_chunks, save_preprocessing, write_dataset,
+)
+
+FEATURE_NAMES = COLUMN_NAMES[:-1]
+
+
+class ChunkIter(xgb.DataIter):
+    """Feeds rows ``[start, stop)`` of a dataset file to XGBoost chunk by chunk."""
+
+    def __init__(self, path, start, stop, chunk_size, cache_prefix):
+        self.path = path
+        self.start = start
+        self.stop = stop
+        self.chunk_size = chunk_size
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = iter_chunks(self.path, self.chunk_size, self.start, self.stop)
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return 0
+        input_data(data=chunk[:, :-1], label=chunk[:, -1], feature_names=FEATURE_NAMES)
+        return 1
+
+    def reset(self):
+        self._chunks = None
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def train(path, n_jobs=-1, num_boost_round=100, early_stopping_rounds=10,
+          validation_fraction=0.2, chunk_size=CHUNK_SIZE, cache_dir=None, max_bin=256):
+    """Train a booster on a dataset file, returning it with timing statistics."""
+    n_rows = count_rows(path)
+    n_train = int(n_rows * (1 - validation_fraction))
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as cache:
+        started = time.perf_counter()
+        dtrain = xgb.DMatrix(ChunkIter(path, 0, n_train, chunk_size, os.path.join(cache, 'train')))
+        dvalid = xgb.DMatrix(ChunkIter(path, n_train, n_rows, chunk_size, os.path.join(cache, 'valid')))
+        load_seconds = time.perf_counter() - started
+
+        params = {
+            'objective': 'binary:logistic',
+            'tree_method': 'hist',
+            'max_bin': max_bin,
+            'nthread': n_jobs if n_jobs > 0 else os.cpu_count(),
+            # The last metric is used for early stopping
+            'eval_metric': ['error', 'logloss'],
+        }
+        evals_result = {}
+        booster = xgb.train(
+            params,
+            dtrain,
+            num_boost_round=num_boost_round,
+            evals=[(dvalid, 'validation')],
+            early_stopping_rounds=early_stopping_rounds,
+            evals_result=evals_result,
+            verbose_eval=False,
+        )
+        wall_seconds = time.perf_counter() - started
+        # Release the cache pages before their directory is removed
+        del dtrain, dvalid
+
+    best = booster.best_iteration
+    stats = {
+        'rows': n_rows,
+        'train_rows': n_train,
+        'boost_rounds': booster.num_boosted_rounds(),
+        'best_iteration': best,
+        'accuracy': round(1 - evals_result['validation']['error'][best], 4),
+        'logloss': round(evals_result['validation']['logloss'][best], 4),
+        'load_seconds': round(load_seconds, 2),
+        'wall_seconds': round(wall_seconds, 2),
+        'rows_per_second': round(n_rows / wall_seconds),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+    }
+    return booster, stats
 
-#load the data
-fake_dataset = get_fake_dataset()
 
-# Define features and target
-X = fake_dataset.drop('Episodes Occurrences', axis=1)
-y = fake_dataset['Episodes Occurrences'].astype(int)  # Ensure target is integer
+def main():
+    parser = argparse.ArgumentParser(description='Train the XGBoost model with external memory.')
+    parser.add_argument('--data', help='.npy or .parquet file written by base_data.py')
+    parser.add_argument('--rows', type=int, default=NUM_SAMPLES, help='rows to generate without --data')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--num-boost-round', type=int, default=100)
+    parser.add_argument('--early-stopping-rounds', type=int, default=10)
+    parser.add_argument('--validation-fraction', type=float, default=0.2)
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--cache-dir', help='where XGBoost pages the training data')
+    parser.add_argument('--output', default='xgboost_model.json')
+    args = parser.parse_args()
 
-# Split the data into training and testing sets
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    with tempfile.TemporaryDirectory(dir=args.cache_dir) as tmp:
+        path = args.data
+        if path is None:
+            path = os.path.join(tmp, 'dataset.npy')
+            write_dataset(path, args.rows, args.seed, args.chunk_size)
 
-# Train the XGBoost model
-model = xgb.XGBClassifier(use_label_encoder=False, eval_metric='logloss')
-model.fit(X_train, y_train)
+        booster, stats = train(
+            path,
+            n_jobs=args.n_jobs,
+            num_boost_round=args.num_boost_round,
+            early_stopping_rounds=args.early_stopping_rounds,
+            validation_fraction=args.validation_fraction,
+            chunk_size=args.chunk_size,
+            cache_dir=args.cache_dir,
+        )
 
-# Predictions and evaluation
-predictions = model.predict(X_test)
-accuracy = accuracy_score(y_test, predictions)
-print(f"Accuracy: {accuracy}")
+    # Keep the trees up to the best iteration only
+    booster = booster[:booster.best_iteration + 1]
+    booster.save_model(args.output)
+    # Trees are trained on the raw values, so only the column order is recorded
+    save_preprocessing(args.output)
+    print(json.dumps(stats, indent=2))
 
 
-#xgboost provides its own method for saving models
-model.save_model('xgboost_model.json')
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Tests for the load-test harness."""
+
+import json
+
+from api.benchmarks.load_test import compare, main
+
+
+def _results(p95_ms=10.0, rps=100.0, queries=2.0):
+    return {
+        "settings": {"users": 2},
+        "scenarios": {
+            "logs": {"p95_ms": p95_ms, "rps": rps, "queries_per_request": queries}
+        },
+    }
+
+
+def test_in_process_run(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    argv = [
+        "--users", "2",
+        "--days", "3",
+        "--requests", "6",
+        "--concurrency", "2",
+        "--scenarios", "logs_by_date,medications",
+        "--db", str(tmp_path / "load.db"),
+        "--output", str(output),
+    ]
+
+    assert main(argv) == 0
+    results = json.loads(output.read_text())
+    assert results["seeding"]["tables"]["user_logs"] == 6
+    for name in ("logs_by_date", "medications"):
+        scenario = results["scenarios"][name]
+        assert scenario["requests"] == 6
+        assert scenario["errors"] == 0
+        assert scenario["p50_ms"] <= scenario["p95_ms"] <= scenario["p99_ms"]
+        assert scenario["queries_per_request"] > 0
+
+    # Compared with itself, the database is reused and nothing regresses
+    assert main(argv + ["--compare", str(output), "--tolerance", "10"]) == 0
+    assert json.loads(output.read_text())["seeding"] is None
+
+
+def test_compare_within_tolerance():
+    comparison, regressions = compare(_results(p95_ms=11), _results(), tolerance=0.2)
+    assert regressions == []
+    assert comparison["logs"]["p95_ratio"] == 1.1
+
+
+def test_compare_finds_regressions():
+    comparison, regressions = compare(
+        _results(p95_ms=20, rps=50, queries=3), _results(), tolerance=0.2
+    )
+    assert len(regressions) == 3
+    assert comparison["logs"]["queries_delta"] == 1.0
+
+
+def test_compare_warns_about_different_settings():
+    baseline = {**_results(), "settings": {"users": 100}}
+    comparison, _ = compare(_results(), baseline)
+    assert comparison["warning"] == "settings differ from the baseline"
@@ -2,6 +2,7 @@
 This module contains high-level test fixtures for the API tests.
 """
 
+import functools
 from datetime import date
 from typing import Callable
 
@@ -33,6 +34,39 @@ def app() -> Flask:
         db.drop_all()
 
 
+class ProfilingConfig(TestConfig):
+    QUERY_PROFILING = True
+
+
+def create_authenticated_client(config_class):
+    """Yield a client of a new app, authenticated as a user of its database."""
+    app = create_app(config_class=config_class)
+    with app.app_context():
+        db.create_all()
+        user = User(
+            first_name="Common",
+            last_name="User",
+            email="user@example.com",
+            birthdate=date(2000, 1, 1),
+        )
+        user.set_password("password")
+        db.session.add(user)
+        db.session.commit()
+        client = app.test_client()
+        client.environ_base["HTTP_AUTHORIZATION"] = "Bearer " + create_access_token(
+            identity=user.email
+        )
+        yield client
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def profiling_client() -> FlaskClient:
+    """An authenticated client of an app with query profiling on."""
+    yield from create_authenticated_client(ProfilingConfig)
+
+
 @pytest.fixture()
 def client(app: Flask) -> FlaskClient:
     """A test client for the app."""
@@ -108,6 +142,21 @@ def authenticated_client(client: FlaskClient, access_token: str,
     return client
 
 
+@pytest.fixture
+def query_counter(app: Flask) -> Callable:
+    """Count the SQL statements run in a block, to assert query budgets:
+
+        with query_counter() as queries:
+            client.get("/api/datalog/logs")
+        assert queries.count <= 4
+
+    ``queries.statements`` lists the SQL of each statement.
+    """
+    return functools.partial(
+        app.extensions["query_profiler"].collect, keep_statements=True
+    )
+
+
 """
 @pytest.fixture(autouse=True)
 def _dump_routes(app):
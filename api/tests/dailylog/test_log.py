@@ -1,6 +1,8 @@
 # api/tests/dailylog/test_log.py
+import json
 import pytest
 from api.app.schema import (
+    DailyLogSummary,
     UserLog,
     Prodrome,
     UserProdrome,
@@ -13,7 +15,11 @@ from api.app.schema import (
 )
 from flask_jwt_extended import create_access_token
 from datetime import datetime, timedelta
+from sqlalchemy import event
 from sqlalchemy.orm import Session
+from api.app import db
+from api.app.lookup_cache import lookup_cache
+from api.app.prediction_cache import get_data_version
 
 
 class TestCreateUserProdrome:
@@ -44,6 +50,24 @@ class TestCreateUserProdrome:
         assert response.status_code == 201
         assert "UserProdrome created successfully" in response.json["message"]
 
+    def test_create_user_prodrome_uses_lookup_cache(
+        self, authenticated_client, sample_log, sample_prodrome, query_counter
+    ):
+        """The prodrome is validated against the cache, not the DB."""
+        lookup_cache.table("prodromes")
+        prodrome_data = {
+            "log_id": sample_log.id,
+            "prodrome_id": sample_prodrome.id,
+            "intensity": 3,
+        }
+        with query_counter() as queries:
+            response = authenticated_client.post(
+                "/api/datalog/user-prodromes", json=prodrome_data
+            )
+
+        assert response.status_code == 201
+        assert not any("FROM prodromes" in statement for statement in queries.statements)
+
     def test_create_user_prodrome_missing_data(
         self, authenticated_client, sample_user, sample_prodrome
     ):
@@ -238,6 +262,160 @@ class TestCreateSeizureEpisode:
         assert response.status_code == 401  # Unauthorized status code
 
 
+class TestCreateDailyLog:
+    def test_create_daily_log_success(
+        self,
+        authenticated_client,
+        sample_user,
+        sample_prodrome,
+        sample_aura,
+        sample_trigger,
+        sample_seizure_type,
+    ):
+        daily_log = {
+            "log_time": "2024-04-01T09:30:00",
+            "note": "Long day",
+            "prodromes": [
+                {"prodrome_id": sample_prodrome.id, "intensity": 4},
+                {"prodrome_id": sample_prodrome.id, "intensity": 7, "note": "Later"},
+            ],
+            "auras": [{"aura_id": sample_aura.id, "is_present": True}],
+            "triggers": [{"trigger_id": sample_trigger.id, "value_numeric": 6}],
+            "seizure_episodes": [
+                {
+                    "seizure_type_id": sample_seizure_type.id,
+                    "duration_sec": 90,
+                    "postictal_headache_duration": 30,
+                    "postictal_headache_intensity": 5,
+                }
+            ],
+        }
+        response = authenticated_client.post("/api/datalog/daily-log", json=daily_log)
+        assert response.status_code == 201
+        data = response.json
+
+        log = UserLog.query.get(data["log_id"])
+        assert log.user_id == sample_user.id
+        assert log.log_time == datetime(2024, 4, 1, 9, 30)
+        assert log.note == "Long day"
+        assert [p["id"] for p in data["prodromes"]] == [p.id for p in log.prodromes]
+        assert [p.intensity for p in log.prodromes] == [4, 7]
+        assert UserAura.query.get(data["auras"][0]["id"]).is_present is True
+        assert UserTrigger.query.get(data["triggers"][0]["id"]).value_numeric == 6
+        episode = SeizureEpisode.query.get(data["seizure_episodes"][0]["id"])
+        assert episode.frequency == 1
+        assert episode.postictal_headache_intensity == 5
+
+    def test_create_daily_log_per_item_errors(
+        self, authenticated_client, sample_prodrome, sample_trigger
+    ):
+        daily_log = {
+            "prodromes": [
+                {"prodrome_id": sample_prodrome.id, "intensity": 3},
+                {"prodrome_id": 999, "intensity": 3},
+                {"prodrome_id": sample_prodrome.id, "intensity": 11},
+            ],
+            "triggers": [{"trigger_id": sample_trigger.id}],
+        }
+        response = authenticated_client.post("/api/datalog/daily-log", json=daily_log)
+        assert response.status_code == 201
+        prodromes = response.json["prodromes"]
+        assert "id" in prodromes[0]
+        assert prodromes[1] == {"index": 1, "error": "Prodrome not found"}
+        assert "between 0 and 10" in prodromes[2]["error"]
+        assert "Missing value" in response.json["triggers"][0]["error"]
+
+        # Only the valid item was saved
+        log = UserLog.query.get(response.json["log_id"])
+        assert len(log.prodromes) == 1
+        assert len(log.triggers) == 0
+
+    def test_create_daily_log_wrong_types(
+        self, authenticated_client, sample_aura, sample_trigger, sample_seizure_type
+    ):
+        daily_log = {
+            "auras": [
+                {"aura_id": sample_aura.id, "is_present": "yes"},
+                {"aura_id": [sample_aura.id], "is_present": True},
+                {"aura_id": sample_aura.id, "is_present": True, "note": 5},
+                {"aura_id": sample_aura.id, "is_present": False},
+            ],
+            "triggers": [
+                {"trigger_id": sample_trigger.id, "value_boolean": 1},
+                {"trigger_id": sample_trigger.id, "value_numeric": True},
+            ],
+            "seizure_episodes": [
+                {"seizure_type_id": sample_seizure_type.id, "duration_sec": "60"},
+                {
+                    "seizure_type_id": sample_seizure_type.id,
+                    "duration_sec": 60,
+                    "requires_emergency_intervention": None,
+                },
+            ],
+        }
+        response = authenticated_client.post("/api/datalog/daily-log", json=daily_log)
+        assert response.status_code == 201
+        auras = response.json["auras"]
+        assert auras[0]["error"] == "is_present must be a boolean"
+        assert auras[1]["error"] == "aura_id must be an integer"
+        assert auras[2]["error"] == "note must be a string"
+        assert "id" in auras[3]
+        triggers = response.json["triggers"]
+        assert triggers[0]["error"] == "value_boolean must be a boolean"
+        assert triggers[1]["error"] == "value_numeric must be a number"
+        episodes = response.json["seizure_episodes"]
+        assert episodes[0]["error"] == "duration_sec must be a number"
+        assert "must be a boolean" in episodes[1]["error"]
+
+        log = UserLog.query.get(response.json["log_id"])
+        assert len(log.auras) == 1
+        assert len(log.triggers) == 0
+        assert len(log.seizures) == 0
+
+    def test_threshold_trigger_with_only_a_boolean(
+        self, authenticated_client, db_session
+    ):
+        trigger = Trigger(name="Sleep Quality")
+        db_session.add(trigger)
+        db_session.commit()
+
+        daily_log = {"triggers": [{"trigger_id": trigger.id, "value_boolean": True}]}
+        response = authenticated_client.post("/api/datalog/daily-log", json=daily_log)
+        assert response.status_code == 201
+        summary = db.session.get(DailyLogSummary, response.json["log_id"])
+        assert summary.entry["triggers"] == []
+
+    def test_add_items_to_existing_log(
+        self, authenticated_client, sample_log, sample_aura
+    ):
+        daily_log = {
+            "log_id": sample_log.id,
+            "auras": [{"aura_id": sample_aura.id, "is_present": False}],
+        }
+        response = authenticated_client.post("/api/datalog/daily-log", json=daily_log)
+        assert response.status_code == 201
+        assert response.json["log_id"] == sample_log.id
+        assert len(UserLog.query.get(sample_log.id).auras) == 1
+
+    def test_existing_log_of_another_user(
+        self, authenticated_client, another_user_log
+    ):
+        response = authenticated_client.post(
+            "/api/datalog/daily-log", json={"log_id": another_user_log.id}
+        )
+        assert response.status_code == 403
+
+    def test_invalid_format(self, authenticated_client):
+        response = authenticated_client.post(
+            "/api/datalog/daily-log", json={"prodromes": "headache"}
+        )
+        assert response.status_code == 400
+
+    def test_unauthorized(self, client):
+        response = client.post("/api/datalog/daily-log", json={})
+        assert response.status_code == 401
+
+
 @pytest.mark.usefixtures("client", "db_session")
 class TestUpdateUserProdrome:
     def test_update_user_prodrome_not_found_user(self, client, sample_user):
@@ -417,6 +595,26 @@ class TestUpdateUserTrigger:
         assert "updated successfully" in response.get_json()["message"].lower()
 
 
+    def test_summary_failure_rolls_back(
+        self, authenticated_client, add_user_trigger, monkeypatch
+    ):
+        user_trigger = add_user_trigger()
+
+        def fail(log_ids):
+            raise RuntimeError("summary failed")
+
+        monkeypatch.setattr("api.app.dailylog.refresh_log_summaries", fail)
+        response = authenticated_client.put(
+            f"/api/datalog/user-triggers/{user_trigger.id}", json={"value_numeric": 5}
+        )
+        assert response.status_code == 500
+        assert response.json == {
+            "message": "Failed to update UserTrigger",
+            "error": "summary failed",
+        }
+        assert db.session.get(UserTrigger, user_trigger.id).value_numeric == 10
+
+
 class TestUpdateSeizureEpisode:
     def test_user_not_found(self, client):
         """Ensure it returns 404 if user not found."""
@@ -793,6 +991,113 @@ class TestGetUserLogs:
             log_entry["seizure_episodes"][0]["id"] == seizure_episode.id
         ), "Seizure episode ID should match"
 
+    @pytest.fixture
+    def many_logs(self, sample_user, another_user_log, db_session):
+        """Seven logs, two of them sharing the same log_time."""
+        base = datetime(2022, 4, 1)
+        times = [base + timedelta(hours=h) for h in (0, 1, 2, 2, 3, 4, 5)]
+        logs = [UserLog(user_id=sample_user.id, log_time=t) for t in times]
+        db_session.add_all(logs)
+        db_session.commit()
+        return [log.id for log in logs]
+
+    def _fetch_pages(self, client, limit):
+        ids, pages = [], 0
+        url = f"/api/datalog/logs?limit={limit}"
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            ids.extend(log["log_id"] for log in response.get_json())
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            url = f"/api/datalog/logs?limit={limit}&cursor={cursor}" if cursor else None
+        return ids, pages
+
+    @pytest.mark.parametrize("limit", [1, 2, 3, 7, 100])
+    def test_keyset_pagination(self, authenticated_client, many_logs, limit):
+        """Test pages cover every log exactly once, in (log_time, id) order."""
+        ids, pages = self._fetch_pages(authenticated_client, limit)
+        assert ids == many_logs
+        assert pages == max(1, -(-len(many_logs) // limit))
+
+    def test_pagination_sees_new_logs_after_cursor(
+        self, authenticated_client, sample_user, many_logs, db_session
+    ):
+        """Test logs inserted behind the cursor do not shift later pages."""
+        response = authenticated_client.get("/api/datalog/logs?limit=3")
+        cursor = response.headers["X-Next-Cursor"]
+
+        older = UserLog(user_id=sample_user.id, log_time=datetime(2022, 3, 1))
+        db_session.add(older)
+        db_session.commit()
+
+        response = authenticated_client.get(f"/api/datalog/logs?limit=3&cursor={cursor}")
+        assert [log["log_id"] for log in response.get_json()] == many_logs[3:6]
+
+    def test_cursor_uses_default_page_size(self, app, authenticated_client, many_logs):
+        """Test a cursor without limit uses LOGS_PAGE_SIZE."""
+        app.config["LOGS_PAGE_SIZE"] = 2
+        response = authenticated_client.get("/api/datalog/logs?limit=2")
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = authenticated_client.get(f"/api/datalog/logs?cursor={cursor}")
+        assert [log["log_id"] for log in response.get_json()] == many_logs[2:4]
+
+    @pytest.mark.parametrize(
+        "query", ["limit=0", "limit=abc", "limit=100000", "cursor=not-a-cursor"]
+    )
+    def test_invalid_pagination_parameters(self, authenticated_client, query):
+        """Test invalid limits and cursors are rejected."""
+        response = authenticated_client.get(f"/api/datalog/logs?{query}")
+        assert response.status_code == 400
+
+    def test_ndjson_stream(
+        self, app, authenticated_client, many_logs, sample_log, add_user_prodrome
+    ):
+        """Test the NDJSON mode streams one log per line, batch by batch."""
+        app.config["LOGS_STREAM_BATCH_SIZE"] = 2
+        add_user_prodrome(log=sample_log)
+        expected_ids = sorted(
+            many_logs + [sample_log.id],
+            key=lambda i: (db.session.get(UserLog, i).log_time, i),
+        )
+
+        response = authenticated_client.get("/api/datalog/logs?format=ndjson")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        lines = response.get_data(as_text=True).splitlines()
+        logs = [json.loads(line) for line in lines]
+        assert [log["log_id"] for log in logs] == expected_ids
+        streamed = next(log for log in logs if log["log_id"] == sample_log.id)
+        assert len(streamed["prodromes"]) == 1
+
+    def test_ndjson_stream_honours_cursor(self, app, authenticated_client, many_logs):
+        """Test the NDJSON mode streams every log after the given cursor."""
+        app.config["LOGS_PAGE_SIZE"] = 2
+        response = authenticated_client.get("/api/datalog/logs?limit=2")
+        cursor = response.headers["X-Next-Cursor"]
+
+        response = authenticated_client.get(
+            f"/api/datalog/logs?format=ndjson&cursor={cursor}"
+        )
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line)["log_id"] for line in lines] == many_logs[2:]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_ndjson_stream_pages(self, authenticated_client, many_logs):
+        """Test the NDJSON mode with a limit returns the cursor of the next page."""
+        ids, pages = [], 0
+        url = "/api/datalog/logs?format=ndjson&limit=3"
+        while url:
+            response = authenticated_client.get(url)
+            lines = response.get_data(as_text=True).splitlines()
+            ids.extend(json.loads(line)["log_id"] for line in lines)
+            pages += 1
+            cursor = response.headers.get("X-Next-Cursor")
+            url = cursor and f"/api/datalog/logs?format=ndjson&limit=3&cursor={cursor}"
+        assert ids == many_logs
+        assert pages == 3
+
 
 @pytest.mark.usefixtures("db_session")
 class TestGetUserLogsByDate:
@@ -842,6 +1147,50 @@ class TestGetUserLogsByDate:
         assert len(logs) == 1
         assert logs[0]["log_id"] == log1.id
 
+    def test_day_boundaries(self, authenticated_client, sample_user, db_session):
+        """Test the whole day is included and the next midnight is not."""
+        first = UserLog(user_id=sample_user.id, log_time=datetime(2022, 4, 1))
+        last = UserLog(
+            user_id=sample_user.id, log_time=datetime(2022, 4, 1, 23, 59, 59, 999999)
+        )
+        next_day = UserLog(user_id=sample_user.id, log_time=datetime(2022, 4, 2))
+        previous_day = UserLog(
+            user_id=sample_user.id, log_time=datetime(2022, 3, 31, 23, 59, 59)
+        )
+        db_session.add_all([first, last, next_day, previous_day])
+        db_session.commit()
+        expected_ids = {first.id, last.id}
+
+        response = authenticated_client.get("/api/datalog/logs/date?date=2022-04-01")
+        assert response.status_code == 200
+        assert {log["log_id"] for log in response.get_json()} == expected_ids
+
+    def test_filter_uses_user_id_log_time_index(
+        self, authenticated_client, sample_user, db_session
+    ):
+        """Test the date filter is a range SQLite can serve from the index."""
+        plans = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().startswith("SELECT") and "FROM user_logs" in statement:
+                plans.extend(
+                    row[-1]
+                    for row in conn.exec_driver_sql(
+                        "EXPLAIN QUERY PLAN " + statement, parameters
+                    ).all()
+                )
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            response = authenticated_client.get(
+                "/api/datalog/logs/date?date=2022-04-01"
+            )
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+
+        assert response.status_code == 200
+        assert any("ix_user_logs_user_id_log_time" in plan for plan in plans)
+
     def test_response_structure(
         self,
         authenticated_client,
@@ -1161,3 +1510,268 @@ class TestWeeklyLogs:
         assert "Mild Headache" in logs[1]["prodromes"]
         assert "Auditory Distortion" in logs[1]["auras"]
         assert "Skipped Medication" in logs[1]["triggers"]
+
+    def _add_detailed_logs(self, db_session, user, count):
+        """Create `count` logs from the last week, each with one item of every kind."""
+        prodrome = Prodrome(name="Headache")
+        aura = Aura(name="Visual Disturbances")
+        trigger = Trigger(name="Stress Level")
+        seizure_type = SeizureType(name="Focal")
+        for i in range(count):
+            log = UserLog(
+                user_id=user.id,
+                log_time=datetime.now() - timedelta(minutes=i),
+            )
+            db_session.add_all(
+                [
+                    log,
+                    UserProdrome(log=log, prodrome=prodrome, intensity=5),
+                    UserAura(log=log, aura=aura, is_present=True),
+                    UserTrigger(log=log, trigger=trigger, value_numeric=8),
+                    SeizureEpisode(log=log, seizure_type=seizure_type, duration_sec=60),
+                ]
+            )
+        db_session.commit()
+
+    @pytest.mark.parametrize("count", [1, 1000])
+    def test_query_count_is_constant(
+        self, authenticated_client, sample_user, db_session, query_counter, count
+    ):
+        """The weekly view must not issue extra statements per log."""
+        self._add_detailed_logs(db_session, sample_user, count)
+        db_session.expire_all()
+        # Warm the user and lookup caches and summarize the logs
+        authenticated_client.get("/api/datalog/weekly-logs")
+
+        with query_counter() as queries:
+            response = authenticated_client.get("/api/datalog/weekly-logs")
+        assert response.status_code == 200
+        logs = response.get_json()
+        assert len(logs) == count
+        assert logs[-1]["prodromes"] == ["Headache"]
+        assert logs[-1]["triggers"] == ["Stress"]
+        assert logs[-1]["seizure"][0]["type"] == "Focal"
+        # A single read of the pre-aggregated summaries
+        assert queries.count == 1
+
+
+@pytest.mark.usefixtures("db_session")
+class TestDailyLogSummaries:
+    def _entry(self, log_id):
+        db.session.expire_all()
+        summary = db.session.get(DailyLogSummary, log_id)
+        return summary.entry if summary else None
+
+    def test_handlers_keep_summary_up_to_date(
+        self, authenticated_client, sample_log, sample_prodrome
+    ):
+        """Test create, update and delete handlers refresh the log's summary."""
+        response = authenticated_client.post(
+            "/api/datalog/user-prodromes",
+            json={
+                "log_id": sample_log.id,
+                "prodrome_id": sample_prodrome.id,
+                "intensity": 5,
+            },
+        )
+        assert response.status_code == 201
+        assert self._entry(sample_log.id)["prodromes"] == ["Example Prodrome"]
+
+        user_prodrome_id = response.get_json()["user_prodrome_id"]
+        response = authenticated_client.put(
+            f"/api/datalog/user-prodromes/{user_prodrome_id}", json={"intensity": 1}
+        )
+        assert response.status_code == 200
+        assert self._entry(sample_log.id)["prodromes"] == []
+
+        authenticated_client.put(
+            f"/api/datalog/user-prodromes/{user_prodrome_id}", json={"intensity": 4}
+        )
+        response = authenticated_client.delete(
+            f"/api/datalog/user-prodromes/{user_prodrome_id}"
+        )
+        assert response.status_code == 200
+        assert self._entry(sample_log.id)["prodromes"] == []
+
+    def test_bulk_daily_log_is_summarized(
+        self, authenticated_client, sample_seizure_type
+    ):
+        """Test the bulk endpoint stores the summary of the new log."""
+        response = authenticated_client.post(
+            "/api/datalog/daily-log",
+            json={
+                "seizure_episodes": [
+                    {"seizure_type_id": sample_seizure_type.id, "duration_sec": 30}
+                ]
+            },
+        )
+        assert response.status_code == 201
+        entry = self._entry(response.get_json()["log_id"])
+        assert entry["seizure"][0]["type"] == "Example SeizureType"
+
+    def test_views_read_updated_summaries(
+        self, authenticated_client, sample_log, sample_aura
+    ):
+        """Test a dashboard shows items added after it was first read."""
+        response = authenticated_client.get("/api/datalog/weekly-logs")
+        assert response.get_json()[0]["auras"] == []
+
+        authenticated_client.post(
+            "/api/datalog/user-auras",
+            json={"log_id": sample_log.id, "aura_id": sample_aura.id, "is_present": True},
+        )
+        response = authenticated_client.get("/api/datalog/weekly-logs")
+        assert response.get_json()[0]["auras"] == ["Example Aura"]
+
+    def test_dashboard_periods(self, authenticated_client, sample_user, db_session):
+        """Test the weekly, monthly and yearly views cover 7, 30 and 365 days."""
+        now = datetime.utcnow()
+        db_session.add_all(
+            [
+                UserLog(user_id=sample_user.id, log_time=now - timedelta(days=days))
+                for days in (3, 20, 200, 400)
+            ]
+        )
+        db_session.commit()
+
+        for period, expected in (("weekly", 1), ("monthly", 2), ("yearly", 3)):
+            response = authenticated_client.get(f"/api/datalog/{period}-logs")
+            assert response.status_code == 200
+            assert len(response.get_json()) == expected
+
+    def test_rebuild_command(self, app, sample_log, add_user_prodrome):
+        """Test the CLI recomputes the summaries from the raw items."""
+        add_user_prodrome(log=sample_log)
+        assert self._entry(sample_log.id) is None
+
+        result = app.test_cli_runner().invoke(args=["summaries", "rebuild"])
+        assert "Rebuilt 1 log summaries" in result.output
+        assert self._entry(sample_log.id)["prodromes"] == ["Example Prodrome"]
+
+
+class TestDataVersion:
+    def _version(self, user_id):
+        return get_data_version(user_id)
+
+    def test_handlers_bump_data_version(
+        self, authenticated_client, sample_user, sample_log, sample_trigger
+    ):
+        """Test create, update and delete handlers each bump the data version."""
+        assert self._version(sample_user.id) == 0
+
+        response = authenticated_client.post(
+            "/api/datalog/user-triggers",
+            json={
+                "log_id": sample_log.id,
+                "trigger_id": sample_trigger.id,
+                "value_numeric": 5,
+            },
+        )
+        assert response.status_code == 201
+        assert self._version(sample_user.id) == 1
+
+        user_trigger_id = response.get_json()["user_trigger_id"]
+        authenticated_client.put(
+            f"/api/datalog/user-triggers/{user_trigger_id}", json={"value_numeric": 6}
+        )
+        assert self._version(sample_user.id) == 2
+
+        authenticated_client.delete(f"/api/datalog/user-triggers/{user_trigger_id}")
+        assert self._version(sample_user.id) == 3
+
+    def test_bulk_daily_log_bumps_data_version(self, authenticated_client, sample_user):
+        """Test the bulk endpoint bumps the data version once."""
+        response = authenticated_client.post("/api/datalog/daily-log", json={})
+        assert response.status_code == 201
+        assert self._version(sample_user.id) == 1
+
+    def test_rejected_write_keeps_data_version(
+        self, authenticated_client, sample_user, another_user_log, sample_trigger
+    ):
+        """Test writes denied before the change leave the version unchanged."""
+        response = authenticated_client.post(
+            "/api/datalog/user-triggers",
+            json={
+                "log_id": another_user_log.id,
+                "trigger_id": sample_trigger.id,
+                "value_numeric": 5,
+            },
+        )
+        assert response.status_code == 403
+        assert self._version(sample_user.id) == 0
+
+
+class TestQueryBudgets:
+    """The number of statements an endpoint issues must not grow with the data."""
+
+    @pytest.fixture
+    def detailed_logs(
+        self, sample_user, sample_prodrome, sample_aura, sample_trigger,
+        sample_seizure_type, db_session,
+    ):
+        """20 logs on 2022-04-01, each with one item of every kind."""
+        for i in range(20):
+            log = UserLog(user_id=sample_user.id, log_time=datetime(2022, 4, 1, 0, i))
+            db_session.add_all(
+                [
+                    log,
+                    UserProdrome(log=log, prodrome=sample_prodrome, intensity=5),
+                    UserAura(log=log, aura=sample_aura, is_present=True),
+                    UserTrigger(log=log, trigger=sample_trigger, value_numeric=8),
+                    SeizureEpisode(
+                        log=log, seizure_type=sample_seizure_type, duration_sec=60
+                    ),
+                ]
+            )
+        db_session.commit()
+
+    @pytest.mark.parametrize(
+        "url, budget",
+        [
+            ("/api/datalog/logs", 5),
+            ("/api/datalog/logs?limit=5", 5),
+            ("/api/datalog/logs/date?date=2022-04-01", 5),
+        ],
+    )
+    def test_read_budget(
+        self, authenticated_client, detailed_logs, query_counter, url, budget
+    ):
+        # Warm the user and lookup caches and the summaries
+        authenticated_client.get(url)
+
+        with query_counter() as queries:
+            response = authenticated_client.get(url)
+        assert response.status_code == 200
+        assert queries.count <= budget, queries.statements
+
+    @pytest.mark.parametrize("per_kind", [1, 10])
+    def test_daily_log_budget(
+        self,
+        authenticated_client,
+        sample_prodrome,
+        sample_aura,
+        sample_trigger,
+        sample_seizure_type,
+        query_counter,
+        per_kind,
+    ):
+        """One INSERT per kind of item, whatever the number of items."""
+        daily_log = {
+            "log_time": "2024-04-01T09:30:00",
+            "prodromes": [{"prodrome_id": sample_prodrome.id, "intensity": 3}] * per_kind,
+            "auras": [{"aura_id": sample_aura.id, "is_present": True}] * per_kind,
+            "triggers": [{"trigger_id": sample_trigger.id, "value_numeric": 6}] * per_kind,
+            "seizure_episodes": [
+                {"seizure_type_id": sample_seizure_type.id, "duration_sec": 60}
+            ]
+            * per_kind,
+        }
+        # Warm the user and lookup caches
+        authenticated_client.post("/api/datalog/daily-log", json=daily_log)
+
+        with query_counter() as queries:
+            response = authenticated_client.post("/api/datalog/daily-log", json=daily_log)
+        assert response.status_code == 201
+        # The log, one INSERT and one SELECT of the ids per kind, the summary and
+        # the user's data version
+        assert queries.count <= 17, queries.statements
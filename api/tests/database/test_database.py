@@ -0,0 +1,71 @@
+"""Tests for the engine settings of each database backend."""
+
+import pytest
+
+from api.app import create_app, db
+from api.app.config import Config, TestConfig
+from api.app.database import engine_options
+from api.benchmarks.concurrent_writes import measure
+
+
+def _file_app(tmp_path, **settings):
+    config = type(
+        "FileConfig",
+        (TestConfig,),
+        {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'app.db'}", **settings},
+    )
+    return create_app(config_class=config)
+
+
+def _pragma(name):
+    return db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+
+
+def test_server_database_pool():
+    config = {
+        key: getattr(Config, key)
+        for key in ("DB_POOL_SIZE", "DB_MAX_OVERFLOW", "DB_POOL_RECYCLE", "DB_POOL_TIMEOUT")
+    }
+    config["SQLALCHEMY_DATABASE_URI"] = "postgresql://api@localhost/seizures"
+
+    assert engine_options(config) == {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle": 1800,
+        "pool_timeout": 30,
+        "pool_pre_ping": True,
+    }
+
+
+@pytest.mark.parametrize("uri", ["sqlite:///:memory:", "sqlite:////tmp/api.db"])
+def test_sqlite_keeps_default_pool(uri):
+    assert engine_options({"SQLALCHEMY_DATABASE_URI": uri}) == {}
+
+
+def test_sqlite_pragmas(tmp_path):
+    app = _file_app(tmp_path)
+    with app.app_context():
+        assert _pragma("journal_mode") == "wal"
+        # NORMAL
+        assert _pragma("synchronous") == 1
+        assert _pragma("busy_timeout") == 5000
+        assert _pragma("mmap_size") == 256 * 2**20
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_sqlite_defaults_without_pragmas(tmp_path):
+    app = _file_app(tmp_path, SQLITE_PRAGMAS={})
+    with app.app_context():
+        assert _pragma("journal_mode") == "delete"
+        # FULL
+        assert _pragma("synchronous") == 2
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_concurrent_writes_benchmark():
+    result = measure(workers=2, requests=3, mode="tuned")
+    assert result["journal_mode"] == "wal"
+    assert result["writes"] == 6
+    assert result["errors"] == 0
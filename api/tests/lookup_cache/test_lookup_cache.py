@@ -0,0 +1,94 @@
+"""Tests for the reference table cache."""
+
+from sqlalchemy import event
+
+from api.app import db
+from api.app.lookup_cache import lookup_cache
+from api.app.schema import Prodrome, Trigger
+
+
+def test_lookup_by_id_and_name(db_session):
+    db_session.add(Prodrome(name="Headache", description="Pain"))
+    db_session.commit()
+
+    entry = lookup_cache.get("prodromes", 1)
+    assert entry.name == "Headache"
+    assert entry.description == "Pain"
+    assert lookup_cache.id_for("prodromes", "Headache") == 1
+    assert lookup_cache.get("prodromes", 2) is None
+
+
+def test_commit_invalidates_cache(db_session):
+    db_session.add(Trigger(name="Stress level"))
+    db_session.commit()
+    assert lookup_cache.name("triggers", 1) == "Stress level"
+    version = lookup_cache.version
+
+    trigger = db_session.get(Trigger, 1)
+    trigger.name = "Stress"
+    db_session.commit()
+
+    assert lookup_cache.version > version
+    assert lookup_cache.name("triggers", 1) == "Stress"
+
+
+def test_rollback_keeps_cache(db_session):
+    db_session.add(Trigger(name="Stress level"))
+    db_session.commit()
+    lookup_cache.table("triggers")
+    version = lookup_cache.version
+
+    db_session.add(Trigger(name="Not saved"))
+    db_session.flush()
+    db_session.rollback()
+
+    assert lookup_cache.version == version
+
+
+def _count_statements(func):
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+    return len(statements)
+
+
+def test_misses_reload_once(db_session):
+    db_session.add(Prodrome(name="Headache"))
+    db_session.commit()
+    lookup_cache.table("prodromes")
+
+    def lookup_unknown_ids():
+        for item_id in range(100, 110):
+            assert lookup_cache.get("prodromes", item_id) is None
+
+    # One reload for the first miss, none for the next ones
+    assert _count_statements(lookup_unknown_ids) == 1
+    assert _count_statements(lookup_unknown_ids) == 0
+
+
+def test_miss_finds_row_added_elsewhere(db_session):
+    lookup_cache.table("prodromes")
+    # Bypasses the ORM, like a write from another process
+    db_session.execute(db.insert(Prodrome).values(id=7, name="Added"))
+    db_session.commit()
+
+    assert lookup_cache.name("prodromes", 7) == "Added"
+
+
+def test_cached_lookups_do_not_query(db_session):
+    db_session.add(Prodrome(name="Headache"))
+    db_session.commit()
+    lookup_cache.table("prodromes")
+
+    def lookup_known_id():
+        for _ in range(10):
+            assert lookup_cache.name("prodromes", 1) == "Headache"
+
+    assert _count_statements(lookup_known_id) == 0
@@ -0,0 +1,120 @@
+"""Tests for the Prometheus metrics."""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+from prometheus_client import REGISTRY
+
+from api.app import lstm_batcher, model_loader
+from api.app.cache import TTLCache
+from api.tests.predictions.conftest import FakeLSTM
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+
+def _value(name, **labels):
+    # Metrics are process-wide, so tests compare before and after
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_request_metrics(authenticated_client):
+    labels = {"blueprint": "datalog", "endpoint": "datalog.get_user_logs"}
+    requests = _value("http_requests_total", method="GET", status="200", **labels)
+    queries = _value("http_request_db_queries_sum", **labels)
+
+    assert authenticated_client.get("/api/datalog/logs").status_code == 200
+
+    assert _value("http_requests_total", method="GET", status="200", **labels) == (
+        requests + 1
+    )
+    assert _value("http_request_duration_seconds_count", method="GET", **labels) >= 1
+    # Recorded with query profiling off, as it is by default
+    assert _value("http_request_db_queries_sum", **labels) > queries
+
+
+def test_metrics_endpoint(client):
+    client.get("/api/user/profile")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'http_requests_total{blueprint="user",endpoint="user.get_user_profile"' in body
+    assert "db_pool_checked_out_connections" in body
+    # Scrapes are not counted as requests
+    assert 'endpoint="metrics"' not in body
+
+
+def test_cache_hits_and_misses():
+    cache = TTLCache(60, name="test")
+    hits = _value("cache_requests_total", cache="test", result="hit")
+    misses = _value("cache_requests_total", cache="test", result="miss")
+
+    cache.get("key")
+    cache.set("key", 1)
+    cache.get("key")
+    cache.get("key")
+
+    assert _value("cache_requests_total", cache="test", result="hit") == hits + 2
+    assert _value("cache_requests_total", cache="test", result="miss") == misses + 1
+
+
+def test_model_metrics(app):
+    batches = _value("model_predict_batch_size_count", model="lstm")
+    predictions = _value("model_predict_seconds_count", model="lstm")
+    lazy_model = model_loader.models["lstm"]
+    lazy_model._model = FakeLSTM()
+    try:
+        lstm_batcher.predict([0.0] * 25, timeout=5)
+    finally:
+        lazy_model._model = None
+
+    assert _value("model_predict_batch_size_count", model="lstm") == batches + 1
+    assert _value("model_predict_seconds_count", model="lstm") == predictions + 1
+
+
+def test_model_load_time(app):
+    loads = _value("model_load_seconds_count", model="xgboost")
+    model_loader.models["xgboost"].get()
+    assert _value("model_load_seconds_count", model="xgboost") == loads + 1
+
+
+def test_workers_are_aggregated(tmp_path):
+    """Each process writes its own values; /metrics sums them all."""
+    # Only metrics files (*.db) may be in the directory
+    (tmp_path / "metrics").mkdir()
+    env = {
+        **os.environ,
+        "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "metrics"),
+        "DATABASE_URI": str(tmp_path / "metrics.db"),
+    }
+    code = textwrap.dedent(
+        """
+        from api.app import create_app
+        from api.app.config import Config
+
+        app = create_app(Config)
+        client = app.test_client()
+        client.get("/api/user/profile")
+        print(client.get("/metrics").get_data(as_text=True))
+        """
+    )
+    for _ in range(2):
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=ROOT_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+    line = next(
+        line
+        for line in result.stdout.splitlines()
+        if line.startswith("http_requests_total{")
+        and 'endpoint="user.get_user_profile"' in line
+    )
+    assert float(line.rsplit(" ", 1)[1]) == 2.0
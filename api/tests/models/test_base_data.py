@@ -0,0 +1,69 @@
+"""Tests for the synthetic dataset generator of the training scripts."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.app.preprocessing import Preprocessor, preprocessing_path
+from api.models.base_data import (
+    COLUMN_NAMES,
+    count_rows,
+    generate_dataset,
+    get_fake_dataset,
+    iter_chunks,
+    save_preprocessing,
+    write_dataset,
+)
+
+ROWS = 1000
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 333, ROWS])
+def test_same_seed_same_rows_for_any_chunk_size(chunk_size):
+    expected = get_fake_dataset(ROWS, seed=42)
+    chunks = list(generate_dataset(ROWS, seed=42, chunk_size=chunk_size))
+
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+
+def test_different_seeds_differ():
+    assert not get_fake_dataset(ROWS, seed=1).equals(get_fake_dataset(ROWS, seed=2))
+
+
+def test_columns():
+    dataset = get_fake_dataset(10, seed=0)
+    assert list(dataset.columns) == COLUMN_NAMES
+    assert len(get_fake_dataset(0, seed=0)) == 0
+
+
+@pytest.mark.parametrize("suffix", [".npy", ".parquet"])
+def test_write_and_read_back(tmp_path, suffix):
+    if suffix == ".parquet":
+        pytest.importorskip("pyarrow")
+    path = str(tmp_path / f"dataset{suffix}")
+
+    write_dataset(path, ROWS, seed=42, chunk_size=300)
+
+    assert count_rows(path) == ROWS
+    expected = get_fake_dataset(ROWS, seed=42).to_numpy(dtype=np.float32)
+    np.testing.assert_array_equal(
+        np.concatenate(list(iter_chunks(path, chunk_size=128))), expected
+    )
+    np.testing.assert_array_equal(
+        np.concatenate(list(iter_chunks(path, chunk_size=128, start=250, stop=700))),
+        expected[250:700],
+    )
+
+
+def test_preprocessing_artifact_is_read_by_the_api(tmp_path):
+    model_path = str(tmp_path / "lstm_model.h5")
+    mean = np.arange(len(COLUMN_NAMES) - 1)
+    path = save_preprocessing(model_path, mean, mean + 1, window=7)
+
+    assert path == preprocessing_path(model_path)
+    preprocessor = Preprocessor.load(path)
+    assert preprocessor.columns == [name.lower() for name in COLUMN_NAMES[:-1]]
+    np.testing.assert_array_equal(preprocessor.mean, mean)
+    np.testing.assert_array_equal(preprocessor.scale, mean + 1)
+    assert preprocessor.window == 7
@@ -0,0 +1,51 @@
+import time
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from api.app import inference_pool, model_loader
+from api.app import model_registry as registry
+
+
+class FakeLSTM:
+    """Sums each window, recording the shape of every batch it is called with."""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.batch_shapes = []
+
+    def predict(self, batch, verbose=0):
+        self.batch_shapes.append(batch.shape)
+        time.sleep(self.delay)
+        return batch.sum(axis=(1, 2)).reshape(-1, 1)
+
+
+@pytest.fixture
+def model_registry(app: Flask, tmp_path):
+    """The model registry, storing snapshots in a temporary directory."""
+    app.config["MODEL_REGISTRY_DIR"] = str(tmp_path / "model_registry")
+    app.config["INFERENCE_JOBS_DIR"] = str(tmp_path / "inference_jobs")
+    registry.init_app(app)
+    # Prediction jobs use the same directories
+    inference_pool.init_app(app)
+    return registry
+
+
+@pytest.fixture
+def training_rows():
+    """A small batch of 25-feature rows with their seizure labels."""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 10, size=(20, 25)).astype(np.float32)
+    y = rng.integers(0, 2, size=20)
+    return X, y
+
+
+@pytest.fixture
+def lstm_model(app):
+    """A FakeLSTM served in place of the LSTM model."""
+    model = FakeLSTM()
+    lazy_model = model_loader.models["lstm"]
+    lazy_model._model = model
+    yield model
+    lazy_model._model = None
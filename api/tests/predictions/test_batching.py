@@ -0,0 +1,196 @@
+"""Tests for the LSTM micro-batcher."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from api.app import lstm_batcher, model_loader
+from api.app.batching import Histogram, MicroBatcher
+from api.app.feature_store import FEATURE_COLUMNS, NUM_FEATURES
+from api.app.preprocessing import Preprocessor
+
+from .conftest import FakeLSTM
+
+
+@pytest.fixture
+def fake_lstm():
+    # Slow enough for concurrent windows to queue up during a forward pass
+    model = FakeLSTM(delay=0.05)
+    batcher = MicroBatcher(predict=model.predict, max_batch_size=8, max_wait_ms=50)
+    yield model, batcher
+    batcher.shutdown()
+
+
+def _predict_concurrently(batcher, windows):
+    results = [None] * len(windows)
+    barrier = threading.Barrier(len(windows))
+
+    def worker(i):
+        barrier.wait()
+        results[i] = batcher.predict(windows[i], timeout=10)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(windows))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _start_blocking_pass(model, batcher):
+    """Submit a window and wait until its forward pass has started."""
+    future = batcher.submit(np.zeros(25))
+    deadline = time.monotonic() + 10
+    while not model.batch_shapes:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    return future
+
+
+class TestMicroBatcher:
+    def test_single_request(self, fake_lstm):
+        model, batcher = fake_lstm
+        output = batcher.predict(np.ones(25), timeout=10)
+
+        assert output.tolist() == [25.0]
+        assert model.batch_shapes == [(1, 1, 25)]
+
+    def test_concurrent_requests_share_a_forward_pass(self, fake_lstm):
+        model, batcher = fake_lstm
+        windows = [np.full(25, i, dtype=np.float32) for i in range(8)]
+
+        results = _predict_concurrently(batcher, windows)
+
+        # Every caller gets its own row back
+        assert [r[0] for r in results] == [25.0 * i for i in range(8)]
+        assert len(model.batch_shapes) < len(windows)
+        assert sum(shape[0] for shape in model.batch_shapes) == len(windows)
+
+    def test_batch_size_is_capped(self, fake_lstm):
+        model, batcher = fake_lstm
+        windows = [np.zeros(25) for _ in range(20)]
+
+        _predict_concurrently(batcher, windows)
+
+        assert max(shape[0] for shape in model.batch_shapes) <= 8
+
+    def test_errors_reach_every_caller(self):
+        def failing_predict(batch):
+            raise RuntimeError("model failed")
+
+        batcher = MicroBatcher(predict=failing_predict)
+        try:
+            with pytest.raises(RuntimeError, match="model failed"):
+                batcher.predict(np.zeros(25), timeout=10)
+            # The batcher keeps serving after a failure
+            with pytest.raises(RuntimeError):
+                batcher.predict(np.zeros(25), timeout=10)
+        finally:
+            batcher.shutdown()
+
+    def test_lone_request_does_not_wait(self):
+        batcher = MicroBatcher(predict=FakeLSTM().predict, max_wait_ms=5000)
+        try:
+            started = time.perf_counter()
+            batcher.predict(np.zeros(25), timeout=10)
+            assert time.perf_counter() - started < 1
+        finally:
+            batcher.shutdown()
+
+    def test_failures_outside_the_model_reach_every_caller(self, fake_lstm):
+        model, batcher = fake_lstm
+        # Windows of different widths cannot be stacked into one batch
+        results = []
+
+        def worker(width):
+            try:
+                batcher.predict(np.zeros(width), timeout=10)
+                results.append("ok")
+            except ValueError:
+                results.append("error")
+
+        # Queued behind a running forward pass, so they form one batch
+        blocker = _start_blocking_pass(model, batcher)
+        threads = [threading.Thread(target=worker, args=(w,)) for w in (25, 24)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        blocker.result(timeout=10)
+
+        assert sorted(results) == ["error", "error"]
+        # The batcher thread survived
+        assert batcher.predict(np.ones(25), timeout=10).tolist() == [25.0]
+
+    def test_timed_out_request_is_dropped(self, fake_lstm):
+        model, batcher = fake_lstm
+        model.delay = 0.3
+        blocker = _start_blocking_pass(model, batcher)
+
+        with pytest.raises(TimeoutError):
+            batcher.predict(np.ones(25), timeout=0.05)
+        blocker.result(timeout=10)
+        batcher.predict(np.zeros(25), timeout=10)
+
+        # The abandoned window never reached the model
+        assert sum(shape[0] for shape in model.batch_shapes) == 2
+
+    def test_histograms(self, fake_lstm):
+        _, batcher = fake_lstm
+        _predict_concurrently(batcher, [np.zeros(25) for _ in range(4)])
+
+        stats = batcher.stats()
+        assert stats["queue_wait_ms"]["count"] == 4
+        assert stats["batch_size"]["sum"] == 4
+        assert sum(stats["batch_size"]["buckets"].values()) == stats["batch_size"][
+            "count"
+        ]
+
+
+class TestHistogram:
+    def test_buckets(self):
+        histogram = Histogram((1, 5))
+        for value in (0.5, 1, 3, 5, 10):
+            histogram.observe(value)
+
+        data = histogram.to_dict()
+        assert data["buckets"] == {"<=1": 2, "<=5": 2, ">5": 1}
+        assert data["count"] == 5
+        assert data["mean"] == pytest.approx(3.9)
+
+
+class TestLSTMPredictions:
+    def test_prediction_goes_through_batcher(
+        self, authenticated_client, lstm_model
+    ):
+        response = authenticated_client.get("/api/predictions_lstm")
+        assert response.status_code == 200
+        assert response.json["prediction_lstm"] == 0.0
+        assert lstm_model.batch_shapes == [(1, 1, 25)]
+
+        response = authenticated_client.get("/api/predictions_lstm/batching")
+        assert response.json["batch_size"]["count"] == 1
+        assert response.json["max_batch_size"] == lstm_batcher.max_batch_size
+
+    def test_window_from_artifact(self, authenticated_client, lstm_model, monkeypatch):
+        preprocessor = Preprocessor(
+            FEATURE_COLUMNS, mean=np.ones(NUM_FEATURES), window=7
+        )
+        lazy_preprocessor = model_loader.models["lstm_preprocessing"]
+        monkeypatch.setattr(lazy_preprocessor, "_model", preprocessor)
+
+        response = authenticated_client.get("/api/predictions_lstm")
+        assert response.status_code == 200
+        assert lstm_model.batch_shapes == [(1, 7, 25)]
+        # No logs yet: the whole window is padding, i.e. the columns' means
+        assert response.json["prediction_lstm"] == 7 * NUM_FEATURES
+
+    def test_timeout_returns_503(self, app, authenticated_client, lstm_model):
+        app.config["LSTM_PREDICT_TIMEOUT"] = 0.05
+        lstm_model.delay = 0.3
+
+        response = authenticated_client.get("/api/predictions_lstm")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
@@ -0,0 +1,149 @@
+"""Tests for the fixed-schema feature matrix builder."""
+
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from api.app.feature_store import (
+    FEATURE_COLUMNS,
+    NUM_FEATURES,
+    FeatureSchema,
+    build_daily_features,
+    build_feature_matrix,
+    build_feature_window,
+)
+from api.app.schema import (
+    Prodrome,
+    SeizureEpisode,
+    SeizureType,
+    Trigger,
+    UserLog,
+    UserProdrome,
+    UserTrigger,
+)
+
+
+@pytest.fixture
+def lookup_rows(db_session):
+    """Triggers and prodromes named as in user_data.py, plus a non-feature one."""
+    triggers = {name: Trigger(name=name.capitalize()) for name in FEATURE_COLUMNS[:15]}
+    prodromes = {
+        name: Prodrome(name=name.title()) for name in FEATURE_COLUMNS[15:]
+    }
+    extra = Trigger(name="Not a model feature")
+    seizure_type = SeizureType(name="Focal")
+    db_session.add_all([*triggers.values(), *prodromes.values(), extra, seizure_type])
+    db_session.commit()
+    return triggers, prodromes, extra, seizure_type
+
+
+def test_schema_matches_training_columns(lookup_rows):
+    triggers, prodromes, extra, _ = lookup_rows
+    schema = FeatureSchema.current()
+
+    assert NUM_FEATURES == 25
+    for i, name in enumerate(FEATURE_COLUMNS[:15]):
+        assert schema.trigger_columns[triggers[name].id] == i
+    for i, name in enumerate(FEATURE_COLUMNS[15:]):
+        assert schema.prodrome_columns[prodromes[name].id] == 15 + i
+    assert schema.trigger_columns[extra.id] == -1
+
+
+def test_build_feature_matrix(db_session, sample_user, lookup_rows):
+    triggers, prodromes, extra, seizure_type = lookup_rows
+    now = datetime.now()
+    older = UserLog(user_id=sample_user.id, log_time=now - timedelta(days=1))
+    newer = UserLog(user_id=sample_user.id, log_time=now)
+    db_session.add_all(
+        [
+            newer,
+            older,
+            UserProdrome(log=older, prodrome=prodromes["headache"], intensity=7),
+            UserTrigger(log=older, trigger=triggers["stress level"], value_numeric=8),
+            UserTrigger(log=newer, trigger=triggers["fevers"], value_boolean=True),
+            UserTrigger(log=newer, trigger=extra, value_numeric=3),
+            SeizureEpisode(log=newer, seizure_type=seizure_type, duration_sec=30),
+        ]
+    )
+    db_session.commit()
+
+    features = build_feature_matrix(sample_user.id)
+
+    assert features.X.dtype == np.float32
+    assert features.X.shape == (2, NUM_FEATURES)
+    # Ordered by log time
+    assert list(features.log_ids) == [older.id, newer.id]
+    expected = np.zeros((2, NUM_FEATURES), dtype=np.float32)
+    expected[0, FEATURE_COLUMNS.index("headache")] = 7
+    expected[0, FEATURE_COLUMNS.index("stress level")] = 8
+    expected[1, FEATURE_COLUMNS.index("fevers")] = 1
+    np.testing.assert_array_equal(features.X, expected)
+    np.testing.assert_array_equal(features.y, [0, 1])
+
+
+def test_build_feature_matrix_filters(db_session, sample_user, lookup_rows):
+    first = UserLog(user_id=sample_user.id, log_time=datetime(2024, 1, 1, 9))
+    second = UserLog(user_id=sample_user.id, log_time=datetime(2024, 1, 2, 9))
+    db_session.add_all([first, second])
+    db_session.commit()
+
+    assert list(build_feature_matrix(sample_user.id, since_log_id=first.id).log_ids) == [
+        second.id
+    ]
+    in_range = build_feature_matrix(
+        sample_user.id, start=datetime(2024, 1, 1), end=datetime(2024, 1, 2)
+    )
+    assert list(in_range.log_ids) == [first.id]
+
+
+def test_build_feature_matrix_without_logs(sample_user, lookup_rows):
+    features = build_feature_matrix(sample_user.id)
+    assert features.X.shape == (0, NUM_FEATURES)
+    assert len(features) == 0
+
+
+def test_build_daily_features(db_session, sample_user, lookup_rows):
+    triggers = lookup_rows[0]
+    log = UserLog(user_id=sample_user.id, log_time=datetime(2024, 1, 1, 9))
+    db_session.add_all(
+        [log, UserTrigger(log=log, trigger=triggers["steps"], value_numeric=4000)]
+    )
+    db_session.commit()
+
+    row = build_daily_features(sample_user.id, date(2024, 1, 1))
+    assert row.shape == (NUM_FEATURES,)
+    assert row[FEATURE_COLUMNS.index("steps")] == 4000
+    assert not build_daily_features(sample_user.id, date(2024, 1, 2)).any()
+
+
+def test_build_feature_window(db_session, sample_user, lookup_rows):
+    triggers = lookup_rows[0]
+    steps = FEATURE_COLUMNS.index("steps")
+    for log_time, value in (
+        (datetime(2024, 1, 3, 9), 1000),
+        (datetime(2024, 1, 3, 21), 3000),
+        (datetime(2024, 1, 5, 9), 5000),
+    ):
+        log = UserLog(user_id=sample_user.id, log_time=log_time)
+        db_session.add_all(
+            [log, UserTrigger(log=log, trigger=triggers["steps"], value_numeric=value)]
+        )
+    db_session.commit()
+    padding = np.full(NUM_FEATURES, -1, dtype=np.float32)
+
+    rows = build_feature_window(sample_user.id, date(2024, 1, 6), 5, padding)
+    assert rows.shape == (5, NUM_FEATURES)
+    # Padding before the first log, the last log of each day, zeros when none
+    assert (rows[0] == -1).all()
+    assert rows[1, steps] == 3000
+    assert not rows[2].any()
+    assert rows[3, steps] == 5000
+    assert not rows[4].any()
+
+    # Earlier logs exist, so days without one are not padding
+    rows = build_feature_window(sample_user.id, date(2024, 1, 5), 1, padding)
+    assert rows[0, steps] == 5000
+    rows = build_feature_window(sample_user.id, date(2024, 1, 4), 1, padding)
+    assert not rows.any()
+    assert not build_feature_window(sample_user.id, date(2024, 1, 2), 2).any()
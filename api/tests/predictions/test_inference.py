@@ -0,0 +1,116 @@
+"""Tests for the prediction job pool and its endpoints."""
+
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+from flask_jwt_extended import create_access_token
+
+from api.app import inference_pool
+from api.app.inference import InferencePool, run_xgboost
+from api.app.schema import UserLog
+
+
+class TestPredictionJobs:
+    def _submit(self, client, model):
+        return client.post("/api/predictions/jobs", json={"model": model})
+
+    def test_requires_authentication(self, client):
+        assert self._submit(client, "xgboost").status_code == 401
+
+    def test_unknown_model(self, authenticated_client, model_registry):
+        response = self._submit(authenticated_client, "random-forest")
+        assert response.status_code == 400
+
+    def test_xgboost_job(self, authenticated_client, model_registry):
+        response = self._submit(authenticated_client, "xgboost")
+        assert response.status_code == 202
+        job = response.get_json()
+        assert response.headers["Location"].endswith(f"/jobs/{job['job_id']}")
+
+        # TestConfig runs jobs inline, so it is already done
+        response = authenticated_client.get(response.headers["Location"])
+        assert response.status_code == 200
+        assert response.json["status"] == "done"
+        assert response.json["result"]["model_version"] == 0
+        assert len(response.json["result"]["feature_importance"]) == 5
+
+    def test_xgboost_job_fits_new_logs(
+        self, authenticated_client, model_registry, sample_user, db_session
+    ):
+        db_session.add(UserLog(user_id=sample_user.id, log_time=datetime.now()))
+        db_session.commit()
+
+        job = self._submit(authenticated_client, "xgboost").get_json()
+        assert job["result"]["model_version"] == 1
+        # The web process sees the snapshot stored by the job
+        assert model_registry.get(sample_user.id).version == 1
+
+        job = self._submit(authenticated_client, "xgboost").get_json()
+        assert job["result"]["model_version"] == 1
+
+    def test_failed_job_reports_error(self, app, authenticated_client, model_registry):
+        app.config["LSTM_MODEL_PATH"] = "/nonexistent/lstm_model.h5"
+        inference_pool.init_app(app)
+
+        job = self._submit(authenticated_client, "lstm").get_json()
+        assert job["status"] == "failed"
+        assert job["error"]
+
+    def test_unknown_job(self, authenticated_client):
+        response = authenticated_client.get("/api/predictions/jobs/unknown")
+        assert response.status_code == 404
+
+    def test_other_users_job_is_hidden(
+        self, client, authenticated_client, model_registry, user_factory
+    ):
+        job = self._submit(authenticated_client, "xgboost").get_json()
+
+        other = user_factory("Other", "User", "other@example.com", "Password123!")
+        client.environ_base["HTTP_AUTHORIZATION"] = "Bearer " + create_access_token(
+            identity=other.email
+        )
+        response = client.get(f"/api/predictions/jobs/{job['job_id']}")
+        assert response.status_code == 404
+
+
+class TestInferencePool:
+    def test_jobs_run_in_worker_process(self, app, model_registry):
+        app.config["INFERENCE_WORKERS"] = 1
+        pool = InferencePool(app)
+        try:
+            job = pool.submit(1, "xgboost", run_xgboost, 1, np.zeros((0, 25)), [], 0)
+            result = job.future.result(timeout=120)
+            # The state is saved by a callback that runs after the result is set
+            deadline = time.monotonic() + 5
+            while pool.get(job.id, 1)["status"] != "done":
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        finally:
+            pool.shutdown()
+
+        assert result["model_version"] == 0
+        assert pool.get(job.id, 1)["status"] == "done"
+
+    def test_jobs_are_shared_between_workers(self, app, model_registry):
+        job = InferencePool(app).submit(
+            1, "xgboost", run_xgboost, 1, np.zeros((0, 25)), [], 0
+        )
+
+        # Another web worker, with its own pool, reads the same directory
+        state = InferencePool(app).get(job.id, 1)
+        assert state == job.to_dict()
+        assert InferencePool(app).get(job.id, 2) is None
+
+    def test_finished_jobs_expire(self, app, model_registry):
+        app.config["INFERENCE_RESULT_TTL"] = 0
+        pool = InferencePool(app)
+        job = pool.submit(1, "xgboost", run_xgboost, 1, np.zeros((0, 25)), [], 0)
+        assert job.status == "done"
+        assert pool.get(job.id, 1) is None
+        assert os.listdir(app.config["INFERENCE_JOBS_DIR"]) == []
+
+    def test_job_ids_are_not_paths(self, app, model_registry):
+        pool = InferencePool(app)
+        assert pool.get("../model_registry/meta", 1) is None
@@ -0,0 +1,87 @@
+"""Tests for the NumPy LSTM runtime and its parity with Keras."""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from api.app.lstm_runtime import NumpyLSTM, export_lstm_weights
+from api.app.model_loader import load_lstm_model
+
+tf = pytest.importorskip("tensorflow")
+
+
+@pytest.fixture(scope="module")
+def keras_model():
+    """An untrained model with the architecture of api/models/lstm_model.py."""
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential(
+        [
+            tf.keras.Input(shape=(None, 25)),
+            tf.keras.layers.LSTM(50),
+            tf.keras.layers.Dropout(0.2),
+            tf.keras.layers.Dense(1, activation="sigmoid"),
+        ]
+    )
+    # Non-zero biases so every term of the cell is exercised
+    lstm = model.layers[0]
+    kernel, recurrent_kernel, bias = lstm.get_weights()
+    lstm.set_weights([kernel, recurrent_kernel, np.linspace(-1, 1, bias.size)])
+    return model
+
+
+@pytest.fixture
+def exported(keras_model, tmp_path):
+    path = str(tmp_path / "lstm_model.npz")
+    export_lstm_weights(keras_model, path)
+    return path
+
+
+class TestNumpyLSTM:
+    @pytest.mark.parametrize("timesteps", [1, 3])
+    def test_matches_keras(self, keras_model, exported, timesteps):
+        rng = np.random.default_rng(0)
+        x = rng.normal(0, 2, size=(64, timesteps, 25)).astype(np.float32)
+
+        expected = keras_model.predict(x, verbose=0)
+        actual = NumpyLSTM.load(exported).predict(x)
+
+        assert actual.shape == expected.shape == (64, 1)
+        np.testing.assert_allclose(actual, expected, atol=1e-5)
+
+    def test_loader_uses_numpy_for_npz(self, exported):
+        assert isinstance(load_lstm_model(exported), NumpyLSTM)
+
+    def test_prediction_does_not_import_tensorflow(self, exported):
+        code = (
+            "import sys, numpy as np\n"
+            "from api.app.model_loader import load_lstm_model\n"
+            f"load_lstm_model({exported!r}).predict(np.zeros((1, 1, 25)))\n"
+            "print('tensorflow' in sys.modules)\n"
+        )
+        root_dir = os.path.join(os.path.dirname(__file__), "..", "..", "..")
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=root_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.strip() == "False"
+
+    def test_export_command(self, app, keras_model, tmp_path):
+        source = str(tmp_path / "lstm_model.h5")
+        output = str(tmp_path / "exported.npz")
+        keras_model.save(source)
+
+        result = app.test_cli_runner().invoke(
+            args=["models", "export-lstm", "--source", source, "--output", output]
+        )
+        assert result.exit_code == 0, result.output
+
+        x = np.ones((2, 1, 25), dtype=np.float32)
+        np.testing.assert_allclose(
+            NumpyLSTM.load(output).predict(x), keras_model.predict(x, verbose=0), atol=1e-5
+        )
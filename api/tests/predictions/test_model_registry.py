@@ -0,0 +1,176 @@
+"""Tests for the per-user XGBoost model registry."""
+
+import os
+from datetime import datetime
+
+from api.app.model_registry import (
+    IMPORTANCE_TYPES,
+    ModelRegistry,
+    booster_hash,
+    importance_cache,
+)
+from api.app.prediction_cache import bump_data_version
+from api.app.schema import Trigger, UserLog
+
+
+class TestModelRegistry:
+    def test_no_snapshot_before_first_fit(self, model_registry):
+        assert model_registry.get(1) is None
+
+    def test_base_snapshot_is_version_zero(self, model_registry):
+        base = model_registry.base_snapshot()
+        assert base.version == 0
+        assert len(base.feature_importance) == 5
+
+    def test_fit_stores_new_version(self, model_registry, training_rows):
+        snapshot = model_registry.fit(1, *training_rows, last_log_id=20)
+
+        assert snapshot.version == 1
+        assert snapshot.last_log_id == 20
+        user_dir = os.path.join(model_registry.root_dir, "1")
+        assert os.path.exists(os.path.join(user_dir, "v1.json"))
+        assert os.path.exists(os.path.join(user_dir, "meta.json"))
+        # Continued from the global model, so it has more trees
+        base_trees = model_registry.base_snapshot().booster.num_boosted_rounds()
+        assert snapshot.booster.num_boosted_rounds() > base_trees
+
+    def test_get_returns_cached_snapshot(self, model_registry, training_rows):
+        snapshot = model_registry.fit(1, *training_rows, last_log_id=20)
+        assert model_registry.get(1) is snapshot
+
+    def test_fit_without_new_logs_is_noop(self, model_registry, training_rows):
+        snapshot = model_registry.fit(1, *training_rows, last_log_id=20)
+        assert model_registry.fit(1, *training_rows, last_log_id=20) is snapshot
+
+    def test_fit_with_new_logs_continues_from_snapshot(
+        self, model_registry, training_rows
+    ):
+        first = model_registry.fit(1, *training_rows, last_log_id=20)
+        second = model_registry.fit(1, *training_rows, last_log_id=40)
+
+        assert second.version == 2
+        assert (
+            second.booster.num_boosted_rounds()
+            == first.booster.num_boosted_rounds() + model_registry.num_boost_round
+        )
+
+    def test_snapshots_are_per_user(self, model_registry, training_rows):
+        model_registry.fit(1, *training_rows, last_log_id=20)
+        assert model_registry.get(2) is None
+
+    def test_snapshot_reloaded_from_disk(self, app, model_registry, training_rows):
+        snapshot = model_registry.fit(1, *training_rows, last_log_id=20)
+
+        # A fresh registry, e.g. in another worker, reads the stored snapshot
+        reloaded = ModelRegistry(app).get(1)
+        assert reloaded.version == snapshot.version
+        assert reloaded.last_log_id == snapshot.last_log_id
+        assert reloaded.feature_importance == snapshot.feature_importance
+
+    def test_importances_cached_by_booster_hash(self, app, model_registry):
+        base = model_registry.base_snapshot()
+        assert set(base.importances) == set(IMPORTANCE_TYPES)
+        assert base.model_hash == booster_hash(base.booster)
+
+        # Another snapshot of the same model reuses the computed scores
+        hits = importance_cache.hits
+        other = ModelRegistry(app).base_snapshot()
+        assert other.importances is base.importances
+        assert importance_cache.hits == hits + 1
+
+    def test_feature_importance_ranked_by_weight(self, model_registry):
+        base = model_registry.base_snapshot()
+        weights = base.importances["weight"]
+        assert base.feature_importance == sorted(weights, key=weights.get, reverse=True)[:5]
+
+
+class TestXGBoostPredictions:
+    def test_requires_a_token(self, client, model_registry, sample_user):
+        response = client.get(f"/api/predictions/xgboost?user_id={sample_user.id}")
+        assert response.status_code == 401
+        assert model_registry.get(sample_user.id) is None
+
+    def test_user_without_logs_gets_global_model(
+        self, authenticated_client, model_registry, sample_user
+    ):
+        response = authenticated_client.get("/api/predictions/xgboost")
+        assert response.status_code == 200
+        assert response.json["model_version"] == 0
+        assert len(response.json["feature_importance"]) == 5
+        assert model_registry.get(sample_user.id) is None
+
+    def test_refit_only_when_new_logs(
+        self, authenticated_client, model_registry, sample_user, db_session
+    ):
+        client = authenticated_client
+        url = "/api/predictions/xgboost"
+        # Writes outside the datalog handlers bump the data version themselves
+        db_session.add(UserLog(user_id=sample_user.id, log_time=datetime.now()))
+        bump_data_version(sample_user.id)
+        db_session.commit()
+
+        assert client.get(url).json["model_version"] == 1
+        # Nothing changed, the stored snapshot is served
+        assert client.get(url).json["model_version"] == 1
+
+        db_session.add(UserLog(user_id=sample_user.id, log_time=datetime.now()))
+        bump_data_version(sample_user.id)
+        db_session.commit()
+        assert client.get(url).json["model_version"] == 2
+
+
+class TestXGBoostImportance:
+    def test_requires_a_token(self, client, model_registry, sample_user):
+        response = client.get(
+            f"/api/predictions/xgboost/importance?user_id={sample_user.id}"
+        )
+        assert response.status_code == 401
+
+    def test_all_importance_types(self, authenticated_client, model_registry):
+        response = authenticated_client.get("/api/predictions/xgboost/importance")
+        assert response.status_code == 200
+        assert response.json["model_version"] == 0
+        importance = response.json["importance"]
+        assert set(importance) == set(IMPORTANCE_TYPES)
+        scores = [feature["score"] for feature in importance["gain"]]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_single_importance_type(self, authenticated_client, model_registry):
+        response = authenticated_client.get(
+            "/api/predictions/xgboost/importance?importance_type=cover"
+        )
+        assert list(response.json["importance"]) == ["cover"]
+
+    def test_invalid_importance_type(self, authenticated_client, model_registry):
+        response = authenticated_client.get(
+            "/api/predictions/xgboost/importance?importance_type=nope"
+        )
+        assert response.status_code == 400
+
+    def test_features_named_after_triggers(
+        self, authenticated_client, model_registry, db_session
+    ):
+        db_session.add(Trigger(name="Sleep quality"))
+        db_session.commit()
+
+        response = authenticated_client.get(
+            "/api/predictions/xgboost/importance?importance_type=weight"
+        )
+        labels = {f["feature"]: f for f in response.json["importance"]["weight"]}
+        assert labels["sleep quality"]["name"] == "Sleep quality"
+        assert labels["sleep quality"]["kind"] == "trigger"
+        assert labels["Insomnia"]["kind"] == "prodrome"
+
+    def test_if_none_match_returns_304(self, authenticated_client, model_registry):
+        url = "/api/predictions/xgboost/importance"
+        etag = authenticated_client.get(url).headers["ETag"]
+
+        response = authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.data == b""
+
+    def test_prediction_etag(self, authenticated_client, model_registry):
+        url = "/api/predictions/xgboost"
+        etag = authenticated_client.get(url).headers["ETag"]
+        response = authenticated_client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
@@ -0,0 +1,88 @@
+"""Tests for the per-user prediction cache."""
+
+from datetime import datetime
+
+from sqlalchemy import event
+
+from api.app import db
+from api.app.prediction_cache import bump_data_version, cached_prediction
+from api.app.schema import UserLog
+
+
+def _count_statements(fn):
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+    return result, statements
+
+
+class TestCachedPrediction:
+    def test_computed_once_per_data_version(self, app, sample_user):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        assert cached_prediction("test", sample_user.id, compute) == 1
+        assert cached_prediction("test", sample_user.id, compute) == 1
+
+        bump_data_version(sample_user.id)
+        db.session.commit()
+        assert cached_prediction("test", sample_user.id, compute) == 2
+
+    def test_key_includes_extra_inputs(self, app, sample_user):
+        assert cached_prediction("test", sample_user.id, lambda: "a", 1) == "a"
+        assert cached_prediction("test", sample_user.id, lambda: "b", 2) == "b"
+
+    def test_unknown_user_is_not_cached(self, app):
+        assert cached_prediction("test", 999, lambda: "a") == "a"
+        assert cached_prediction("test", 999, lambda: "b") == "b"
+
+    def test_disabled_with_zero_ttl(self, app, sample_user):
+        app.extensions["prediction_cache"].ttl = 0
+        assert cached_prediction("test", sample_user.id, lambda: "a") == "a"
+        assert cached_prediction("test", sample_user.id, lambda: "b") == "b"
+
+
+class TestCachedEndpoints:
+    def test_lstm_polls_do_not_predict_again(
+        self, authenticated_client, lstm_model, sample_user
+    ):
+        first = authenticated_client.get("/api/predictions_lstm")
+        second = authenticated_client.get("/api/predictions_lstm")
+
+        assert first.json == second.json
+        assert lstm_model.batch_shapes == [(1, 1, 25)]
+
+    def test_lstm_recomputed_after_datalog_write(
+        self, authenticated_client, lstm_model, sample_user
+    ):
+        authenticated_client.get("/api/predictions_lstm")
+        response = authenticated_client.post("/api/datalog/daily-log", json={})
+        assert response.status_code == 201
+
+        authenticated_client.get("/api/predictions_lstm")
+        assert len(lstm_model.batch_shapes) == 2
+
+    def test_xgboost_poll_is_one_query(
+        self, authenticated_client, model_registry, sample_user, db_session
+    ):
+        client = authenticated_client
+        url = "/api/predictions/xgboost"
+        db_session.add(UserLog(user_id=sample_user.id, log_time=datetime.now()))
+        bump_data_version(sample_user.id)
+        db_session.commit()
+        first = client.get(url)
+
+        response, statements = _count_statements(lambda: client.get(url))
+        assert response.json == first.json
+        # Only the data version is read
+        assert len(statements) == 1
@@ -0,0 +1,162 @@
+"""Tests for the preprocessing artifacts of the models."""
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from api.app import model_loader
+from api.app.feature_store import FEATURE_COLUMNS, NUM_FEATURES
+from api.app.lstm_runtime import NumpyLSTM
+from api.app.model_loader import load_lstm_model
+from api.app.preprocessing import (
+    Preprocessor,
+    load_preprocessor,
+    preprocessing_path,
+)
+from api.app.schema import UserLog
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 10, size=(8, NUM_FEATURES)).astype(np.float32)
+
+
+@pytest.fixture
+def standardizer():
+    """Scales every column, in reversed column order."""
+    columns = list(reversed(FEATURE_COLUMNS))
+    return Preprocessor(
+        columns, mean=np.arange(NUM_FEATURES), scale=np.arange(1, NUM_FEATURES + 1)
+    )
+
+
+@pytest.fixture
+def numpy_lstm(tmp_path):
+    rng = np.random.default_rng(0)
+    weights = {
+        "lstm_kernel": rng.normal(size=(NUM_FEATURES, 16)),
+        "lstm_recurrent_kernel": rng.normal(size=(4, 16)),
+        "lstm_bias": rng.normal(size=16),
+        "dense_kernel": rng.normal(size=(4, 1)),
+        "dense_bias": rng.normal(size=1),
+    }
+    path = str(tmp_path / "lstm_model.npz")
+    np.savez(path, **weights)
+    return path
+
+
+class TestPreprocessor:
+    def test_identity_returns_rows_unchanged(self, rows):
+        preprocessor = Preprocessor.identity()
+        assert preprocessor.is_identity
+        assert preprocessor.transform(rows) is rows
+
+    def test_reorders_and_standardizes(self, standardizer, rows):
+        expected = (rows[:, ::-1] - np.arange(NUM_FEATURES)) / np.arange(
+            1, NUM_FEATURES + 1
+        )
+        np.testing.assert_allclose(standardizer.transform(rows), expected, atol=1e-6)
+
+    def test_transforms_windows(self, standardizer, rows):
+        windows = rows.reshape(2, 4, NUM_FEATURES)
+        assert standardizer.transform(windows).shape == (2, 4, NUM_FEATURES)
+
+    def test_column_names_are_case_insensitive(self):
+        assert Preprocessor(["Sleep quality", "Insomnia"]).columns == [
+            "sleep quality",
+            "insomnia",
+        ]
+
+    def test_unknown_column(self):
+        with pytest.raises(ValueError, match="Unknown feature columns"):
+            Preprocessor(["sleep quality", "weather"])
+
+    def test_save_and_load(self, standardizer, rows, tmp_path):
+        path = str(tmp_path / "model.preprocessing.json")
+        standardizer.save(path)
+
+        loaded = Preprocessor.load(path)
+        assert loaded.columns == standardizer.columns
+        np.testing.assert_array_equal(loaded.transform(rows), standardizer.transform(rows))
+        with open(path) as f:
+            assert json.load(f)["columns"][0] == {
+                "name": "gastrointestinal disturbances",
+                "kind": "prodrome",
+            }
+
+    def test_window_round_trips(self, standardizer, tmp_path):
+        path = str(tmp_path / "model.preprocessing.json")
+        Preprocessor(standardizer.columns, window=7).save(path)
+        assert Preprocessor.load(path).window == 7
+
+        # Artifacts written before windows were recorded
+        data = standardizer.to_dict()
+        del data["window"]
+        assert Preprocessor.from_dict(data).window == 1
+
+    def test_padding_row_maps_to_zeros(self, standardizer):
+        padding = standardizer.padding_row()
+        assert padding.shape == (NUM_FEATURES,)
+        np.testing.assert_allclose(standardizer.transform(padding), 0, atol=1e-6)
+
+    def test_unsupported_version(self, standardizer):
+        data = {**standardizer.to_dict(), "version": 99}
+        with pytest.raises(ValueError, match="Unsupported preprocessing version"):
+            Preprocessor.from_dict(data)
+
+    def test_missing_artifact_is_identity(self, tmp_path):
+        assert load_preprocessor(str(tmp_path / "missing.json")).is_identity
+        assert load_preprocessor(None).is_identity
+
+    def test_artifact_path_next_to_model(self):
+        assert (
+            preprocessing_path("/models/lstm_model.h5")
+            == "/models/lstm_model.preprocessing.json"
+        )
+
+
+class TestFusedLSTM:
+    def test_folded_transform_matches_transform_then_predict(
+        self, numpy_lstm, standardizer, rows
+    ):
+        model = NumpyLSTM.load(numpy_lstm)
+        windows = rows.reshape(4, 2, NUM_FEATURES)
+
+        fused = model.with_input_transform(standardizer.weight, standardizer.bias)
+        np.testing.assert_allclose(
+            fused.predict(windows),
+            model.predict(standardizer.transform(windows)),
+            atol=1e-5,
+        )
+
+    def test_loader_applies_artifact(self, numpy_lstm, standardizer, rows, tmp_path):
+        artifact = preprocessing_path(numpy_lstm)
+        standardizer.save(artifact)
+        window = rows[:1].reshape(1, 1, NUM_FEATURES)
+
+        expected = NumpyLSTM.load(numpy_lstm).predict(standardizer.transform(window))
+        model = load_lstm_model(numpy_lstm, preprocessing_path=artifact)
+        np.testing.assert_allclose(model.predict(window), expected, atol=1e-5)
+
+
+class TestXGBoostPreprocessing:
+    def test_training_rows_use_artifact(
+        self, app, sample_user, db_session, standardizer, tmp_path
+    ):
+        from api.app.predictions_xgb import prepare_data_for_xgboost
+
+        artifact = str(tmp_path / "xgboost_model.preprocessing.json")
+        standardizer.save(artifact)
+        app.config["XGBOOST_PREPROCESSING_PATH"] = artifact
+        # Each app configures the loader again when created
+        model_loader.init_app(app)
+        db_session.add(UserLog(user_id=sample_user.id, log_time=datetime.now()))
+        db_session.commit()
+
+        X, y = prepare_data_for_xgboost(sample_user.id)
+        np.testing.assert_allclose(
+            X, standardizer.transform(np.zeros((1, NUM_FEATURES))), atol=1e-6
+        )
@@ -0,0 +1,102 @@
+"""Tests for the NumPy XGBoost tree evaluator."""
+
+import numpy as np
+import pytest
+import xgboost as xgb
+
+from api.app.config import Config
+from api.app.tree_runtime import FlatForest
+
+
+@pytest.fixture(scope="module")
+def booster():
+    booster = xgb.Booster()
+    booster.load_model(Config.XGBOOST_MODEL_PATH)
+    return booster
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 10, size=(500, 25)).astype(np.float32)
+
+
+def _xgboost_predict(booster, X):
+    return booster.predict(xgb.DMatrix(X, feature_names=booster.feature_names))
+
+
+class TestFlatForest:
+    def test_matches_xgboost(self, booster, rows):
+        forest = FlatForest.load(Config.XGBOOST_MODEL_PATH)
+        np.testing.assert_allclose(
+            forest.predict(rows), _xgboost_predict(booster, rows), atol=1e-6
+        )
+
+    def test_missing_values_follow_default_direction(self, booster, rows):
+        rows[np.random.default_rng(1).random(rows.shape) < 0.2] = np.nan
+        forest = FlatForest.from_booster(booster)
+        np.testing.assert_allclose(
+            forest.predict(rows), _xgboost_predict(booster, rows), atol=1e-6
+        )
+
+    def test_matches_fine_tuned_booster(self, booster, training_rows):
+        X, y = training_rows
+        tuned = xgb.train(
+            {"objective": "binary:logistic"},
+            xgb.DMatrix(X, label=y, feature_names=booster.feature_names),
+            num_boost_round=5,
+            xgb_model=booster,
+        )
+        forest = FlatForest.from_booster(tuned)
+        assert len(forest.roots) == tuned.num_boosted_rounds()
+        np.testing.assert_allclose(forest.predict(X), _xgboost_predict(tuned, X), atol=1e-6)
+
+    def test_predict_proba(self, rows):
+        forest = FlatForest.load(Config.XGBOOST_MODEL_PATH)
+        proba = forest.predict_proba(rows[:3])
+        assert proba.shape == (3, 2)
+        np.testing.assert_allclose(proba.sum(axis=1), 1, atol=1e-6)
+
+    def test_empty_batch(self):
+        forest = FlatForest.load(Config.XGBOOST_MODEL_PATH)
+        assert forest.predict(np.zeros((0, 25))).shape == (0,)
+
+    def test_save_and_load(self, rows, tmp_path):
+        forest = FlatForest.load(Config.XGBOOST_MODEL_PATH)
+        path = str(tmp_path / "forest.npz")
+        forest.save(path)
+
+        loaded = FlatForest.load(path)
+        assert loaded.feature_names == forest.feature_names
+        assert loaded.objective == forest.objective
+        np.testing.assert_array_equal(loaded.predict(rows), forest.predict(rows))
+
+
+class TestExportCommand:
+    def test_export_xgboost(self, app, rows, tmp_path):
+        output = str(tmp_path / "forest.npz")
+        result = app.test_cli_runner().invoke(
+            args=["models", "export-xgboost", "--output", output]
+        )
+        assert result.exit_code == 0, result.output
+        assert "100 trees" in result.output
+
+        forest = FlatForest.load(output)
+        np.testing.assert_array_equal(
+            forest.predict(rows), FlatForest.load(Config.XGBOOST_MODEL_PATH).predict(rows)
+        )
+
+    def test_export_requires_output(self, app):
+        result = app.test_cli_runner().invoke(args=["models", "export-xgboost"])
+        assert result.exit_code != 0
+
+    def test_export_refuses_to_overwrite_source(self, app):
+        result = app.test_cli_runner().invoke(
+            args=[
+                "models",
+                "export-xgboost",
+                "--output",
+                app.config["XGBOOST_MODEL_PATH"],
+            ]
+        )
+        assert result.exit_code != 0
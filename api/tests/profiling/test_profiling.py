@@ -0,0 +1,74 @@
+"""Tests for the per-request query profiling."""
+
+import re
+
+import pytest
+
+from api.app import db, query_profiler
+from api.app.profiling import QueryStats
+from api.tests.conftest import ProfilingConfig, create_authenticated_client
+
+
+class ReportConfig(ProfilingConfig):
+    QUERY_PROFILING_REPORT = True
+
+
+@pytest.fixture
+def report_client():
+    yield from create_authenticated_client(ReportConfig)
+
+
+def test_server_timing_is_opt_in(authenticated_client):
+    response = authenticated_client.get("/api/datalog/logs")
+
+    assert response.status_code == 200
+    assert "Server-Timing" not in response.headers
+
+
+def test_server_timing_header(profiling_client):
+    response = profiling_client.get("/api/datalog/logs")
+
+    assert response.status_code == 200
+    match = re.fullmatch(
+        r'db;dur=[\d.]+;desc="(\d+) queries", app;dur=[\d.]+',
+        response.headers["Server-Timing"],
+    )
+    assert match and int(match.group(1)) >= 1
+
+
+def test_collectors_nest(app):
+    with query_profiler.collect() as outer:
+        db.session.execute(db.text("SELECT 1"))
+        with query_profiler.collect(keep_statements=True) as inner:
+            db.session.execute(db.text("SELECT 2"))
+
+    assert outer.count == 2
+    assert inner.count == 1
+    assert inner.statements == ["SELECT 2"]
+    assert outer.seconds >= inner.seconds > 0
+
+
+def test_slowest_statements_are_kept():
+    stats = QueryStats(keep_slowest=2)
+    for ms in (3, 1, 5, 2):
+        stats.record(f"SELECT {ms}", ms / 1000)
+
+    assert stats.count == 4
+    assert [statement for _, statement in stats.slowest] == ["SELECT 5", "SELECT 3"]
+
+
+def test_report_is_opt_in(client):
+    assert client.get("/api/_debug/profile").status_code == 404
+
+
+def test_report(report_client):
+    for _ in range(3):
+        assert report_client.get("/api/datalog/logs").status_code == 200
+
+    report = report_client.get("/api/_debug/profile").get_json()
+    logs = report["endpoints"]["datalog.get_user_logs"]
+    assert logs["requests"] == 3
+    assert logs["queries"] >= 3
+    assert logs["max_queries"] >= logs["queries_per_request"]
+    assert 0 < len(report["slowest_statements"]) <= ReportConfig.QUERY_PROFILING_SLOWEST
+    assert all("SELECT" in item["statement"] for item in report["slowest_statements"])
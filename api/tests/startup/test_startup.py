@@ -0,0 +1,27 @@
+"""Tests for the startup cost of the app factory."""
+
+from api.app import create_app, model_loader
+from api.app.config import Config, TestConfig
+from api.benchmarks.startup import check_startup
+
+
+def test_create_app_within_import_budget():
+    """create_app() must stay within the configured import-time budget."""
+    report, problems = check_startup(Config.STARTUP_IMPORT_BUDGET_MS)
+    assert not problems, problems
+
+
+def test_models_are_not_loaded_at_startup():
+    create_app(TestConfig)
+    assert not any(model.loaded for model in model_loader.models.values())
+
+
+def test_warm_up_loads_models():
+    app = create_app(TestConfig)
+    model_loader.warm_up(["xgboost"])
+
+    assert model_loader.models["xgboost"].loaded
+    assert model_loader.models["xgboost"].load_seconds is not None
+    assert app.extensions["model_registry"].base_snapshot().booster is model_loader.get(
+        "xgboost"
+    )
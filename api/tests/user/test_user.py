@@ -6,7 +6,10 @@ from datetime import datetime
 
 import pytest
 from flask.testing import FlaskClient
+from sqlalchemy import event
 
+from api.app import db
+from api.app.cache import TTLCache
 from api.app.schema import User
 
 
@@ -94,3 +97,53 @@ class TestUserAccount:
         """Test unauthorized access to delete account."""
         response = client.delete("/api/user/delete-account")
         assert response.status_code == 401
+
+
+class TestCurrentUserCache:
+    def _count_user_queries(self, client, url):
+        statements = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if "FROM users" in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", _record)
+        try:
+            response = client.get(url)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", _record)
+        return response, len(statements)
+
+    def test_user_is_cached_across_requests(self, authenticated_client: FlaskClient):
+        """Only the first request looks the user up by email."""
+        _, first = self._count_user_queries(authenticated_client, "/api/user/profile")
+        response, second = self._count_user_queries(
+            authenticated_client, "/api/user/profile"
+        )
+        assert first == 1
+        assert second == 0
+        assert response.json["data"]["email"] == "user@example.com"
+
+    def test_profile_update_invalidates_cache(
+        self, authenticated_client: FlaskClient
+    ):
+        authenticated_client.get("/api/user/profile")
+        authenticated_client.put("/api/user/profile", json={"first_name": "Renamed"})
+
+        response = authenticated_client.get("/api/user/profile")
+        assert response.json["data"]["first_name"] == "Renamed"
+
+    def test_deleted_user_is_not_served_from_cache(
+        self, authenticated_client: FlaskClient
+    ):
+        authenticated_client.get("/api/user/profile")
+        authenticated_client.delete("/api/user/delete-account")
+
+        response = authenticated_client.get("/api/user/profile")
+        assert response.status_code == 404
+
+    def test_cache_disabled(self, app, authenticated_client: FlaskClient):
+        app.extensions["user_cache"] = TTLCache(ttl=0)
+        authenticated_client.get("/api/user/profile")
+        _, count = self._count_user_queries(authenticated_client, "/api/user/profile")
+        assert count == 1
@@ -0,0 +1,127 @@
+"""Tests for the database seeder."""
+
+from datetime import date
+
+from sqlalchemy import event
+
+from api.app import db
+from api.app.schema import (
+    Medication,
+    Prodrome,
+    SeizureType,
+    Trigger,
+    User,
+    UserLog,
+    UserTrigger,
+)
+from api.app.user_data import PRODROMES, TRIGGERS, seed_database
+
+
+def _rows(model):
+    return db.session.scalar(db.select(db.func.count()).select_from(model))
+
+
+def _snapshot():
+    return [
+        (user.email, user.first_name, user.birthdate, len(user.logs))
+        for user in db.session.scalars(db.select(User).order_by(User.id))
+    ]
+
+
+def test_seeds_users_with_one_log_per_day(app):
+    stats = seed_database(users=5, days=30, seed=0, batch_size=2)
+
+    assert _rows(User) == 5
+    assert _rows(UserLog) == 150
+    assert _rows(Medication) == 10
+    assert _rows(Prodrome) == len(PRODROMES)
+    # Every seeded trigger has a value on every log
+    assert _rows(UserTrigger) == 150 * len(TRIGGERS)
+    assert stats["tables"]["user_logs"] == 150
+    assert stats["rows"] == sum(stats["tables"].values())
+    assert stats["rows_per_second"] > 0
+
+    log_days = db.session.scalars(
+        db.select(db.func.date(UserLog.log_time)).where(UserLog.user_id == 1)
+    ).all()
+    assert len(set(log_days)) == 30
+
+
+def test_same_seed_same_data(app):
+    seed_database(users=3, days=5, seed=7)
+    first = _snapshot()
+    db.drop_all()
+    db.create_all()
+
+    seed_database(users=3, days=5, seed=7)
+    assert _snapshot() == first
+
+
+def test_reference_tables_are_added_once(app):
+    seed_database(users=1, days=1, seed=0)
+    seed_database(users=1, days=1, seed=1)
+
+    assert _rows(Trigger) == len(TRIGGERS)
+    assert _rows(SeizureType) == 5
+    # Later runs add new users
+    assert _rows(User) == 2
+
+
+def test_cli(app):
+    result = app.test_cli_runner().invoke(
+        args=["seed", "database", "--users", "2", "--days", "3", "--seed", "0"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "user_logs: 6 rows" in result.output
+    assert "rows/s" in result.output
+
+
+def test_rows_are_inserted_with_one_statement_per_table(app):
+    inserts = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO"):
+            inserts.append(statement.split()[2])
+
+    event.listen(db.engine, "before_cursor_execute", _record)
+    try:
+        seed_database(users=4, days=3, seed=0, batch_size=4)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _record)
+
+    assert inserts.count("users") == 1
+    assert inserts.count("user_logs") == 1
+    # The ids assigned up front are the ones the logs point to
+    for user in db.session.scalars(db.select(User)):
+        assert len(user.logs) == 3
+
+
+def test_medication_triggers_persist_across_days(app):
+    seed_database(users=3, days=60, seed=0)
+    trigger_id = db.session.scalar(
+        db.select(Trigger.id).where(
+            Trigger.name == "Changes in medication dosage or type"
+        )
+    )
+    for user_id in (1, 2, 3):
+        states = db.session.scalars(
+            db.select(UserTrigger.value_boolean)
+            .join(UserLog)
+            .where(UserLog.user_id == user_id, UserTrigger.trigger_id == trigger_id)
+            .order_by(UserLog.log_time)
+        ).all()
+        assert len(states) == 60
+        # Starts off, and changes on few days rather than being redrawn daily
+        assert states[0] is False
+        assert sum(a != b for a, b in zip(states, states[1:])) < 10
+
+
+def test_stopped_medications_end_between_start_and_today(app):
+    seed_database(users=20, days=1, seed=0)
+    stopped = db.session.scalars(
+        db.select(Medication).where(Medication.is_stopped.is_(True))
+    ).all()
+
+    assert stopped
+    for medication in stopped:
+        assert medication.start_date <= medication.end_date <= date.today()